@@ -87,6 +87,9 @@ INFJ = 7, 0, 0
 BinStr = str
 # but int or bytes are fine too
 Entropy = Union[BinStr, int, bytes]
+# in performance critical code, entropy is (integer, bit-length),
+# the bit-length accounting for leading zeros
+IntBits = Tuple[int, int]
 
 
 # BIP 32 derivation path
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""BIP158 compact block filters.
+
+The basic filter of a block is the Golomb-Rice coded set (GCS)
+of its output scripts (except OP_RETURN ones) and of the scripts
+of the outputs it spends: the latter are not in the block,
+so they must be supplied by the caller (e.g. from a UTXO set
+or from the undo data of the block).
+Each script is hashed with SipHash-2-4, keyed with the block hash,
+and mapped into [0, N * M); the sorted values are then
+delta-encoded with Golomb-Rice parameter P.
+
+Matching many scripts against many filters is dominated
+by the hashing of the scripts with the key of each filter:
+the SipHash message words of the scripts are computed once
+and hashed as whole arrays if NumPy is available
+(it is an optional dependency).
+The decoded filter is an array of 64-bit unsigned integers,
+intersected with the sorted hashed scripts.
+"""
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from . import script, varint
+from .alias import BinaryData, Octets
+from .block_files import LazyBlock
+from .blocks import Block
+from .utils import bytes_from_octets, bytesio_from_binarydata, hash256_slices
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+# basic filter parameters
+P = 19
+M = 784931
+
+_MASK = 0xFFFFFFFFFFFFFFFF
+_OP_RETURN = 0x6A
+
+
+def _siphash_words(data: bytes) -> List[int]:
+    "Return the SipHash message words, including the length byte."
+
+    length = len(data)
+    padded = data + bytes(7 - length % 8) + bytes([length & 0xFF])
+    return [
+        int.from_bytes(padded[i : i + 8], "little") for i in range(0, len(padded), 8)
+    ]
+
+
+def _siphash(k0: int, k1: int, words: Iterable[int]) -> int:
+    "Return the SipHash-2-4 of the message words."
+
+    v0 = k0 ^ 0x736F6D6570736575
+    v1 = k1 ^ 0x646F72616E646F6D
+    v2 = k0 ^ 0x6C7967656E657261
+    v3 = k1 ^ 0x7465646279746573
+    for m in words:
+        v3 ^= m
+        for _ in range(2):
+            v0 = (v0 + v1) & _MASK
+            v1 = ((v1 << 13) | (v1 >> 51)) & _MASK ^ v0
+            v0 = ((v0 << 32) | (v0 >> 32)) & _MASK
+            v2 = (v2 + v3) & _MASK
+            v3 = ((v3 << 16) | (v3 >> 48)) & _MASK ^ v2
+            v0 = (v0 + v3) & _MASK
+            v3 = ((v3 << 21) | (v3 >> 43)) & _MASK ^ v0
+            v2 = (v2 + v1) & _MASK
+            v1 = ((v1 << 17) | (v1 >> 47)) & _MASK ^ v2
+            v2 = ((v2 << 32) | (v2 >> 32)) & _MASK
+        v0 ^= m
+    v2 ^= 0xFF
+    for _ in range(4):
+        v0 = (v0 + v1) & _MASK
+        v1 = ((v1 << 13) | (v1 >> 51)) & _MASK ^ v0
+        v0 = ((v0 << 32) | (v0 >> 32)) & _MASK
+        v2 = (v2 + v3) & _MASK
+        v3 = ((v3 << 16) | (v3 >> 48)) & _MASK ^ v2
+        v0 = (v0 + v3) & _MASK
+        v3 = ((v3 << 21) | (v3 >> 43)) & _MASK ^ v0
+        v2 = (v2 + v1) & _MASK
+        v1 = ((v1 << 17) | (v1 >> 47)) & _MASK ^ v2
+        v2 = ((v2 << 32) | (v2 >> 32)) & _MASK
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def siphash(key: Octets, data: Octets) -> int:
+    "Return the SipHash-2-4 of the data, with 16-bytes key."
+
+    key = bytes_from_octets(key, 16)
+    k0 = int.from_bytes(key[:8], "little")
+    k1 = int.from_bytes(key[8:], "little")
+    return _siphash(k0, k1, _siphash_words(bytes_from_octets(data)))
+
+
+def _np_rotl(x: Any, b: int) -> Any:
+    return (x << np.uint64(b)) | (x >> np.uint64(64 - b))
+
+
+def _np_siphash(k0: int, k1: int, words: Any) -> Any:
+    "Return the SipHash-2-4 of the rows of a 2-dimensional array of words."
+
+    n = words.shape[0]
+    v0 = np.full(n, k0 ^ 0x736F6D6570736575, dtype=np.uint64)
+    v1 = np.full(n, k1 ^ 0x646F72616E646F6D, dtype=np.uint64)
+    v2 = np.full(n, k0 ^ 0x6C7967656E657261, dtype=np.uint64)
+    v3 = np.full(n, k1 ^ 0x7465646279746573, dtype=np.uint64)
+    rounds = [2] * words.shape[1] + [4]
+    for j, n_rounds in enumerate(rounds):
+        if j < words.shape[1]:
+            v3 ^= words[:, j]
+        else:
+            v2 ^= np.uint64(0xFF)
+        for _ in range(n_rounds):
+            v0 += v1
+            v1 = _np_rotl(v1, 13) ^ v0
+            v0 = _np_rotl(v0, 32)
+            v2 += v3
+            v3 = _np_rotl(v3, 16) ^ v2
+            v0 += v3
+            v3 = _np_rotl(v3, 21) ^ v0
+            v2 += v1
+            v1 = _np_rotl(v1, 17) ^ v2
+            v2 = _np_rotl(v2, 32)
+        if j < words.shape[1]:
+            v0 ^= words[:, j]
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+def _np_map_to_range(hashes: Any, f: int) -> Any:
+    "Return the high 64 bits of the 128-bit products hashes * f."
+
+    low = np.uint64(0xFFFFFFFF)
+    thirty_two = np.uint64(32)
+    a0, a1 = hashes & low, hashes >> thirty_two
+    b0, b1 = np.uint64(f & 0xFFFFFFFF), np.uint64(f >> 32)
+    low_low = a0 * b0
+    high_low = a1 * b0
+    cross = (low_low >> thirty_two) + (high_low & low) + a0 * b1
+    return (high_low >> thirty_two) + (cross >> thirty_two) + a1 * b1
+
+
+def _keys(block_hash: str) -> Tuple[int, int]:
+    "Return the SipHash keys, from the first 16 bytes of the block hash."
+
+    key = bytes.fromhex(block_hash)[::-1]
+    return int.from_bytes(key[:8], "little"), int.from_bytes(key[8:16], "little")
+
+
+def _golomb_encode(values: Sequence[int]) -> bytes:
+    "Return the Golomb-Rice coding of the deltas of the sorted values."
+
+    chunks = []
+    last = 0
+    remainder_format = f"0{P}b"
+    for value in values:
+        delta = value - last
+        last = value
+        chunks.append(
+            "1" * (delta >> P) + "0" + format(delta & (1 << P) - 1, remainder_format)
+        )
+    bits = "".join(chunks)
+    bits += "0" * (-len(bits) % 8)
+    return int(bits, 2).to_bytes(len(bits) // 8, "big") if bits else b""
+
+
+def _golomb_decode(n: int, data: bytes) -> array:
+    "Return the n sorted values, decoding the Golomb-Rice coded deltas."
+
+    bits = format(int.from_bytes(data, "big"), f"0{8 * len(data)}b") if data else ""
+    find = bits.find
+    values = array("Q")
+    append = values.append
+    value = 0
+    start = 0
+    for _ in range(n):
+        zero = find("0", start)
+        end = zero + 1 + P
+        if zero == -1 or end > len(bits):
+            raise ValueError("truncated filter")
+        value += (zero - start) << P | int(bits[zero + 1 : end], 2)
+        append(value)
+        start = end
+    return values
+
+
+_BlockFilter = TypeVar("_BlockFilter", bound="BlockFilter")
+
+
+@dataclass
+class BlockFilter:
+    """BIP158 basic block filter.
+
+    data is the Golomb-Rice coded set of the n hashed scripts.
+    """
+
+    block_hash: str
+    n: int
+    data: bytes
+
+    @classmethod
+    def deserialize(
+        cls: Type[_BlockFilter], data: BinaryData, block_hash: str
+    ) -> _BlockFilter:
+        stream = bytesio_from_binarydata(data)
+        n = varint.decode(stream)
+        return cls(block_hash, n, stream.read())
+
+    def serialize(self) -> bytes:
+        return varint.encode(self.n) + self.data
+
+    @classmethod
+    def from_block(
+        cls: Type[_BlockFilter],
+        block: Union[Block, LazyBlock],
+        spent_scriptPubKeys: Iterable[Octets],
+    ) -> _BlockFilter:
+        """Return the basic filter of the block.
+
+        The scripts of the outputs spent by the block
+        (in any order) must be provided.
+        """
+
+        items = set()
+        if isinstance(block, LazyBlock):
+            block_hash = block.hash
+            for lazy_tx in block.transactions:
+                for lazy_out in lazy_tx.vout:
+                    items.add(bytes(lazy_out.scriptPubKeyBytes))
+        else:
+            block_hash = block.header.hash
+            for transaction in block.transactions:
+                for tx_out in transaction.vout:
+                    items.add(script.encode(tx_out.scriptPubKey))
+        items = {item for item in items if item and item[0] != _OP_RETURN}
+        for scriptPubKey in spent_scriptPubKeys:
+            scriptPubKey = bytes_from_octets(scriptPubKey)
+            if scriptPubKey:
+                items.add(scriptPubKey)
+
+        k0, k1 = _keys(block_hash)
+        f = len(items) * M
+        values = sorted(_siphash(k0, k1, _siphash_words(i)) * f >> 64 for i in items)
+        return cls(block_hash, len(items), _golomb_encode(values))
+
+    def values(self, use_numpy: Optional[bool] = None) -> Any:
+        """Return the sorted hashed scripts.
+
+        A NumPy array is returned if NumPy is available,
+        unless use_numpy is False; otherwise a standard library array.
+        """
+
+        values = _golomb_decode(self.n, self.data)
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy:
+            if np is None:
+                raise ValueError("NumPy is not available")
+            return np.frombuffer(values, dtype=np.uint64)
+        return values
+
+    @property
+    def hash(self) -> str:
+        return hash256_slices(self.serialize())[::-1].hex()
+
+    def header(self, previous_header: str = "00" * 32) -> str:
+        "Return the filter header, chaining the previous one."
+
+        h = hash256_slices(
+            bytes.fromhex(self.hash)[::-1], bytes.fromhex(previous_header)[::-1]
+        )
+        return h[::-1].hex()
+
+    def match(self, scripts: Iterable[Octets]) -> List[bytes]:
+        "Return the scripts (possibly) included in the filter."
+        return FilterMatcher(scripts).match(self)
+
+
+def filter_headers(
+    filters: Iterable[BlockFilter], previous_header: str = "00" * 32
+) -> List[str]:
+    "Return the chained headers of consecutive filters."
+
+    headers = []
+    for block_filter in filters:
+        previous_header = block_filter.header(previous_header)
+        headers.append(previous_header)
+    return headers
+
+
+class FilterMatcher:
+    """Scripts prepared to be matched against many block filters.
+
+    The SipHash message words of the scripts are computed once;
+    with NumPy (if available, unless use_numpy is False)
+    scripts with the same number of words are hashed as a single array.
+    """
+
+    def __init__(
+        self, scripts: Iterable[Octets], use_numpy: Optional[bool] = None
+    ) -> None:
+
+        self.scripts = list(dict.fromkeys(bytes_from_octets(s) for s in scripts))
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy and np is None:
+            raise ValueError("NumPy is not available")
+        self.use_numpy = use_numpy
+        words = [_siphash_words(s) for s in self.scripts]
+        if use_numpy:
+            groups: Dict[int, List[int]] = {}
+            for i, w in enumerate(words):
+                groups.setdefault(len(w), []).append(i)
+            self._groups = [
+                (np.array(indexes), np.array([words[i] for i in indexes], np.uint64))
+                for indexes in groups.values()
+            ]
+        else:
+            self._words = words
+
+    def _values(self, block_filter: BlockFilter) -> Any:
+        "Return the scripts hashed and mapped into the filter range."
+
+        k0, k1 = _keys(block_filter.block_hash)
+        f = block_filter.n * M
+        if self.use_numpy:
+            values = np.empty(len(self.scripts), dtype=np.uint64)
+            for indexes, words in self._groups:
+                values[indexes] = _np_map_to_range(_np_siphash(k0, k1, words), f)
+            return values
+        return [_siphash(k0, k1, w) * f >> 64 for w in self._words]
+
+    def match(self, block_filter: BlockFilter) -> List[bytes]:
+        "Return the scripts (possibly) included in the filter."
+
+        if block_filter.n == 0 or not self.scripts:
+            return []
+        values = block_filter.values(self.use_numpy)
+        queries = self._values(block_filter)
+        if self.use_numpy:
+            positions = np.searchsorted(values, queries)
+            positions[positions == len(values)] = 0
+            found = np.flatnonzero(values[positions] == queries)
+            return [self.scripts[i] for i in found]
+        n = len(values)
+        matched = []
+        for i, query in enumerate(queries):
+            position = bisect_left(values, query)
+            if position < n and values[position] == query:
+                matched.append(self.scripts[i])
+        return matched
+
+    def match_any(self, block_filter: BlockFilter) -> bool:
+        return bool(self.match(block_filter))
@@ -34,7 +34,11 @@ A BIP32 extended key is 78 bytes:
 
 import copy
 import hmac
-from typing import List, Optional, Tuple
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple
 
 from . import bip39, electrum
 from .alias import INF, BIP32Key, BIP32KeyDict, Octets, Path, Point
@@ -211,6 +215,73 @@ def mxprv_from_electrum_mnemonic(
         raise ValueError(f"unmanaged electrum mnemonic version: {version}")
 
 
+Passphrased = Tuple[Mnemonic, str]
+
+
+def _mxprvs_from_mnemonics(
+    mxprv_from_mnemonic: Callable[[Mnemonic, str], bytes],
+    mnemonics: Iterable[Passphrased],
+    max_workers: Optional[int],
+    processes: bool,
+) -> Iterator[bytes]:
+
+    workers = max_workers or os.cpu_count() or 1
+    executor: Executor
+    if processes:
+        executor = ProcessPoolExecutor(workers)
+    else:
+        # hashlib.pbkdf2_hmac releases the GIL
+        executor = ThreadPoolExecutor(workers)
+    with executor:
+        # bounded queue of pending results: input is consumed lazily
+        # and results are yielded in input order
+        pending: Deque = deque()
+        for mnemonic, passphrase in mnemonics:
+            pending.append(executor.submit(mxprv_from_mnemonic, mnemonic, passphrase))
+            if len(pending) > 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def mxprvs_from_bip39_mnemonics(
+    mnemonics: Iterable[Passphrased],
+    network: str = "mainnet",
+    max_workers: Optional[int] = None,
+    processes: bool = False,
+) -> Iterator[bytes]:
+    """Return BIP32 root master extended private keys from BIP39 mnemonics.
+
+    (mnemonic, passphrase) pairs are stretched in parallel
+    using a thread pool (or a process pool, if requested);
+    root keys are yielded in input order.
+    """
+
+    mxprv_from_mnemonic = partial(mxprv_from_bip39_mnemonic, network=network)
+    return _mxprvs_from_mnemonics(
+        mxprv_from_mnemonic, mnemonics, max_workers, processes
+    )
+
+
+def mxprvs_from_electrum_mnemonics(
+    mnemonics: Iterable[Passphrased],
+    network: str = "mainnet",
+    max_workers: Optional[int] = None,
+    processes: bool = False,
+) -> Iterator[bytes]:
+    """Return BIP32 master extended private keys from Electrum mnemonics.
+
+    (mnemonic, passphrase) pairs are stretched in parallel
+    using a thread pool (or a process pool, if requested);
+    master keys are yielded in input order.
+    """
+
+    mxprv_from_mnemonic = partial(mxprv_from_electrum_mnemonic, network=network)
+    return _mxprvs_from_mnemonics(
+        mxprv_from_mnemonic, mnemonics, max_workers, processes
+    )
+
+
 def xpub_from_xprv(xprv: BIP32Key) -> bytes:
     """Neutered Derivation (ND).
 
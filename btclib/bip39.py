@@ -40,10 +40,12 @@ from hashlib import pbkdf2_hmac, sha256
 from .entropy import (
     BinStr,
     Entropy,
+    IntBits,
     _bits,
-    _entropy_from_indexes,
-    _indexes_from_entropy,
-    binstr_from_entropy,
+    _indexes_from_intbits,
+    _intbits_from_indexes,
+    binstr_from_intbits,
+    intbits_from_entropy,
 )
 from .mnemonic import (
     Mnemonic,
@@ -55,16 +57,14 @@ from .mnemonic import (
 _words = tuple(b // 32 * 3 for b in _bits)
 
 
-def _entropy_checksum(binstr_entropy: BinStr) -> BinStr:
-    """Return the checksum of the binary string input entropy.
+def _intbits_checksum(intbits: IntBits) -> IntBits:
+    """Return the (int, bits) checksum of the (int, bits) input entropy.
 
-    Entropy must be expressed as binary 0/1 string and
-    must be 128, 160, 192, 224, or 256 bits.
+    Entropy must be 128, 160, 192, 224, or 256 bits.
     Leading zeros are considered genuine entropy, not redundant padding.
     """
 
-    nbits = len(binstr_entropy)
-    int_entropy = int(binstr_entropy, 2)
+    int_entropy, nbits = intbits
     if nbits not in _bits:
         m = f"invalid number of bits for BIP39 entropy: {nbits}; must be in {_bits}"
         raise ValueError(m)
@@ -73,14 +73,36 @@ def _entropy_checksum(binstr_entropy: BinStr) -> BinStr:
 
     # 256-bit checksum
     byteschecksum = sha256(bytes_entropy).digest()
-    # integer checksum (leading zeros are lost)
-    intchecksum = int.from_bytes(byteschecksum, "big")
-    # convert checksum to binary '01' string
-    checksum = bin(intchecksum)[2:]  # remove '0b'
-    checksum = checksum.zfill(256)  # pad with leading lost zeros
     # leftmost bits
     checksum_bits = nbytes // 4
-    return checksum[:checksum_bits]
+    intchecksum = int.from_bytes(byteschecksum, "big") >> (256 - checksum_bits)
+    return intchecksum, checksum_bits
+
+
+def _entropy_checksum(binstr_entropy: BinStr) -> BinStr:
+    """Return the checksum of the binary string input entropy.
+
+    Entropy must be expressed as binary 0/1 string and
+    must be 128, 160, 192, 224, or 256 bits.
+    Leading zeros are considered genuine entropy, not redundant padding.
+    """
+
+    intbits = int(binstr_entropy, 2), len(binstr_entropy)
+    return binstr_from_intbits(_intbits_checksum(intbits))
+
+
+def mnemonic_from_intbits(intbits: IntBits, lang: str = "en") -> Mnemonic:
+    """Convert input (int, bits) entropy to BIP39 checksummed mnemonic.
+
+    Entropy must be 128, 160, 192, 224, or 256 bits.
+    """
+
+    int_checksum, checksum_bits = _intbits_checksum(intbits)
+    int_entropy, nbits = intbits
+    int_entropy = (int_entropy << checksum_bits) + int_checksum
+    base = _wordlists.language_length(lang)
+    indexes = _indexes_from_intbits((int_entropy, nbits + checksum_bits), base)
+    return _mnemonic_from_indexes(indexes, lang)
 
 
 def mnemonic_from_entropy(entropy: Entropy, lang: str = "en") -> Mnemonic:
@@ -100,15 +122,12 @@ def mnemonic_from_entropy(entropy: Entropy, lang: str = "en") -> Mnemonic:
     length, then only the leftmost bits are retained.
     """
 
-    binstr_entropy = binstr_from_entropy(entropy, _bits)
-    checksum = _entropy_checksum(binstr_entropy)
-    base = _wordlists.language_length(lang)
-    indexes = _indexes_from_entropy(binstr_entropy + checksum, base)
-    return _mnemonic_from_indexes(indexes, lang)
+    intbits = intbits_from_entropy(entropy, _bits)
+    return mnemonic_from_intbits(intbits, lang)
 
 
-def entropy_from_mnemonic(mnemonic: Mnemonic, lang: str = "en") -> BinStr:
-    "Return the entropy from the BIP39 checksummed mnemonic sentence."
+def intbits_from_mnemonic(mnemonic: Mnemonic, lang: str = "en") -> IntBits:
+    "Return the (int, bits) entropy from the BIP39 checksummed mnemonic."
 
     words = len(mnemonic.split())
     if words not in _words:
@@ -117,19 +136,27 @@ def entropy_from_mnemonic(mnemonic: Mnemonic, lang: str = "en") -> BinStr:
 
     indexes = _indexes_from_mnemonic(mnemonic, lang)
     base = _wordlists.language_length(lang)
-    cs_entropy = _entropy_from_indexes(indexes, base)
+    int_cs_entropy, cs_bits = _intbits_from_indexes(indexes, base)
 
     # entropy is only the first part of cs_entropy
-    bits = int(len(cs_entropy) * 32 / 33)
-    binstr_entropy = cs_entropy[:bits]
+    bits = cs_bits * 32 // 33
+    intbits = int_cs_entropy >> (cs_bits - bits), bits
 
     # the second part being the checksum, to be verified
-    checksum = _entropy_checksum(binstr_entropy)
-    if cs_entropy[bits:] != checksum:
-        m = f"invalid checksum: {cs_entropy[bits:]}; expected: {checksum}"
+    int_checksum = int_cs_entropy & ((1 << (cs_bits - bits)) - 1)
+    checksum = _intbits_checksum(intbits)
+    if int_checksum != checksum[0]:
+        m = f"invalid checksum: {binstr_from_intbits((int_checksum, checksum[1]))}"
+        m += f"; expected: {binstr_from_intbits(checksum)}"
         raise ValueError(m)
 
-    return binstr_entropy
+    return intbits
+
+
+def entropy_from_mnemonic(mnemonic: Mnemonic, lang: str = "en") -> BinStr:
+    "Return the entropy from the BIP39 checksummed mnemonic sentence."
+
+    return binstr_from_intbits(intbits_from_mnemonic(mnemonic, lang))
 
 
 def seed_from_mnemonic(
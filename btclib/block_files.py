@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Streaming reader of Bitcoin Core blk*.dat block files.
+
+Each block in a block file is framed by the 4-bytes network magic
+and the 4-bytes little-endian block size; the unused tail
+of a pre-allocated file is zero-filled.
+
+Block files are memory-mapped and walked one frame at a time:
+blocks are yielded either as fully decoded Block objects
+or as LazyBlock views over the memory map, decoding transactions
+(as LazyTx views) only when accessed.
+The memory map is released when no view is referencing it anymore.
+
+Note that blocks are stored in block files in the order they
+have been downloaded, which is not necessarily the chain order.
+"""
+
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from .blocks import Block, BlockHeader
+from .lazy_tx import LazyTx
+from .merkle import MerkleTree
+from .utils import hash256_slices
+from .varint import Buffer, decode_at
+
+# network magic bytes, as stored in the block files
+MAGIC = {
+    "mainnet": b"\xf9\xbe\xb4\xd9",
+    "testnet": b"\x0b\x11\x09\x07",
+    "regtest": b"\xfa\xbf\xb5\xda",
+}
+
+_T = TypeVar("_T")
+
+
+class LazyBlock:
+    """Read-only, lazily decoded view of a serialized block.
+
+    The buffer is not copied, so it must not be modified
+    while the view is in use.
+    Transactions are indexed on first access.
+    """
+
+    __slots__ = ("_buffer", "_transactions")
+
+    def __init__(self, data: Buffer) -> None:
+
+        buffer = memoryview(data)
+        if buffer.ndim != 1 or buffer.itemsize != 1:
+            buffer = buffer.cast("B")
+        if len(buffer) < 81:
+            raise ValueError(f"truncated block: {len(buffer)} bytes")
+        self._buffer = buffer
+        self._transactions: Optional[List[LazyTx]] = None
+
+    @property
+    def header_bytes(self) -> memoryview:
+        return self._buffer[:80]
+
+    @property
+    def header(self) -> BlockHeader:
+        "Return the decoded header, without validating it."
+        return BlockHeader.deserialize(self._buffer[:80].tobytes(), False)
+
+    @property
+    def hash_bytes(self) -> bytes:
+        "Return the block hash in internal byte order (i.e. not reversed)."
+        return hash256_slices(self._buffer[:80])
+
+    @property
+    def hash(self) -> str:
+        return self.hash_bytes[::-1].hex()
+
+    @property
+    def previousblockhash(self) -> str:
+        return self._buffer[4:36].tobytes()[::-1].hex()
+
+    @property
+    def transactions(self) -> List[LazyTx]:
+        if self._transactions is None:
+            transactions: List[LazyTx] = []
+            n, offset = decode_at(self._buffer, 80)
+            for _ in range(n):
+                transaction = LazyTx(self._buffer, offset)
+                transactions.append(transaction)
+                offset = transaction.end
+            if offset != len(self._buffer):
+                m = len(self._buffer) - offset
+                raise ValueError(f"{m} spurious bytes after the last transaction")
+            self._transactions = transactions
+        return self._transactions
+
+    @property
+    def size(self) -> int:
+        return len(self._buffer)
+
+    def serialize(self) -> bytes:
+        return self._buffer.tobytes()
+
+    def assert_valid(self) -> None:
+        "Validate the header and the merkle root of the transactions."
+
+        header = self.header
+        txids = [transaction.txid_bytes for transaction in self.transactions]
+        if MerkleTree(txids).root != header.merkleroot:
+            raise ValueError(
+                "The block merkle root is not the merkle root of the block transactions"
+            )
+        header.assert_valid()
+
+    def to_block(self, check_validity: bool = True) -> Block:
+        "Return the fully decoded Block."
+        return Block.deserialize(self._buffer.tobytes(), check_validity)
+
+
+def _block_frames(buffer: memoryview, magic: bytes) -> Iterator[Tuple[int, int]]:
+    "Yield the (start, end) offsets of the blocks in the buffer."
+
+    pos = 0
+    size = len(buffer)
+    while pos + 8 <= size:
+        block_magic = buffer[pos : pos + 4]
+        if block_magic == b"\x00\x00\x00\x00":
+            # zero-filled tail of a pre-allocated file
+            break
+        if block_magic != magic:
+            m = block_magic.hex()
+            raise ValueError(f"invalid magic at offset {pos}: {m}")
+        start = pos + 8
+        end = start + int.from_bytes(buffer[pos + 4 : start], "little")
+        if end > size:
+            raise ValueError(f"truncated block at offset {pos}")
+        yield start, end
+        pos = end
+
+
+def mmap_file(filename: str) -> memoryview:
+    "Return a read-only memoryview of the memory-mapped file."
+
+    with open(filename, "rb") as f:
+        # zero-length files cannot be memory-mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"")
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def iter_lazy_blocks(filename: str, network: str = "mainnet") -> Iterator[LazyBlock]:
+    """Yield the LazyBlock views of the blocks in the block file.
+
+    No data is copied: views are built over the memory-mapped file,
+    which stays mapped as long as any view is referenced.
+    No validation is performed, see LazyBlock.assert_valid.
+    """
+
+    buffer = mmap_file(filename)
+    for start, end in _block_frames(buffer, MAGIC[network]):
+        yield LazyBlock(buffer[start:end])
+
+
+def iter_blocks(
+    filename: str, network: str = "mainnet", check_validity: bool = True
+) -> Iterator[Block]:
+    "Yield the fully decoded blocks in the block file."
+
+    buffer = mmap_file(filename)
+    for start, end in _block_frames(buffer, MAGIC[network]):
+        yield Block.deserialize(buffer[start:end].tobytes(), check_validity)
+
+
+def _map_file(func: Callable[[LazyBlock], _T], filename: str, network: str) -> List[_T]:
+    return [func(block) for block in iter_lazy_blocks(filename, network)]
+
+
+def map_blocks(
+    func: Callable[[LazyBlock], _T],
+    filenames: Iterable[str],
+    network: str = "mainnet",
+    max_workers: Optional[int] = None,
+    processes: bool = True,
+) -> Iterator[_T]:
+    """Yield func(block) for all the blocks in the block files.
+
+    Block files are parsed in parallel, one file per worker;
+    results are yielded in file order and, within each file,
+    in block order.
+    When using processes, func must be picklable
+    (e.g. a module level function) and so must be its results.
+    """
+
+    workers = max_workers or os.cpu_count() or 1
+    executor: Executor
+    if processes:
+        executor = ProcessPoolExecutor(workers)
+    else:
+        executor = ThreadPoolExecutor(workers)
+    with executor:
+        pending: Deque = deque()
+        files = iter(filenames)
+        while True:
+            # keep the workers busy, bounding the buffered results
+            for filename in files:
+                pending.append(executor.submit(_map_file, func, filename, network))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                return
+            yield from pending.popleft().result()
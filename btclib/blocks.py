@@ -13,6 +13,7 @@ from typing import List, Type, TypeVar
 
 from . import tx, varint
 from .alias import BinaryData
+from .merkle import MerkleTree, witness_commitment
 from .utils import bytesio_from_binarydata, hash256
 
 _BlockHeader = TypeVar("_BlockHeader", bound="BlockHeader")
@@ -28,7 +29,9 @@ class BlockHeader:
     nonce: int
 
     @classmethod
-    def deserialize(cls: Type[_BlockHeader], data: BinaryData) -> _BlockHeader:
+    def deserialize(
+        cls: Type[_BlockHeader], data: BinaryData, check_validity: bool = True
+    ) -> _BlockHeader:
         stream = bytesio_from_binarydata(data)
         version = int.from_bytes(stream.read(4), "little")
         previousblockhash = stream.read(32)[::-1].hex()
@@ -44,17 +47,23 @@ class BlockHeader:
             bits=bits,
             nonce=nonce,
         )
-        header.assert_valid()
+        if check_validity:
+            header.assert_valid()
         return header
 
     def serialize(self) -> bytes:
-        out = self.version.to_bytes(4, "little")
+        out = bytearray()
+        self.serialize_into(out)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
+        out += self.version.to_bytes(4, "little")
         out += bytes.fromhex(self.previousblockhash)[::-1]
         out += bytes.fromhex(self.merkleroot)[::-1]
         out += self.time.to_bytes(4, "little")
         out += self.bits[::-1]
         out += self.nonce.to_bytes(4, "little")
-        return out
 
     @property
     def hash(self) -> str:
@@ -67,7 +76,7 @@ class BlockHeader:
             raise ValueError("Invalid block previous hash length")
         if len(self.merkleroot) != 64:
             raise ValueError("Invalid block merkle root length")
-        target = int.from_bytes(self.bits[-3:], "little")
+        target = int.from_bytes(self.bits[-3:], "big")
         exp: int = pow(256, (self.bits[0] - 3))
         target *= exp
         if int.from_bytes(bytes.fromhex(self.hash), "big") > target:
@@ -83,53 +92,65 @@ class Block:
     transactions: List[tx.Tx]
 
     @classmethod
-    def deserialize(cls: Type[_Block], data: BinaryData) -> _Block:
+    def deserialize(
+        cls: Type[_Block], data: BinaryData, check_validity: bool = True
+    ) -> _Block:
         stream = bytesio_from_binarydata(data)
-        header = BlockHeader.deserialize(stream)
+        header = BlockHeader.deserialize(stream, check_validity)
         transaction_count = varint.decode(stream)
         transactions: List[tx.Tx] = []
-        coinbase = tx.Tx.deserialize(stream)
+        coinbase = tx.Tx.deserialize(stream, check_validity)
         transactions.append(coinbase)
         for _ in range(transaction_count - 1):
-            transaction = tx.Tx.deserialize(stream)
+            transaction = tx.Tx.deserialize(stream, check_validity)
             transactions.append(transaction)
         block = cls(header=header, transactions=transactions)
-        block.assert_valid()
+        if check_validity:
+            block.assert_valid()
         return block
 
     def serialize(self, include_witness: bool = True) -> bytes:
-        out = self.header.serialize()
+        out = bytearray()
+        self.serialize_into(out, include_witness)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray, include_witness: bool = True) -> None:
+        "Append the serialization to the buffer."
+        self.header.serialize_into(out)
         out += varint.encode(len(self.transactions))
         for transaction in self.transactions:
-            out += transaction.serialize(include_witness)
-        return out
+            transaction.serialize_into(out, include_witness)
 
     @property
     def size(self) -> int:
-        return len(self.serialize())
+        size = 80 + varint.size(len(self.transactions))
+        return size + sum(t.size for t in self.transactions)
 
     @property
     def weight(self) -> int:
         return sum(t.weight for t in self.transactions)
 
+    def merkle_tree(self) -> MerkleTree:
+        "Return the merkle tree of the (internal byte order) txids."
+        return MerkleTree(bytes.fromhex(t.txid)[::-1] for t in self.transactions)
+
+    def witness_commitment(self) -> bytes:
+        """Return the BIP141 witness commitment.
+
+        The witness reserved value is taken from the coinbase witness,
+        if any, otherwise it is null.
+        """
+
+        coinbase_witness = self.transactions[0].vin[0].txinwitness
+        reserved = coinbase_witness[0] if coinbase_witness else None
+        wtxids = (bytes.fromhex(t.hash)[::-1] for t in self.transactions)
+        return witness_commitment(wtxids, reserved)
+
     def assert_valid(self) -> None:
         for transaction in self.transactions[1:]:
             transaction.assert_valid()
-        if _generate_merkle_root(self.transactions) != self.header.merkleroot:
+        if self.merkle_tree().root != self.header.merkleroot:
             raise ValueError(
                 "The block merkle root is not the merkle root of the block transactions"
             )
         self.header.assert_valid()
-
-
-def _generate_merkle_root(transactions: List[tx.Tx]) -> str:
-    hashes = [bytes.fromhex(transaction.txid)[::-1] for transaction in transactions]
-    hashes_buffer = []
-    while len(hashes) != 1:
-        if len(hashes) % 2 != 0:
-            hashes.append(hashes[-1])
-        for x in range(len(hashes) // 2):
-            hashes_buffer.append(hash256(hashes[2 * x] + hashes[2 * x + 1]))
-        hashes = hashes_buffer[:]
-        hashes_buffer = []
-    return hashes[0][::-1].hex()
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Coin selection, as in Bitcoin Core wallet.
+
+Unspent outputs are selected by effective value,
+i.e. their amount minus the fee for spending them at the given fee rate,
+with the input weight estimated from the scriptPubKey type.
+Three algorithms are available:
+
+- branch and bound: depth-first search of an input set matching
+  the target without change, minimizing the waste metric;
+- knapsack: randomized approximation of the smallest
+  input set covering the target (plus change);
+- single random draw: random inputs until the target (plus change)
+  is covered.
+
+select returns the successful selection with the lowest waste.
+
+The waste metric is the cost of spending the inputs now
+instead of at the long-term fee rate,
+plus either the cost of the change output (and of spending it later)
+or the excess given up as fee when there is no change.
+
+Effective values are sorted once (descending) in packed arrays,
+and the searches are bounded by max_tries,
+so that pools of hundreds of thousands of outputs remain tractable.
+"""
+
+import math
+import random
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from .alias import Script
+from .scriptpubkey import payload_from_scriptPubKey
+from .tx_out import TxOut
+
+# weight of outpoint (36 bytes), nSequence (4 bytes)
+# and scriptSig length (1 byte), in weight units
+_TXIN_BASE_WEIGHT = 41 * 4
+# DER signature with sighash flag (72 bytes) and its push
+_SIG_SIZE = 73
+# compressed pubkey and its push
+_PUBKEY_SIZE = 34
+
+# witness stack: items count, signature and pubkey (with their lengths)
+_P2WPKH_WITNESS = 1 + _SIG_SIZE + _PUBKEY_SIZE
+
+INPUT_WEIGHTS = {
+    "p2pk": _TXIN_BASE_WEIGHT + 4 * _SIG_SIZE,
+    "p2pkh": _TXIN_BASE_WEIGHT + 4 * (_SIG_SIZE + _PUBKEY_SIZE),
+    # p2sh-wrapped p2wpkh: 22 bytes redeem script and its push
+    "p2sh": _TXIN_BASE_WEIGHT + 4 * 23 + _P2WPKH_WITNESS,
+    "p2wpkh": _TXIN_BASE_WEIGHT + _P2WPKH_WITNESS,
+}
+
+# p2wpkh change output: nValue (8 bytes), script length and 22 bytes script
+CHANGE_OUTPUT_WEIGHT = 31 * 4
+CHANGE_INPUT_WEIGHT = INPUT_WEIGHTS["p2wpkh"]
+
+
+def input_weight(scriptPubKey: Script) -> int:
+    """Return the estimated weight of the input spending the scriptPubKey.
+
+    Signatures are assumed to be 72 bytes long (worst case),
+    pubkeys to be compressed, and p2sh to wrap p2wpkh.
+    """
+
+    script_type, _, m = payload_from_scriptPubKey(scriptPubKey)
+    if script_type == "p2ms":
+        # OP_0 (CHECKMULTISIG bug) followed by the m signatures
+        size = 1 + m * _SIG_SIZE
+        size += 1 if size < 0xFD else 3
+        return _TXIN_BASE_WEIGHT + 4 * (size - 1)
+    weight = INPUT_WEIGHTS.get(script_type)
+    if weight is None:
+        raise ValueError(f"unknown input weight for {script_type} scriptPubKey")
+    return weight
+
+
+def _fee(fee_rate: float, weight: int) -> int:
+    "Return the fee (satoshi) at fee_rate (satoshi per virtual byte)."
+    return math.ceil(fee_rate * weight / 4)
+
+
+@dataclass
+class Selection:
+    "Selected inputs, as indexes of the pool unspent outputs."
+
+    algorithm: str
+    indexes: List[int]
+    # sum of the selected amounts
+    amount: int
+    # fee for spending the selected inputs
+    fee: int
+    # effective value above the target:
+    # the change output and its fee, or else given up as fee
+    excess: int
+    change: bool
+    waste: int
+
+
+def _first_not_above(values: Sequence[int], limit: int, lo: int = 0) -> int:
+    "Return the first position, from lo, of a descending value not above limit."
+
+    hi = len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[mid] > limit:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _bnb(
+    values: Sequence[int],
+    wastes: Sequence[int],
+    target: int,
+    cost_of_change: int,
+    high_fee_rate: bool,
+    max_tries: int,
+) -> Optional[List[int]]:
+    """Branch and bound search over effective values sorted descending.
+
+    Return the positions of the selection with the lowest waste
+    whose value is in [target, target + cost_of_change].
+    """
+
+    n = len(values)
+    # sum of the values from each position on
+    lookahead = array("q", bytes(8 * (n + 1)))
+    for i in range(n - 1, -1, -1):
+        lookahead[i] = lookahead[i + 1] + values[i]
+    if lookahead[0] < target:
+        return None
+    upper = target + cost_of_change
+    selected: List[int] = []
+    value = waste = 0
+    best: Optional[List[int]] = None
+    best_waste = 0
+    i = 0
+    for _ in range(max_tries):
+        # values overshooting the target window are never included
+        if i < n and values[i] > upper - value:
+            i = _first_not_above(values, upper - value, i)
+        if value + lookahead[i] < target or (
+            high_fee_rate and best is not None and waste > best_waste
+        ):
+            pass
+        elif value >= target:
+            if best is None or waste + value - target <= best_waste:
+                best = list(selected)
+                best_waste = waste + value - target
+        else:
+            # skip the inclusion branch if equivalent to the one
+            # of the previous (omitted) value
+            if (
+                not selected
+                or selected[-1] == i - 1
+                or values[i] != values[i - 1]
+                or wastes[i] != wastes[i - 1]
+            ):
+                selected.append(i)
+                value += values[i]
+                waste += wastes[i]
+            i += 1
+            continue
+        # backtrack: exclude the last included value
+        if not selected:
+            break
+        i = selected.pop()
+        value -= values[i]
+        waste -= wastes[i]
+        i += 1
+    return best
+
+
+def _approximate_best_subset(
+    values: Sequence[int], target: int, iterations: int, rng: random.Random
+) -> Tuple[List[int], int]:
+    "Return the positions and the smallest found sum not below target."
+
+    n = len(values)
+    # the best subset is the prefix (of length k)
+    # of the values added in an iteration, plus the value at position j
+    best_added, best_k, best_j = list(range(n)), n, -1
+    best_value = sum(values)
+    for _ in range(iterations):
+        if best_value == target:
+            break
+        included = bytearray(n)
+        added: List[int] = []
+        total = 0
+        for first_pass in (True, False):
+            reached = False
+            for i in range(n):
+                if rng.random() < 0.5 if first_pass else not included[i]:
+                    if total + values[i] < target:
+                        total += values[i]
+                        included[i] = 1
+                        added.append(i)
+                        continue
+                    reached = True
+                    if total + values[i] < best_value:
+                        best_value = total + values[i]
+                        best_added, best_k, best_j = added, len(added), i
+            if reached:
+                break
+    best = best_added[:best_k]
+    if best_j != -1:
+        best.append(best_j)
+    return best, best_value
+
+
+def _knapsack(
+    values: Sequence[int],
+    target: int,
+    min_change: int,
+    max_tries: int,
+    rng: random.Random,
+) -> Optional[List[int]]:
+    """Knapsack solver over effective values sorted descending.
+
+    Return the positions of the selected values.
+    """
+
+    first = _first_not_above(values, target + min_change - 1)
+    lowest_larger = first - 1 if first > 0 else None
+    exact = _first_not_above(values, target, first)
+    if exact < len(values) and values[exact] == target:
+        return [exact]
+    applicable = values[first:]
+    total_lower = sum(applicable)
+    if total_lower == target:
+        return list(range(first, len(values)))
+    if total_lower < target:
+        return None if lowest_larger is None else [lowest_larger]
+
+    # bounded number of randomized passes over the applicable values
+    iterations = max(1, min(1000, max_tries // len(applicable)))
+    best, best_value = _approximate_best_subset(applicable, target, iterations, rng)
+    if best_value != target and total_lower >= target + min_change:
+        best, best_value = _approximate_best_subset(
+            applicable, target + min_change, iterations, rng
+        )
+    if lowest_larger is not None and (
+        (best_value != target and best_value < target + min_change)
+        or values[lowest_larger] <= best_value
+    ):
+        return [lowest_larger]
+    return [first + i for i in best]
+
+
+def _single_random_draw(
+    values: Sequence[int], target: int, rng: random.Random
+) -> Optional[List[int]]:
+    "Return random positions of values covering the target."
+
+    if sum(values) < target:
+        return None
+    # lazy Fisher-Yates shuffle, stopping when the target is covered
+    positions = list(range(len(values)))
+    total = 0
+    for k in range(len(positions)):
+        j = rng.randrange(k, len(positions))
+        positions[k], positions[j] = positions[j], positions[k]
+        total += values[positions[k]]
+        if total >= target:
+            break
+    return positions[: k + 1]
+
+
+class CoinSelector:
+    """Pool of unspent outputs for coin selection.
+
+    Input weights are estimated once, when not provided.
+    """
+
+    def __init__(
+        self,
+        utxos: Sequence[TxOut],
+        input_weights: Optional[Sequence[int]] = None,
+    ) -> None:
+
+        if input_weights is None:
+            input_weights = [input_weight(u.scriptPubKey) for u in utxos]
+        elif len(input_weights) != len(utxos):
+            raise ValueError(
+                f"invalid input weights: {len(input_weights)} instead of {len(utxos)}"
+            )
+        self.amounts = array("q", (u.nValue for u in utxos))
+        self.input_weights = array("q", input_weights)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def _selection(
+        self,
+        algorithm: str,
+        indexes: List[int],
+        target: int,
+        fee_rate: float,
+        long_term_fee_rate: float,
+        cost_of_change: int,
+        change: Optional[bool] = None,
+    ) -> Selection:
+        amount = sum(self.amounts[i] for i in indexes)
+        fees = [_fee(fee_rate, self.input_weights[i]) for i in indexes]
+        long_term_fees = [
+            _fee(long_term_fee_rate, self.input_weights[i]) for i in indexes
+        ]
+        excess = amount - sum(fees) - target
+        if change is None:
+            # below cost_of_change, giving up the excess is cheaper
+            change = excess > cost_of_change
+        waste = sum(fees) - sum(long_term_fees)
+        waste += cost_of_change if change else excess
+        return Selection(
+            algorithm, sorted(indexes), amount, sum(fees), excess, change, waste
+        )
+
+    def select(
+        self,
+        target: int,
+        fee_rate: float,
+        long_term_fee_rate: float = 10.0,
+        min_change: int = 50000,
+        algorithms: Sequence[str] = ("bnb", "knapsack", "srd"),
+        max_tries: int = 100000,
+        seed: Optional[int] = None,
+    ) -> Selection:
+        """Return the selection with the lowest waste.
+
+        The target is the amount to be funded by the inputs:
+        i.e. the sum of the outputs plus the fee
+        for the rest of the transaction.
+        Fee rates are in satoshi per virtual byte.
+        """
+
+        if target <= 0:
+            raise ValueError(f"invalid target: {target}")
+        for algorithm in algorithms:
+            if algorithm not in ("bnb", "knapsack", "srd"):
+                raise ValueError(f"unknown coin selection algorithm: {algorithm}")
+
+        weights = set(self.input_weights)
+        fees = {w: _fee(fee_rate, w) for w in weights}
+        long_term_fees = {w: _fee(long_term_fee_rate, w) for w in weights}
+        # effective values, sorted descending, of the economic outputs
+        effective = [a - fees[w] for a, w in zip(self.amounts, self.input_weights)]
+        order = sorted(range(len(effective)), key=effective.__getitem__, reverse=True)
+        values = array("q", (effective[i] for i in order))
+        # drop the uneconomic outputs
+        del order[_first_not_above(values, 0) :]
+        del values[len(order) :]
+        change_fee = _fee(fee_rate, CHANGE_OUTPUT_WEIGHT)
+        cost_of_change = change_fee + _fee(long_term_fee_rate, CHANGE_INPUT_WEIGHT)
+        rng = random.Random(seed)
+
+        selections: List[Selection] = []
+        if "bnb" in algorithms:
+            wastes = array(
+                "q",
+                (
+                    fees[self.input_weights[i]] - long_term_fees[self.input_weights[i]]
+                    for i in order
+                ),
+            )
+            high_fee_rate = fee_rate > long_term_fee_rate
+            positions = _bnb(
+                values, wastes, target, cost_of_change, high_fee_rate, max_tries
+            )
+            if positions is not None:
+                indexes = [order[p] for p in positions]
+                selections.append(
+                    self._selection(
+                        "bnb",
+                        indexes,
+                        target,
+                        fee_rate,
+                        long_term_fee_rate,
+                        cost_of_change,
+                        False,
+                    )
+                )
+        # with change, its output fee must be funded too
+        change_target = target + change_fee
+        for algorithm in ("knapsack", "srd"):
+            if algorithm not in algorithms:
+                continue
+            if algorithm == "knapsack":
+                positions = _knapsack(values, change_target, min_change, max_tries, rng)
+            else:
+                positions = _single_random_draw(values, change_target + min_change, rng)
+            if positions is not None:
+                indexes = [order[p] for p in positions]
+                selection = self._selection(
+                    algorithm,
+                    indexes,
+                    target,
+                    fee_rate,
+                    long_term_fee_rate,
+                    cost_of_change,
+                )
+                if selection.excess >= 0:
+                    selections.append(selection)
+
+        if not selections:
+            raise ValueError(f"insufficient funds for target: {target}")
+        return min(selections, key=lambda s: s.waste)
+
+
+def select_coins(
+    utxos: Sequence[TxOut],
+    target: int,
+    fee_rate: float,
+    long_term_fee_rate: float = 10.0,
+    min_change: int = 50000,
+    seed: Optional[int] = None,
+) -> Selection:
+    "Return the coin selection for the target with the lowest waste."
+
+    return CoinSelector(utxos).select(
+        target, fee_rate, long_term_fee_rate, min_change, seed=seed
+    )
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Compact, bytes-backed transaction representations.
+
+The OutPoint, TxIn, TxOut, and Tx dataclasses store hashes,
+scripts, and witness items as hex strings and script token lists,
+which are convenient but take several times the serialized size
+and must be converted back at each serialization.
+
+The classes here use __slots__ and store raw bytes:
+hashes in internal byte order (i.e. not reversed), scripts,
+and witness stack items.
+The dataclass fields are exposed as computed properties,
+and conversions from and to the dataclasses are lossless;
+they are meant to hold many transactions in memory,
+e.g. a whole mempool.
+"""
+
+from math import ceil
+from typing import List, Sequence, Tuple, Type, TypeVar, Union
+
+from . import script, varint
+from .alias import Token
+from .tx import Tx
+from .tx_in import _NULL_OUTPOINT, _NULL_VOUT, OutPoint, TxIn
+from .tx_out import _MAX_NVALUE, TxOut
+from .utils import hash256_slices
+from .varint import Buffer, decode_at
+
+_NO_WITNESS: Tuple[bytes, ...] = ()
+
+
+def _view(data: Union[Buffer, str]) -> memoryview:
+    if isinstance(data, str):
+        data = bytes.fromhex(data)
+    view = memoryview(data)
+    if view.ndim != 1 or view.itemsize != 1:
+        view = view.cast("B")
+    return view
+
+
+def _read(buffer: memoryview, offset: int, size: int) -> Tuple[bytes, int]:
+    "Return the bytes at the offset and the next offset."
+
+    end = offset + size
+    if end > len(buffer):
+        raise ValueError(
+            f"not enough data: {len(buffer) - offset} bytes, {size} needed"
+        )
+    return buffer[offset:end].tobytes(), end
+
+
+def _var_bytes(buffer: memoryview, offset: int) -> Tuple[bytes, int]:
+    "Return the length-prefixed bytes at the offset and the next offset."
+
+    size, offset = decode_at(buffer, offset)
+    return _read(buffer, offset, size)
+
+
+_CompactOutPoint = TypeVar("_CompactOutPoint", bound="CompactOutPoint")
+
+
+class CompactOutPoint:
+    "Transaction output reference, with the txid in internal byte order."
+
+    __slots__ = ("hash_bytes", "n")
+
+    def __init__(self, hash_bytes: bytes, n: int) -> None:
+        self.hash_bytes = hash_bytes
+        self.n = n
+
+    @property
+    def hash(self) -> str:
+        return self.hash_bytes[::-1].hex()
+
+    @property
+    def is_coinbase(self) -> bool:
+        "Return True for the null outpoint of coinbase inputs."
+        return self.n == _NULL_VOUT and self.hash_bytes == _NULL_OUTPOINT[:32]
+
+    @classmethod
+    def _parse(
+        cls: Type[_CompactOutPoint], buffer: memoryview, offset: int
+    ) -> Tuple[_CompactOutPoint, int]:
+        hash_bytes, offset = _read(buffer, offset, 32)
+        n, offset = _read(buffer, offset, 4)
+        return cls(hash_bytes, int.from_bytes(n, "little")), offset
+
+    @classmethod
+    def deserialize(
+        cls: Type[_CompactOutPoint], data: Union[Buffer, str]
+    ) -> _CompactOutPoint:
+        return cls._parse(_view(data), 0)[0]
+
+    def serialize(self) -> bytes:
+        return self.hash_bytes + self.n.to_bytes(4, "little")
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
+        out += self.hash_bytes
+        out += self.n.to_bytes(4, "little")
+
+    @classmethod
+    def from_outpoint(
+        cls: Type[_CompactOutPoint], outpoint: OutPoint
+    ) -> _CompactOutPoint:
+        return cls(bytes.fromhex(outpoint.hash)[::-1], outpoint.n)
+
+    def to_outpoint(self) -> OutPoint:
+        return OutPoint(self.hash, self.n)
+
+    def assert_valid(self) -> None:
+        if (self.hash_bytes == _NULL_OUTPOINT[:32]) ^ (self.n == _NULL_VOUT):
+            raise ValueError("invalid tx_in")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactOutPoint):
+            return NotImplemented
+        return self.n == other.n and self.hash_bytes == other.hash_bytes
+
+    def __hash__(self) -> int:
+        return hash((self.hash_bytes, self.n))
+
+    def __repr__(self) -> str:
+        return f"CompactOutPoint(hash='{self.hash}', n={self.n})"
+
+
+_CompactTxIn = TypeVar("_CompactTxIn", bound="CompactTxIn")
+
+
+class CompactTxIn:
+    "Transaction input, with raw scriptSig and witness stack items."
+
+    __slots__ = ("prevout_bytes", "scriptSig_bytes", "nSequence", "witness")
+
+    def __init__(
+        self,
+        prevout: Union[CompactOutPoint, bytes],
+        scriptSig_bytes: bytes = b"",
+        nSequence: int = 0xFFFFFFFF,
+        witness: Sequence[bytes] = _NO_WITNESS,
+    ) -> None:
+        # the 36-bytes serialized prevout, without a nested object
+        if isinstance(prevout, CompactOutPoint):
+            prevout = prevout.serialize()
+        elif len(prevout) != 36:
+            raise ValueError(f"invalid prevout size: {len(prevout)}")
+        self.prevout_bytes = prevout
+        self.scriptSig_bytes = scriptSig_bytes
+        self.nSequence = nSequence
+        self.witness = tuple(witness) if witness else _NO_WITNESS
+
+    @property
+    def prevout(self) -> CompactOutPoint:
+        prevout = self.prevout_bytes
+        return CompactOutPoint(prevout[:32], int.from_bytes(prevout[32:], "little"))
+
+    @prevout.setter
+    def prevout(self, prevout: CompactOutPoint) -> None:
+        self.prevout_bytes = prevout.serialize()
+
+    @property
+    def is_coinbase(self) -> bool:
+        return self.prevout_bytes == _NULL_OUTPOINT
+
+    @property
+    def scriptSig(self) -> List[Token]:
+        "Return the scriptSig tokens (none for coinbase inputs, as in TxIn)."
+        return [] if self.is_coinbase else script.decode(self.scriptSig_bytes)
+
+    @property
+    def scriptSigHex(self) -> str:
+        "Return the coinbase scriptSig hex string (empty otherwise, as in TxIn)."
+        return self.scriptSig_bytes.hex() if self.is_coinbase else ""
+
+    @property
+    def txinwitness(self) -> List[str]:
+        return [item.hex() for item in self.witness]
+
+    @classmethod
+    def _parse(
+        cls: Type[_CompactTxIn], buffer: memoryview, offset: int
+    ) -> Tuple[_CompactTxIn, int]:
+        prevout, offset = _read(buffer, offset, 36)
+        scriptSig_bytes, offset = _var_bytes(buffer, offset)
+        nSequence, offset = _read(buffer, offset, 4)
+        tx_in = cls(prevout, scriptSig_bytes, int.from_bytes(nSequence, "little"))
+        return tx_in, offset
+
+    @classmethod
+    def deserialize(cls: Type[_CompactTxIn], data: Union[Buffer, str]) -> _CompactTxIn:
+        "Return the input, without witness (serialized apart in transactions)."
+        return cls._parse(_view(data), 0)[0]
+
+    def serialize(self) -> bytes:
+        out = bytearray()
+        self.serialize_into(out)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
+        out += self.prevout_bytes
+        out += varint.encode(len(self.scriptSig_bytes))
+        out += self.scriptSig_bytes
+        out += self.nSequence.to_bytes(4, "little")
+
+    def witness_serialize_into(self, out: bytearray) -> None:
+        "Append the witness serialization to the buffer."
+        out += varint.encode(len(self.witness))
+        for item in self.witness:
+            out += varint.encode(len(item))
+            out += item
+
+    @property
+    def size(self) -> int:
+        length = len(self.scriptSig_bytes)
+        return 36 + varint.size(length) + length + 4
+
+    @property
+    def witness_size(self) -> int:
+        size = varint.size(len(self.witness))
+        return size + sum(varint.size(len(item)) + len(item) for item in self.witness)
+
+    @classmethod
+    def from_tx_in(cls: Type[_CompactTxIn], tx_in: TxIn) -> _CompactTxIn:
+        prevout = CompactOutPoint.from_outpoint(tx_in.prevout)
+        if prevout.is_coinbase:
+            scriptSig_bytes = bytes.fromhex(tx_in.scriptSigHex)
+        else:
+            scriptSig_bytes = script.encode(tx_in.scriptSig)
+        witness = [bytes.fromhex(item) for item in tx_in.txinwitness]
+        return cls(prevout, scriptSig_bytes, tx_in.nSequence, witness)
+
+    def to_tx_in(self) -> TxIn:
+        return TxIn(
+            prevout=self.prevout.to_outpoint(),
+            scriptSig=self.scriptSig,
+            scriptSigHex=self.scriptSigHex,
+            nSequence=self.nSequence,
+            txinwitness=self.txinwitness,
+        )
+
+    def assert_valid(self) -> None:
+        self.prevout.assert_valid()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactTxIn):
+            return NotImplemented
+        return (
+            self.prevout_bytes == other.prevout_bytes
+            and self.scriptSig_bytes == other.scriptSig_bytes
+            and self.nSequence == other.nSequence
+            and self.witness == other.witness
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactTxIn(prevout={self.prevout!r}, "
+            f"scriptSig_bytes={self.scriptSig_bytes!r}, "
+            f"nSequence={self.nSequence}, witness={self.witness!r})"
+        )
+
+
+_CompactTxOut = TypeVar("_CompactTxOut", bound="CompactTxOut")
+
+
+class CompactTxOut:
+    "Transaction output, with raw scriptPubKey."
+
+    __slots__ = ("nValue", "scriptPubKey_bytes")
+
+    def __init__(self, nValue: int, scriptPubKey_bytes: bytes) -> None:
+        self.nValue = nValue
+        self.scriptPubKey_bytes = scriptPubKey_bytes
+
+    @property
+    def scriptPubKey(self) -> List[Token]:
+        return script.decode(self.scriptPubKey_bytes)
+
+    @classmethod
+    def _parse(
+        cls: Type[_CompactTxOut], buffer: memoryview, offset: int
+    ) -> Tuple[_CompactTxOut, int]:
+        nValue, offset = _read(buffer, offset, 8)
+        scriptPubKey_bytes, offset = _var_bytes(buffer, offset)
+        return cls(int.from_bytes(nValue, "little"), scriptPubKey_bytes), offset
+
+    @classmethod
+    def deserialize(
+        cls: Type[_CompactTxOut], data: Union[Buffer, str]
+    ) -> _CompactTxOut:
+        return cls._parse(_view(data), 0)[0]
+
+    def serialize(self) -> bytes:
+        out = bytearray()
+        self.serialize_into(out)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
+        out += self.nValue.to_bytes(8, "little")
+        out += varint.encode(len(self.scriptPubKey_bytes))
+        out += self.scriptPubKey_bytes
+
+    @property
+    def size(self) -> int:
+        length = len(self.scriptPubKey_bytes)
+        return 8 + varint.size(length) + length
+
+    @classmethod
+    def from_tx_out(cls: Type[_CompactTxOut], tx_out: TxOut) -> _CompactTxOut:
+        return cls(tx_out.nValue, script.encode(tx_out.scriptPubKey))
+
+    def to_tx_out(self) -> TxOut:
+        return TxOut(self.nValue, self.scriptPubKey)
+
+    def assert_valid(self) -> None:
+        if self.nValue < 0:
+            raise ValueError(f"negative value: {self.nValue}")
+        if self.nValue > _MAX_NVALUE:
+            raise ValueError(f"value too high: {self.nValue}")
+        if not self.scriptPubKey_bytes:
+            raise ValueError("empty scriptPubKey")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactTxOut):
+            return NotImplemented
+        return (
+            self.nValue == other.nValue
+            and self.scriptPubKey_bytes == other.scriptPubKey_bytes
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactTxOut(nValue={self.nValue}, "
+            f"scriptPubKey_bytes={self.scriptPubKey_bytes!r})"
+        )
+
+
+_CompactTx = TypeVar("_CompactTx", bound="CompactTx")
+
+
+class CompactTx:
+    "Transaction made of compact inputs and outputs."
+
+    __slots__ = ("nVersion", "nLockTime", "vin", "vout")
+
+    def __init__(
+        self,
+        nVersion: int,
+        nLockTime: int,
+        vin: List[CompactTxIn],
+        vout: List[CompactTxOut],
+    ) -> None:
+        self.nVersion = nVersion
+        self.nLockTime = nLockTime
+        self.vin = vin
+        self.vout = vout
+
+    @classmethod
+    def _parse(
+        cls: Type[_CompactTx], buffer: memoryview, offset: int
+    ) -> Tuple[_CompactTx, int]:
+        nVersion, offset = _read(buffer, offset, 4)
+        witness_flag = buffer[offset : offset + 2] == b"\x00\x01"
+        if witness_flag:
+            offset += 2
+        n, offset = decode_at(buffer, offset)
+        vin = []
+        for _ in range(n):
+            tx_in, offset = CompactTxIn._parse(buffer, offset)
+            vin.append(tx_in)
+        n, offset = decode_at(buffer, offset)
+        vout = []
+        for _ in range(n):
+            tx_out, offset = CompactTxOut._parse(buffer, offset)
+            vout.append(tx_out)
+        if witness_flag:
+            for tx_in in vin:
+                n, offset = decode_at(buffer, offset)
+                witness = []
+                for _ in range(n):
+                    item, offset = _var_bytes(buffer, offset)
+                    witness.append(item)
+                tx_in.witness = tuple(witness) if witness else _NO_WITNESS
+        nLockTime, offset = _read(buffer, offset, 4)
+        version = int.from_bytes(nVersion, "little")
+        return cls(version, int.from_bytes(nLockTime, "little"), vin, vout), offset
+
+    @classmethod
+    def deserialize(
+        cls: Type[_CompactTx], data: Union[Buffer, str], check_validity: bool = True
+    ) -> _CompactTx:
+        buffer = _view(data)
+        transaction, offset = cls._parse(buffer, 0)
+        if offset != len(buffer):
+            raise ValueError(f"{len(buffer) - offset} spurious bytes after the tx")
+        if check_validity:
+            transaction.assert_valid()
+        return transaction
+
+    @property
+    def has_witness(self) -> bool:
+        return any(tx_in.witness for tx_in in self.vin)
+
+    def serialize(self, include_witness: bool = True) -> bytes:
+        out = bytearray()
+        self.serialize_into(out, include_witness)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray, include_witness: bool = True) -> None:
+        "Append the serialization to the buffer."
+        witness_flag = include_witness and self.has_witness
+        out += self.nVersion.to_bytes(4, "little")
+        if witness_flag:
+            out += b"\x00\x01"
+        out += varint.encode(len(self.vin))
+        for tx_in in self.vin:
+            tx_in.serialize_into(out)
+        out += varint.encode(len(self.vout))
+        for tx_out in self.vout:
+            tx_out.serialize_into(out)
+        if witness_flag:
+            for tx_in in self.vin:
+                tx_in.witness_serialize_into(out)
+        out += self.nLockTime.to_bytes(4, "little")
+
+    @property
+    def txid_bytes(self) -> bytes:
+        "Return the txid in internal byte order (i.e. not reversed)."
+        return hash256_slices(self.serialize(False))
+
+    @property
+    def txid(self) -> str:
+        return self.txid_bytes[::-1].hex()
+
+    @property
+    def hash(self) -> str:
+        return hash256_slices(self.serialize())[::-1].hex()
+
+    def _sizes(self) -> Tuple[int, int]:
+        "Return the (base, witness) sizes, computed without serializing."
+
+        base_size = 4 + varint.size(len(self.vin)) + varint.size(len(self.vout)) + 4
+        base_size += sum(tx_in.size for tx_in in self.vin)
+        base_size += sum(tx_out.size for tx_out in self.vout)
+        witness_size = 0
+        if self.has_witness:
+            # segwit marker and flag
+            witness_size = 2 + sum(tx_in.witness_size for tx_in in self.vin)
+        return base_size, witness_size
+
+    @property
+    def size(self) -> int:
+        return sum(self._sizes())
+
+    @property
+    def weight(self) -> int:
+        base_size, witness_size = self._sizes()
+        return base_size * 4 + witness_size
+
+    @property
+    def vsize(self) -> int:
+        return ceil(self.weight / 4)
+
+    @classmethod
+    def from_tx(cls: Type[_CompactTx], tx: Tx) -> _CompactTx:
+        vin = [CompactTxIn.from_tx_in(tx_in) for tx_in in tx.vin]
+        vout = [CompactTxOut.from_tx_out(tx_out) for tx_out in tx.vout]
+        return cls(tx.nVersion, tx.nLockTime, vin, vout)
+
+    def to_tx(self) -> Tx:
+        vin = [tx_in.to_tx_in() for tx_in in self.vin]
+        vout = [tx_out.to_tx_out() for tx_out in self.vout]
+        return Tx(self.nVersion, self.nLockTime, vin, vout)
+
+    def assert_valid(self) -> None:
+        if not self.vin:
+            raise ValueError("A transaction must have at least one input")
+        for tx_in in self.vin:
+            tx_in.assert_valid()
+        if not self.vout:
+            raise ValueError("A transaction must have at least one output")
+        for tx_out in self.vout:
+            tx_out.assert_valid()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactTx):
+            return NotImplemented
+        return (
+            self.nVersion == other.nVersion
+            and self.nLockTime == other.nLockTime
+            and self.vin == other.vin
+            and self.vout == other.vout
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactTx(nVersion={self.nVersion}, nLockTime={self.nLockTime}, "
+            f"vin={self.vin!r}, vout={self.vout!r})"
+        )
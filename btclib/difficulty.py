@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Difficulty adjustment and hash rate estimation over header arrays.
+
+Header timestamps and compact 'bits' are extracted from serialized
+headers as arrays of 32-bit unsigned integers,
+then processed as whole sequences instead of per-header objects:
+NumPy arrays are used if NumPy is available (it is an optional
+dependency), otherwise standard library array buffers.
+
+Targets are 256-bit integers, beyond the NumPy integer types:
+as they change at most every 2016 blocks,
+each distinct compact value is decoded only once.
+
+Only the mainnet retarget rules are implemented, i.e. the
+testnet minimum difficulty blocks are not supported.
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .header_chain import POW_LIMIT, target_from_compact, work_from_target
+from .varint import Buffer
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+RETARGET_INTERVAL = 2016
+TARGET_TIMESPAN = 14 * 24 * 60 * 60
+
+# array of 32-bit unsigned integers (or floats):
+# numpy.ndarray or array.array
+Array = Any
+
+
+def _is_ndarray(a: Array) -> bool:
+    return np is not None and isinstance(a, np.ndarray)
+
+
+def header_fields(
+    data: Buffer, use_numpy: Optional[bool] = None
+) -> Tuple[Array, Array]:
+    """Return the (times, bits) arrays of concatenated serialized headers.
+
+    NumPy arrays are returned if NumPy is available,
+    unless use_numpy is False.
+    """
+
+    view = memoryview(data)
+    if view.ndim != 1 or view.itemsize != 1:
+        view = view.cast("B")
+    if len(view) % 80:
+        raise ValueError(f"invalid headers data size: {len(view)}")
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        if np is None:
+            raise ValueError("NumPy is not available")
+        # 20 little-endian 32-bit words per header
+        words = np.frombuffer(view, dtype="<u4").reshape(-1, 20)
+        return words[:, 17].astype(np.uint32), words[:, 18].astype(np.uint32)
+    buffer = array("I")
+    buffer.frombytes(view)
+    if sys.byteorder == "big":  # pragma: no cover
+        buffer.byteswap()
+    return buffer[17::20], buffer[18::20]
+
+
+def _targets(bits: Iterable[int]) -> Dict[int, int]:
+    "Return the targets of the distinct compact bits."
+    return {b: target_from_compact(b) for b in set(int(b) for b in bits)}
+
+
+def targets_from_compacts(bits: Sequence[int]) -> List[int]:
+    "Return the targets encoded in the compact bits."
+
+    targets = _targets(bits)
+    return [targets[int(b)] for b in bits]
+
+
+def compact_from_target(target: int) -> int:
+    "Return the compact 'bits' encoding of a (non-negative) target."
+
+    if target < 0:
+        raise ValueError(f"negative target: {target}")
+    size = (target.bit_length() + 7) // 8
+    if size <= 3:
+        mantissa = target << 8 * (3 - size)
+    else:
+        mantissa = target >> 8 * (size - 3)
+    # the sign bit must not be set
+    if mantissa & 0x00800000:
+        mantissa >>= 8
+        size += 1
+    return size << 24 | mantissa
+
+
+def works(bits: Array) -> Array:
+    "Return the (floating point) work of each block."
+
+    work = {b: float(work_from_target(t)) for b, t in _targets(bits).items()}
+    if _is_ndarray(bits):
+        unique, inverse = np.unique(bits, return_inverse=True)
+        return np.array([work[int(b)] for b in unique])[inverse]
+    return array("d", (work[b] for b in bits))
+
+
+def chainwork(bits: Array) -> int:
+    "Return the exact cumulative work of the blocks."
+
+    if _is_ndarray(bits):
+        unique, counts = np.unique(bits, return_counts=True)
+        counter = dict(zip((int(b) for b in unique), (int(c) for c in counts)))
+    else:
+        counter = {}
+        for b in bits:
+            counter[b] = counter.get(b, 0) + 1
+    targets = _targets(counter)
+    return sum(n * work_from_target(targets[b]) for b, n in counter.items())
+
+
+def median_time_past(times: Array, window: int = 11) -> Array:
+    """Return the median time past of each block.
+
+    It is the median of the timestamps of the block
+    and of its (window - 1) predecessors, if available.
+    """
+
+    n = len(times)
+    head = [sorted(times[: i + 1])[(i + 1) // 2] for i in range(min(window - 1, n))]
+    if _is_ndarray(times):
+        result = np.empty(n, dtype=times.dtype)
+        result[: len(head)] = head
+        if n >= window:
+            windows = np.lib.stride_tricks.sliding_window_view(times, window)
+            result[window - 1 :] = np.sort(windows, axis=1)[:, window // 2]
+        return result
+    medians = array(times.typecode if isinstance(times, array) else "q", head)
+    for i in range(window - 1, n):
+        medians.append(sorted(times[i - window + 1 : i + 1])[window // 2])
+    return medians
+
+
+def next_bits(
+    first_time: int, last_time: int, bits: int, network: str = "mainnet"
+) -> int:
+    """Return the retargeted compact bits.
+
+    The time span of the retarget period (from its first to its last block)
+    is clamped to a factor of four of the two weeks target time span.
+    """
+
+    timespan = int(last_time) - int(first_time)
+    timespan = min(max(timespan, TARGET_TIMESPAN // 4), TARGET_TIMESPAN * 4)
+    target = target_from_compact(int(bits)) * timespan // TARGET_TIMESPAN
+    return compact_from_target(min(target, POW_LIMIT[network]))
+
+
+def verify_retargets(
+    times: Array, bits: Array, start_height: int = 0, network: str = "mainnet"
+) -> List[int]:
+    """Return the heights whose bits do not follow the retarget rules.
+
+    The arrays start from the given height; the retarget of the blocks
+    whose period starts before the arrays cannot be verified.
+    """
+
+    n = len(bits)
+    if len(times) != n:
+        raise ValueError(f"{len(times)} times for {n} bits")
+    # bits can only change at retarget heights
+    if _is_ndarray(bits):
+        changes = (np.flatnonzero(bits[1:] != bits[:-1]) + 1).tolist()
+    else:
+        changes = [i for i in range(1, n) if bits[i] != bits[i - 1]]
+    invalid = {i for i in changes if (start_height + i) % RETARGET_INTERVAL}
+
+    first = -start_height % RETARGET_INTERVAL
+    for i in range(first, n, RETARGET_INTERVAL):
+        if i < RETARGET_INTERVAL or start_height + i == 0:
+            continue
+        first_time = times[i - RETARGET_INTERVAL]
+        exp = next_bits(first_time, times[i - 1], bits[i - 1], network)
+        if bits[i] != exp:
+            invalid.add(i)
+    return sorted(start_height + i for i in invalid)
+
+
+def hash_rates(times: Array, bits: Array, window: int = 120) -> Array:
+    """Return the rolling hash rate estimates (hashes per second).
+
+    The estimate at block i is the work of the blocks
+    from i - window + 1 to i over the time elapsed since block i - window;
+    it is nan if that time is not positive (out-of-order timestamps).
+    """
+
+    if window < 1:
+        raise ValueError(f"invalid window: {window}")
+    work = works(bits)
+    if _is_ndarray(work):
+        cumulative = np.cumsum(work)
+        elapsed = times[window:].astype(np.int64) - times[:-window].astype(np.int64)
+        done = cumulative[window:] - cumulative[:-window]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(elapsed > 0, done / elapsed, np.nan)
+    cumulative_work = array("d", [0.0])
+    for w in work:
+        cumulative_work.append(cumulative_work[-1] + w)
+    rates = array("d")
+    for i in range(window, len(times)):
+        elapsed = times[i] - times[i - window]
+        done = cumulative_work[i + 1] - cumulative_work[i - window + 1]
+        rates.append(done / elapsed if elapsed > 0 else float("nan"))
+    return rates
@@ -38,6 +38,7 @@ from .curvegroup import _double_mult, _mult
 from .hashes import reduce_to_hlen
 from .numbertheory import mod_inv
 from .rfc6979 import __rfc6979
+from .sigcache import SignatureCache
 from .to_prvkey import int_from_prvkey
 from .to_pubkey import point_from_key
 from .utils import bytes_from_octets, int_from_bits
@@ -243,13 +244,31 @@ def assert_as_valid(
 
 
 def _verify(
-    m: Octets, P: Key, sig: DSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    m: Octets,
+    P: Key,
+    sig: DSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    cache: Optional[SignatureCache] = None,
 ) -> bool:
-    """ECDSA signature verification (SEC 1 v.2 section 4.1.4)."""
+    """ECDSA signature verification (SEC 1 v.2 section 4.1.4).
+
+    If a SignatureCache is provided, valid signatures are looked up
+    in (and added to) the cache.
+    """
 
     # try/except wrapper for the Errors raised by assert_as_valid
     try:
-        _assert_as_valid(m, P, sig, ec, hf)
+        if cache is None:
+            _assert_as_valid(m, P, sig, ec, hf)
+        else:
+            r, s = deserialize(sig, ec)
+            m = bytes_from_octets(m, hf().digest_size)
+            Q = point_from_key(P, ec)
+            entry = cache.entry("ECDSA", m, Q, (r, s), ec, hf)
+            if entry not in cache:
+                _assert_as_valid(m, Q, (r, s), ec, hf)
+                cache.add(entry)
     except Exception:
         return False
     else:
@@ -257,12 +276,17 @@ def _verify(
 
 
 def verify(
-    msg: String, P: Key, sig: DSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    msg: String,
+    P: Key,
+    sig: DSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    cache: Optional[SignatureCache] = None,
 ) -> bool:
     """ECDSA signature verification (SEC 1 v.2 section 4.1.4)."""
 
     m = reduce_to_hlen(msg, hf)
-    return _verify(m, P, sig, ec, hf)
+    return _verify(m, P, sig, ec, hf, cache)
 
 
 def recover_pubkeys(
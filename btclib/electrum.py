@@ -14,22 +14,23 @@ Electrum mnemonic is versioned, conveying BIP32 derivation rule too.
 """
 
 import hmac
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from hashlib import pbkdf2_hmac, sha512
-from typing import Tuple
+from typing import Deque, Optional, Tuple
 
 from .entropy import (
     BinStr,
     Entropy,
-    _entropy_from_indexes,
-    _indexes_from_entropy,
-    binstr_from_entropy,
-)
-from .mnemonic import (
-    Mnemonic,
-    _indexes_from_mnemonic,
-    _mnemonic_from_indexes,
-    _wordlists,
+    IntBits,
+    _indexes_from_intbits,
+    _intbits_from_indexes,
+    binstr_from_intbits,
+    intbits_from_entropy,
+    intbits_from_int,
 )
+from .mnemonic import Mnemonic, _indexes_from_mnemonic, _wordlists
 
 _MNEMONIC_VERSIONS = {
     "standard": "01",  # P2PKH and P2MS-P2SH wallets
@@ -38,6 +39,9 @@ _MNEMONIC_VERSIONS = {
     "2fa_segwit": "102",  # Two-factor authenticated wallets, using segwit
 }
 
+# number of consecutive entropy values searched by each process
+_SEARCH_CHUNK = 1024
+
 
 def version_from_mnemonic(mnemonic: Mnemonic) -> Tuple[str, str]:
     """Return the (Electrum version, clean mnemonic) tuple.
@@ -64,8 +68,62 @@ def version_from_mnemonic(mnemonic: Mnemonic) -> Tuple[str, str]:
     raise ValueError(m)
 
 
+def _mnemonic_search(
+    int_entropy: int, stop: Optional[int], version: str, lang: str
+) -> Optional[Mnemonic]:
+    """Return the first versioned mnemonic for entropy in [int_entropy, stop).
+
+    Return None if no entropy in the range provides a mnemonic
+    of the required version;
+    if stop is None, search goes on until success.
+    """
+
+    wordlist = _wordlists.wordlist(lang)
+    base = _wordlists.language_length(lang)
+
+    # electrum considers entropy as integer, losing any leading zero
+    nbits = int_entropy.bit_length()
+    intbits = intbits_from_int(int_entropy, nbits)
+    indexes = _indexes_from_intbits(intbits, base)
+    words = [wordlist[i] for i in indexes]
+
+    # the HMAC key state is computed only once
+    hmac_key = hmac.new(b"Seed version", digestmod=sha512)
+    prefix_bits = 4 * len(version)
+    prefix = int(version, 16)
+    while stop is None or int_entropy < stop:
+        mnemonic = " ".join(words)
+        h = hmac_key.copy()
+        h.update(mnemonic.encode())
+        # version validity check
+        if int.from_bytes(h.digest()[:2], "big") >> (16 - prefix_bits) == prefix:
+            return mnemonic
+        # next trial: increment entropy updating indexes (and words) in place,
+        # instead of converting again the whole entropy
+        int_entropy += 1
+        i = len(indexes) - 1
+        while i >= 0:
+            indexes[i] += 1
+            if indexes[i] < base:
+                words[i] = wordlist[indexes[i]]
+                break
+            indexes[i] = 0
+            words[i] = wordlist[0]
+            i -= 1
+        else:
+            # carry overflow: one more word is needed
+            indexes.insert(0, 1)
+            words.insert(0, wordlist[1])
+
+    return None
+
+
 def mnemonic_from_entropy(
-    entropy: Entropy, version_str: str = "standard", lang: str = "en"
+    entropy: Entropy,
+    version_str: str = "standard",
+    lang: str = "en",
+    processes: bool = False,
+    max_workers: Optional[int] = None,
 ) -> Mnemonic:
     """Convert input entropy to Electrum versioned mnemonic sentence.
 
@@ -74,6 +132,10 @@ def mnemonic_from_entropy(
 
     In the case of binary 0/1 string and bytes-like,
     leading zeros are considered redundant padding.
+
+    Entropy is incremented until the mnemonic version is the required one:
+    if requested, this search is distributed across multiple processes,
+    still returning the first valid mnemonic.
     """
 
     if version_str not in _MNEMONIC_VERSIONS:
@@ -82,36 +144,46 @@ def mnemonic_from_entropy(
         raise ValueError(m)
     version = _MNEMONIC_VERSIONS[version_str]
 
-    binstr_entropy = binstr_from_entropy(entropy)
-    int_entropy = int(binstr_entropy, 2)
-    base = _wordlists.language_length(lang)
-    invalid = True
-    while invalid:
-        # electrum considers entropy as integer, losing any leading zero
-        # so the value of binstr_entropy before the while must be updated
-        nbits = int_entropy.bit_length()
-        binstr_entropy = binstr_from_entropy(int_entropy, nbits)
-        indexes = _indexes_from_entropy(binstr_entropy, base)
-        mnemonic = _mnemonic_from_indexes(indexes, lang)
-        # version validity check
-        s = hmac.new(b"Seed version", mnemonic.encode(), sha512).hexdigest()
-        if s.startswith(version):
-            invalid = False
-        # next trial
-        int_entropy += 1
-
-    return mnemonic
-
-
-def entropy_from_mnemonic(mnemonic: Mnemonic, lang: str = "en") -> BinStr:
-    "Return the entropy from the Electrum versioned mnemonic sentence."
+    int_entropy, _ = intbits_from_entropy(entropy)
+
+    if not processes:
+        mnemonic = _mnemonic_search(int_entropy, None, version, lang)
+        assert mnemonic is not None
+        return mnemonic
+
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        pending: Deque[Future] = deque()
+        while True:
+            # keep the workers busy with consecutive entropy ranges
+            while len(pending) < 2 * workers:
+                stop = int_entropy + _SEARCH_CHUNK
+                args = (int_entropy, stop, version, lang)
+                pending.append(executor.submit(_mnemonic_search, *args))
+                int_entropy = stop
+            # results are processed in order
+            mnemonic = pending.popleft().result()
+            if mnemonic is not None:
+                for future in pending:
+                    future.cancel()
+                return mnemonic
+
+
+def intbits_from_mnemonic(mnemonic: Mnemonic, lang: str = "en") -> IntBits:
+    "Return the (int, bits) entropy from the Electrum versioned mnemonic."
 
     # verify that it is a valid Electrum mnemonic sentence
     version_from_mnemonic(mnemonic)
 
     indexes = _indexes_from_mnemonic(mnemonic, lang)
     base = _wordlists.language_length(lang)
-    return _entropy_from_indexes(indexes, base)
+    return _intbits_from_indexes(indexes, base)
+
+
+def entropy_from_mnemonic(mnemonic: Mnemonic, lang: str = "en") -> BinStr:
+    "Return the entropy from the Electrum versioned mnemonic sentence."
+
+    return binstr_from_intbits(intbits_from_mnemonic(mnemonic, lang))
 
 
 def _seed_from_mnemonic(mnemonic: Mnemonic, passphrase: str) -> Tuple[str, bytes]:
@@ -17,7 +17,9 @@ and their equivalent representations.
 Leading zeros in raw or bytes entropy
 are never considered redundant padding.
 
-Output entropy is always raw.
+Output entropy is raw or, for performance critical code
+avoiding binary 0/1 string conversions,
+(integer, bit-length) tuple.
 """
 
 import math
@@ -25,24 +27,23 @@ import secrets
 from hashlib import sha512
 from typing import Iterable, List, Optional, Tuple, Union
 
-from .alias import BinStr, Entropy, Octets
+from .alias import BinStr, Entropy, IntBits, Octets
 from .utils import bytes_from_octets
 
 _bits = 128, 160, 192, 224, 256, 512
 _dice_sides = (4, 6, 8, 12, 20, 24, 30, 48, 60, 120)
 
 
-def _indexes_from_entropy(entropy: BinStr, base: int) -> List[int]:
-    """Return the digit indexes for the provided raw entropy.
+def _indexes_from_intbits(intbits: IntBits, base: int) -> List[int]:
+    """Return the digit indexes for the provided (int, bits) entropy.
 
     Return the list of integer indexes into a digit set,
     usually a language word-list,
-    for the provided raw (i.e. binary 0/1 string) entropy;
+    for the provided (integer, bit-length) entropy;
     leading zeros are not considered redundant padding.
     """
 
-    bits = len(entropy)
-    int_entropy = int(entropy, 2)
+    int_entropy, bits = intbits
     indexes = []
     while int_entropy:
         int_entropy, index = divmod(int_entropy, base)
@@ -57,10 +58,22 @@ def _indexes_from_entropy(entropy: BinStr, base: int) -> List[int]:
     return list(reversed(indexes))
 
 
-def _entropy_from_indexes(indexes: List[int], base: int) -> BinStr:
-    """Return the raw entropy from a list of word-list indexes.
+def _indexes_from_entropy(entropy: BinStr, base: int) -> List[int]:
+    """Return the digit indexes for the provided raw entropy.
 
-    Return the raw (i.e. binary 0/1 string) entropy
+    Return the list of integer indexes into a digit set,
+    usually a language word-list,
+    for the provided raw (i.e. binary 0/1 string) entropy;
+    leading zeros are not considered redundant padding.
+    """
+
+    return _indexes_from_intbits((int(entropy, 2), len(entropy)), base)
+
+
+def _intbits_from_indexes(indexes: List[int], base: int) -> IntBits:
+    """Return the (int, bits) entropy from a list of word-list indexes.
+
+    Return the (integer, bit-length) entropy
     from the provided list of integer indexes into
     a given language word-list.
     """
@@ -69,21 +82,36 @@ def _entropy_from_indexes(indexes: List[int], base: int) -> BinStr:
     for index in indexes:
         entropy = entropy * base + index
 
-    binentropy = bin(entropy)[2:]  # remove '0b'
-
     # do not lose leading zeros entropy
     bits_per_digit = int(math.log(base, 2))
-    bits = len(indexes) * bits_per_digit
-    binentropy = binentropy.zfill(bits)
+    return entropy, len(indexes) * bits_per_digit
+
+
+def _entropy_from_indexes(indexes: List[int], base: int) -> BinStr:
+    """Return the raw entropy from a list of word-list indexes.
+
+    Return the raw (i.e. binary 0/1 string) entropy
+    from the provided list of integer indexes into
+    a given language word-list.
+    """
 
-    return binentropy
+    return binstr_from_intbits(_intbits_from_indexes(indexes, base))
 
 
 OneOrMoreInt = Union[int, Iterable[int]]
 
 
-def binstr_from_entropy(entr: Entropy, bits: OneOrMoreInt = _bits) -> BinStr:
-    """Return raw entropy from the input entropy.
+def binstr_from_intbits(intbits: IntBits) -> BinStr:
+    "Return raw entropy from the input (int, bits) entropy."
+
+    int_entropy, bits = intbits
+    if bits == 0:
+        return ""
+    return bin(int_entropy)[2:].zfill(bits)
+
+
+def intbits_from_entropy(entr: Entropy, bits: OneOrMoreInt = _bits) -> IntBits:
+    """Return (int, bits) entropy from the input entropy.
 
     Input entropy can be expressed as:
 
@@ -105,19 +133,44 @@ def binstr_from_entropy(entr: Entropy, bits: OneOrMoreInt = _bits) -> BinStr:
     """
 
     if isinstance(entr, str):
-        return binstr_from_binstr(entr, bits)
+        return intbits_from_binstr(entr, bits)
     elif isinstance(entr, bytes):
-        return binstr_from_bytes(entr, bits)
+        return intbits_from_bytes(entr, bits)
     elif isinstance(entr, int):
-        return binstr_from_int(entr, bits)
+        return intbits_from_int(entr, bits)
 
     m = "Entropy must be raw binary 0/1 string, bytes, or int; "
     m += f"not '{type(entr).__name__}'"
     raise TypeError(m)
 
 
-def binstr_from_bytes(bytes_entropy: Octets, bits: OneOrMoreInt = _bits) -> BinStr:
-    """Return raw entropy from the input Octets entropy.
+def binstr_from_entropy(entr: Entropy, bits: OneOrMoreInt = _bits) -> BinStr:
+    """Return raw entropy from the input entropy.
+
+    Input entropy can be expressed as:
+
+    - raw (i.e. binary 0/1 string) entropy
+    - bytes (no hex-string, as they would conflict with
+      raw entropy representation)
+    - integer (int, no string starting with "0b"/"0x")
+
+    In the case of raw entropy and bytes,
+    entropy is never padded to satisfy the bit-size requirement;
+    instead,
+    integer entropy is front-padded with zeros digits
+    as much as necessary to satisfy the bit-size requirement.
+
+    In all cases if more bits than required are provided,
+    the leftmost ones are retained.
+
+    Default bit-sizes are 128, 160, 192, 224, 256, or 512 bits.
+    """
+
+    return binstr_from_intbits(intbits_from_entropy(entr, bits))
+
+
+def intbits_from_bytes(bytes_entropy: Octets, bits: OneOrMoreInt = _bits) -> IntBits:
+    """Return (int, bits) entropy from the input Octets entropy.
 
     Input entropy can be expressed as hex-string or bytes;
     it is never padded to satisfy the bit-size requirement.
@@ -146,11 +199,28 @@ def binstr_from_bytes(bytes_entropy: Octets, bits: OneOrMoreInt = _bits) -> BinS
 
     int_entropy = int.from_bytes(bytes_entropy, "big")
     # only the leftmost bits will be retained
-    return binstr_from_int(int_entropy, n_bits)
+    return intbits_from_int(int_entropy, n_bits)
 
 
-def binstr_from_int(int_entropy: Union[int, str], bits: OneOrMoreInt = _bits) -> BinStr:
-    """Return raw entropy from the input integer entropy.
+def binstr_from_bytes(bytes_entropy: Octets, bits: OneOrMoreInt = _bits) -> BinStr:
+    """Return raw entropy from the input Octets entropy.
+
+    Input entropy can be expressed as hex-string or bytes;
+    it is never padded to satisfy the bit-size requirement.
+
+    If more bits than required are provided,
+    the leftmost ones are retained.
+
+    Default bit-sizes are 128, 160, 192, 224, 256, or 512 bits.
+    """
+
+    return binstr_from_intbits(intbits_from_bytes(bytes_entropy, bits))
+
+
+def intbits_from_int(
+    int_entropy: Union[int, str], bits: OneOrMoreInt = _bits
+) -> IntBits:
+    """Return (int, bits) entropy from the input integer entropy.
 
     Input entropy can be expressed as int
     or string starting with "0x"/"0b";
@@ -184,20 +254,36 @@ def binstr_from_int(int_entropy: Union[int, str], bits: OneOrMoreInt = _bits) ->
     # ascending unique sorting of allowed bits
     bits = sorted(set(bits))
 
-    # convert to binary string and remove leading '0b'
-    bin_str = bin(int_entropy)[2:]
-    n_bits = len(bin_str)
+    # zero has a one digit binary representation
+    n_bits = int_entropy.bit_length() or 1
     if n_bits > bits[-1]:
         # only the leftmost bits are retained
-        return bin_str[: bits[-1]]
+        return int_entropy >> (n_bits - bits[-1]), bits[-1]
 
     # pad up to the next allowed bit length
     n_bits = next(v for i, v in enumerate(bits) if v >= n_bits)
-    return bin_str.zfill(n_bits)
+    return int_entropy, n_bits
 
 
-def binstr_from_binstr(str_entropy: str, bits: OneOrMoreInt = _bits) -> BinStr:
-    """Return raw entropy from the input raw entropy.
+def binstr_from_int(int_entropy: Union[int, str], bits: OneOrMoreInt = _bits) -> BinStr:
+    """Return raw entropy from the input integer entropy.
+
+    Input entropy can be expressed as int
+    or string starting with "0x"/"0b";
+    it is front-padded with zeros digits
+    as much as necessary to satisfy the bit-size requirement.
+
+    If more bits than required are provided,
+    the leftmost ones are retained.
+
+    Default bit-sizes are 128, 160, 192, 224, 256, or 512 bits.
+    """
+
+    return binstr_from_intbits(intbits_from_int(int_entropy, bits))
+
+
+def intbits_from_binstr(str_entropy: str, bits: OneOrMoreInt = _bits) -> IntBits:
+    """Return (int, bits) entropy from the input raw entropy.
 
     Input entropy must be expressed as raw entropy;
     it is never padded to satisfy the bit-size requirement.
@@ -212,9 +298,9 @@ def binstr_from_binstr(str_entropy: str, bits: OneOrMoreInt = _bits) -> BinStr:
         m = "Entropy must be a str, not "
         m += f"{type(str_entropy).__name__}"
         raise TypeError(m)
-        # check if it is a valid binary string
 
-    int(str_entropy, 2)
+    # check if it is a valid binary string
+    int_entropy = int(str_entropy, 2)
 
     # if a single int, make it a tuple
     if isinstance(bits, int):
@@ -225,11 +311,26 @@ def binstr_from_binstr(str_entropy: str, bits: OneOrMoreInt = _bits) -> BinStr:
     n_bits = len(str_entropy)
     if n_bits > bits[-1]:
         # only the leftmost bits are retained
-        return str_entropy[: bits[-1]]
+        return int_entropy >> (n_bits - bits[-1]), bits[-1]
     if n_bits not in bits:
         m = f"Wrong number of bits: {n_bits} instead of {bits}"
         raise ValueError(m)
-    return str_entropy
+    return int_entropy, n_bits
+
+
+def binstr_from_binstr(str_entropy: str, bits: OneOrMoreInt = _bits) -> BinStr:
+    """Return raw entropy from the input raw entropy.
+
+    Input entropy must be expressed as raw entropy;
+    it is never padded to satisfy the bit-size requirement.
+
+    If more bits than required are provided,
+    the leftmost ones are retained.
+
+    Default bit-sizes are 128, 160, 192, 224, 256, or 512 bits.
+    """
+
+    return binstr_from_intbits(intbits_from_binstr(str_entropy, bits))
 
 
 def collect_rolls(bits: int) -> Tuple[int, List[int]]:
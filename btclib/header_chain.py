@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Block header chain, as synced by SPV clients.
+
+Serialized 80-bytes headers are ingested in bulk,
+e.g. from the payload of a headers message,
+from a file, or from a memory-mapped array:
+each header is checked for proof-of-work and linked to its parent
+working on byte slices, without building BlockHeader objects.
+
+All the valid headers are stored, including those on forks,
+in a single contiguous buffer; their cumulative chainwork
+is tracked and the best chain is the one with the most chainwork
+(the first seen, in case of ties).
+Headers are indexed by hash and, on the best chain, by height.
+
+Difficulty retargeting is not verified here
+(see the difficulty module).
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+from .block_files import mmap_file
+from .blocks import BlockHeader
+from .varint import Buffer
+
+HEADER_SIZE = 80
+
+# proof-of-work limits, i.e. highest target
+POW_LIMIT = {
+    "mainnet": 0x00000000FFFF << 208,
+    "testnet": 0x00000000FFFF << 208,
+    "regtest": 0x7FFFFF << 232,
+}
+
+
+def target_from_compact(bits: int) -> int:
+    """Return the target encoded in compact 'bits' format.
+
+    As in Bitcoin Core, negative and overflowing targets are invalid.
+    """
+
+    size = bits >> 24
+    mantissa = bits & 0x007FFFFF
+    if size <= 3:
+        mantissa >>= 8 * (3 - size)
+    if mantissa and bits & 0x00800000:
+        raise ValueError(f"negative target: {hex(bits)}")
+    if size <= 3:
+        return mantissa
+    if mantissa and (
+        size > 34
+        or (mantissa > 0xFF and size > 33)
+        or (mantissa > 0xFFFF and size > 32)
+    ):
+        raise ValueError(f"overflowing target: {hex(bits)}")
+    return mantissa << 8 * (size - 3)
+
+
+def work_from_target(target: int) -> int:
+    "Return the expected number of hashes to meet the target."
+    return (1 << 256) // (target + 1)
+
+
+class HeaderChain:
+    """Proof-of-work validated header tree with best chain index.
+
+    The chain starts from a trusted header (e.g. the genesis block
+    or a checkpoint) at the given height and with the given
+    cumulative chainwork up to (and excluding) it.
+    """
+
+    def __init__(
+        self,
+        start: Buffer,
+        height: int = 0,
+        chainwork: int = 0,
+        network: str = "mainnet",
+    ) -> None:
+
+        self.pow_limit = POW_LIMIT[network]
+        # headers in insertion order
+        self._headers = bytearray()
+        self._hashes: List[bytes] = []
+        self._parents: List[int] = []
+        self._heights: List[int] = []
+        self._chainworks: List[int] = []
+        self._positions: Dict[bytes, int] = {}
+        # positions of the best chain headers, from the start height
+        self._best: List[int] = []
+        self._start_height = height
+        # work of the last seen bits
+        self._bits = b""
+        self._target = 0
+        self._work = 0
+
+        start = memoryview(start)
+        if len(start) != HEADER_SIZE:
+            raise ValueError(f"invalid header size: {len(start)}")
+        header_hash = self._check_pow(start, 0)
+        self._append(start, header_hash, -1, height, chainwork + self._work)
+        self._best.append(0)
+
+    def _check_pow(self, header: memoryview, offset: int) -> bytes:
+        "Return the header hash, if it meets the header target."
+
+        bits = header[72:76]
+        if bits != self._bits:
+            target = target_from_compact(int.from_bytes(bits, "little"))
+            if not 0 < target <= self.pow_limit:
+                raise ValueError(f"invalid target at offset {offset}: {hex(target)}")
+            self._bits = bits.tobytes()
+            self._target = target
+            self._work = work_from_target(target)
+        header_hash = hashlib.sha256(hashlib.sha256(header).digest()).digest()
+        if int.from_bytes(header_hash, "little") > self._target:
+            raise ValueError(f"invalid proof-of-work at offset {offset}")
+        return header_hash
+
+    def _append(
+        self,
+        header: memoryview,
+        header_hash: bytes,
+        parent: int,
+        height: int,
+        work: int,
+    ) -> None:
+        self._positions[header_hash] = len(self._hashes)
+        self._headers += header
+        self._hashes.append(header_hash)
+        self._parents.append(parent)
+        self._heights.append(height)
+        self._chainworks.append(work)
+
+    def add_headers(self, data: Buffer) -> int:
+        """Add the concatenated serialized headers, returning the new ones.
+
+        Headers must follow their parent (if not already in the chain);
+        already known headers are skipped.
+        In case of an invalid header an error is raised,
+        the previous headers in data having been added.
+        """
+
+        view = memoryview(data)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast("B")
+        if len(view) % HEADER_SIZE:
+            raise ValueError(f"invalid headers data size: {len(view)}")
+
+        positions = self._positions
+        chainworks = self._chainworks
+        heights = self._heights
+        best_work = chainworks[self._best[-1]]
+        best_tip = -1
+        added = 0
+        try:
+            for offset in range(0, len(view), HEADER_SIZE):
+                header = view[offset : offset + HEADER_SIZE]
+                header_hash = self._check_pow(header, offset)
+                if header_hash in positions:
+                    continue
+                parent = positions.get(header[4:36].tobytes())
+                if parent is None:
+                    raise ValueError(f"unknown previous block at offset {offset}")
+                work = chainworks[parent] + self._work
+                self._append(header, header_hash, parent, heights[parent] + 1, work)
+                added += 1
+                if work > best_work:
+                    best_work = work
+                    best_tip = len(self._hashes) - 1
+        finally:
+            if best_tip != -1:
+                self._set_tip(best_tip)
+        return added
+
+    def add_headers_from_file(self, filename: str) -> int:
+        "Add the headers from a file of concatenated serialized headers."
+
+        return self.add_headers(mmap_file(filename))
+
+    def _set_tip(self, position: int) -> None:
+        "Make the header at the given position the tip of the best chain."
+
+        best = self._best
+        branch = []
+        i = self._heights[position] - self._start_height
+        while not (i < len(best) and best[i] == position):
+            branch.append(position)
+            position = self._parents[position]
+            i -= 1
+        del best[i + 1 :]
+        best.extend(reversed(branch))
+
+    @property
+    def height(self) -> int:
+        "Return the height of the best chain tip."
+        return self._start_height + len(self._best) - 1
+
+    @property
+    def tip(self) -> str:
+        "Return the hash of the best chain tip."
+        return self._hashes[self._best[-1]][::-1].hex()
+
+    @property
+    def chainwork(self) -> int:
+        "Return the cumulative chainwork of the best chain."
+        return self._chainworks[self._best[-1]]
+
+    def __len__(self) -> int:
+        "Return the number of stored headers, including those on forks."
+        return len(self._hashes)
+
+    def __contains__(self, header_hash: str) -> bool:
+        return bytes.fromhex(header_hash)[::-1] in self._positions
+
+    def _position(self, height: int) -> int:
+        i = height - self._start_height
+        if not 0 <= i < len(self._best):
+            raise IndexError(f"invalid height: {height}")
+        return self._best[i]
+
+    def hash(self, height: int) -> str:
+        "Return the hash of the best chain header at the given height."
+        return self._hashes[self._position(height)][::-1].hex()
+
+    def header_bytes(self, height: int) -> bytes:
+        "Return the serialized best chain header at the given height."
+        start = HEADER_SIZE * self._position(height)
+        return bytes(self._headers[start : start + HEADER_SIZE])
+
+    def header(self, height: int) -> BlockHeader:
+        "Return the best chain header at the given height."
+        return BlockHeader.deserialize(self.header_bytes(height), False)
+
+    def height_of(self, header_hash: str) -> Optional[int]:
+        "Return the height of the header, None if not on the best chain."
+
+        position = self._positions.get(bytes.fromhex(header_hash)[::-1])
+        if position is None:
+            return None
+        height = self._heights[position]
+        i = height - self._start_height
+        return height if i < len(self._best) and self._best[i] == position else None
+
+    def chainwork_of(self, header_hash: str) -> int:
+        "Return the cumulative chainwork up to the header."
+
+        position = self._positions.get(bytes.fromhex(header_hash)[::-1])
+        if position is None:
+            raise ValueError(f"unknown header: {header_hash}")
+        return self._chainworks[position]
+
+    def headers_bytes(
+        self, start: Optional[int] = None, stop: Optional[int] = None
+    ) -> bytes:
+        """Return the serialized best chain headers in the height range.
+
+        By default, from the first header (e.g. the checkpoint) to the tip.
+        """
+
+        start = self._start_height if start is None else start
+        stop = self.height + 1 if stop is None else stop
+        out = bytearray()
+        for height in range(start, stop):
+            p = HEADER_SIZE * self._position(height)
+            out += self._headers[p : p + HEADER_SIZE]
+        return bytes(out)
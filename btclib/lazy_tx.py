@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Lazily decoded Bitcoin Transaction view.
+
+A LazyTx is a read-only view over a serialized transaction:
+a single pass over a memoryview of the serialized data indexes
+the offsets of all the transaction fields, without copying data
+or building any TxIn/TxOut/OutPoint object.
+
+Fields are decoded only on attribute access;
+txid and wtxid are computed hashing the serialized byte slices.
+"""
+
+from math import ceil
+from typing import List, Tuple, Union
+
+from .alias import Token
+from .script import decode
+from .tx import Tx
+from .tx_in import _NULL_OUTPOINT
+from .utils import hash256_slices
+from .varint import Buffer, decode_at
+
+
+class LazyTxIn:
+    "Read-only view of a transaction input in a LazyTx."
+
+    __slots__ = ("_tx", "_i")
+
+    def __init__(self, tx: "LazyTx", i: int) -> None:
+        self._tx = tx
+        self._i = i
+
+    @property
+    def prevout_bytes(self) -> memoryview:
+        "Return the serialized 36-bytes prevout."
+        start = self._tx._vin[self._i]
+        return self._tx._buffer[start : start + 36]
+
+    @property
+    def prevout_hash(self) -> str:
+        start = self._tx._vin[self._i]
+        return bytes(self._tx._buffer[start : start + 32][::-1]).hex()
+
+    @property
+    def prevout_n(self) -> int:
+        start = self._tx._vin[self._i] + 32
+        return int.from_bytes(self._tx._buffer[start : start + 4], "little")
+
+    @property
+    def is_coinbase(self) -> bool:
+        return self.prevout_bytes == _NULL_OUTPOINT
+
+    @property
+    def scriptSigBytes(self) -> memoryview:
+        start, end = self._tx._script_sigs[self._i]
+        return self._tx._buffer[start:end]
+
+    @property
+    def scriptSig(self) -> List[Token]:
+        return decode(bytes(self.scriptSigBytes))
+
+    @property
+    def nSequence(self) -> int:
+        start = self._tx._script_sigs[self._i][1]
+        return int.from_bytes(self._tx._buffer[start : start + 4], "little")
+
+    @property
+    def txinwitness(self) -> List[str]:
+        if not self._tx._witnesses:
+            return []
+        return [bytes(item).hex() for item in self._tx._witness_items(self._i)]
+
+
+class LazyTxOut:
+    "Read-only view of a transaction output in a LazyTx."
+
+    __slots__ = ("_tx", "_i")
+
+    def __init__(self, tx: "LazyTx", i: int) -> None:
+        self._tx = tx
+        self._i = i
+
+    @property
+    def nValue(self) -> int:
+        start = self._tx._vout[self._i]
+        return int.from_bytes(self._tx._buffer[start : start + 8], "little")
+
+    @property
+    def scriptPubKeyBytes(self) -> memoryview:
+        start, end = self._tx._script_pubkeys[self._i]
+        return self._tx._buffer[start:end]
+
+    @property
+    def scriptPubKey(self) -> List[Token]:
+        return decode(bytes(self.scriptPubKeyBytes))
+
+
+class LazyTx:
+    """Read-only, lazily decoded view of a serialized transaction.
+
+    The view is built over the buffer starting at the given offset:
+    the buffer is not copied, so it must not be modified
+    while the view is in use.
+    The end offset of the transaction in the buffer is available
+    as the end attribute, e.g. to parse the next transaction
+    of a serialized block.
+    """
+
+    __slots__ = (
+        "_buffer",
+        "start",
+        "end",
+        "_vin",
+        "_script_sigs",
+        "_vout",
+        "_script_pubkeys",
+        "_witnesses",
+    )
+
+    def __init__(self, data: Union[Buffer, str], offset: int = 0) -> None:
+
+        if isinstance(data, str):  # hex string
+            data = bytes.fromhex(data)
+        buffer = memoryview(data)
+        if buffer.ndim != 1 or buffer.itemsize != 1:
+            buffer = buffer.cast("B")
+        self._buffer = buffer
+        self.start = offset
+
+        # start offsets of prevouts, (start, end) offsets of scriptSigs
+        self._vin: List[int] = []
+        self._script_sigs: List[Tuple[int, int]] = []
+        # start offsets of nValues, (start, end) offsets of scriptPubKeys
+        self._vout: List[int] = []
+        self._script_pubkeys: List[Tuple[int, int]] = []
+        # start offsets of the witnesses, plus the end offset of the last one
+        self._witnesses: List[int] = []
+        try:
+            self.end = self._index(offset)
+        except IndexError:
+            self.end = len(buffer) + 1
+        if self.end > len(buffer):
+            raise ValueError(f"truncated transaction: {len(buffer) - offset} bytes")
+
+    def _index(self, offset: int) -> int:
+        "Index the field offsets in a single pass, returning the end offset."
+
+        buffer = self._buffer
+        pos = offset + 4  # nVersion
+        segwit = buffer[pos : pos + 2] == b"\x00\x01"
+        if segwit:
+            pos += 2
+
+        n, pos = decode_at(buffer, pos)
+        for _ in range(n):
+            self._vin.append(pos)
+            length, pos = decode_at(buffer, pos + 36)
+            self._script_sigs.append((pos, pos + length))
+            pos += length + 4  # nSequence
+
+        n, pos = decode_at(buffer, pos)
+        for _ in range(n):
+            self._vout.append(pos)
+            length, pos = decode_at(buffer, pos + 8)
+            self._script_pubkeys.append((pos, pos + length))
+            pos += length
+
+        if segwit:
+            for _ in range(len(self._vin)):
+                self._witnesses.append(pos)
+                n, pos = decode_at(buffer, pos)
+                for _ in range(n):
+                    length, pos = decode_at(buffer, pos)
+                    pos += length
+            self._witnesses.append(pos)
+
+        return pos + 4  # nLockTime
+
+    def _witness_items(self, i: int) -> List[memoryview]:
+        items: List[memoryview] = []
+        n, pos = decode_at(self._buffer, self._witnesses[i])
+        for _ in range(n):
+            length, pos = decode_at(self._buffer, pos)
+            items.append(self._buffer[pos : pos + length])
+            pos += length
+        return items
+
+    @property
+    def nVersion(self) -> int:
+        return int.from_bytes(self._buffer[self.start : self.start + 4], "little")
+
+    @property
+    def nLockTime(self) -> int:
+        return int.from_bytes(self._buffer[self.end - 4 : self.end], "little")
+
+    @property
+    def vin(self) -> List[LazyTxIn]:
+        return [LazyTxIn(self, i) for i in range(len(self._vin))]
+
+    @property
+    def vout(self) -> List[LazyTxOut]:
+        return [LazyTxOut(self, i) for i in range(len(self._vout))]
+
+    @property
+    def has_witness(self) -> bool:
+        return bool(self._witnesses)
+
+    def serialize(self, include_witness: bool = True) -> bytes:
+        if include_witness or not self._witnesses:
+            return bytes(self._buffer[self.start : self.end])
+        return b"".join(self._base_slices())
+
+    def _base_slices(self) -> List[memoryview]:
+        "Return the serialized slices without marker, flag, and witnesses."
+        b = self._buffer
+        return [
+            b[self.start : self.start + 4],  # nVersion
+            b[self.start + 6 : self._witnesses[0]],  # vin and vout
+            b[self.end - 4 : self.end],  # nLockTime
+        ]
+
+    @property
+    def txid_bytes(self) -> bytes:
+        "Return the txid in internal byte order (i.e. not reversed)."
+        if not self._witnesses:
+            return hash256_slices(self._buffer[self.start : self.end])
+        return hash256_slices(*self._base_slices())
+
+    @property
+    def hash_bytes(self) -> bytes:
+        "Return the wtxid in internal byte order (i.e. not reversed)."
+        return hash256_slices(self._buffer[self.start : self.end])
+
+    @property
+    def txid(self) -> str:
+        return self.txid_bytes[::-1].hex()
+
+    @property
+    def hash(self) -> str:
+        return self.hash_bytes[::-1].hex()
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+    @property
+    def weight(self) -> int:
+        if not self._witnesses:
+            return self.size * 4
+        # marker, flag, and witnesses are not part of the base size
+        witness_size = 2 + self._witnesses[-1] - self._witnesses[0]
+        return (self.size - witness_size) * 3 + self.size
+
+    @property
+    def vsize(self) -> int:
+        return ceil(self.weight / 4)
+
+    def to_tx(self) -> Tx:
+        "Return the fully decoded Tx."
+        return Tx.deserialize(self.serialize())
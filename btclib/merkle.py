@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Bitcoin Merkle trees.
+
+Leaves are 32-bytes hashes in internal byte order (i.e. not reversed),
+e.g. txids for the block merkle root and wtxids for the
+BIP141 witness commitment.
+If a tree level has an odd number of nodes, the last node
+is hashed with itself.
+
+A MerkleTree keeps all its levels in a single contiguous buffer,
+from the leaves up to the root: once built, inclusion proofs
+and BIP37 partial merkle trees (as served in merkleblock messages)
+are generated without hashing again.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from . import varint
+from .alias import BinaryData, Octets
+from .utils import bytes_from_octets, bytesio_from_binarydata, hash256_slices
+from .varint import Buffer
+
+# BIP141: max block weight / min transaction weight
+_MAX_TRANSACTIONS = 4000000 // 240
+
+_PartialMerkleTree = TypeVar("_PartialMerkleTree", bound="PartialMerkleTree")
+
+
+@dataclass
+class PartialMerkleTree:
+    """BIP37 partial merkle tree.
+
+    It is the pruned merkle tree with the (depth-first) hashes
+    and flag bits needed to prove the inclusion of the matched leaves,
+    as serialized in the merkleblock message.
+    """
+
+    leaves: int
+    hashes: List[bytes]
+    flags: List[bool]
+
+    @classmethod
+    def deserialize(
+        cls: Type[_PartialMerkleTree], data: BinaryData
+    ) -> _PartialMerkleTree:
+
+        stream = bytesio_from_binarydata(data)
+        leaves = int.from_bytes(stream.read(4), "little")
+        n = varint.decode(stream)
+        hashes = [stream.read(32) for _ in range(n)]
+        if any(len(h) != 32 for h in hashes):
+            raise ValueError("truncated partial merkle tree hashes")
+        flag_bytes = stream.read(varint.decode(stream))
+        flags = [bool(b >> i & 1) for b in flag_bytes for i in range(8)]
+        return cls(leaves, hashes, flags)
+
+    def serialize(self) -> bytes:
+        flag_bytes = bytearray((len(self.flags) + 7) // 8)
+        for i, flag in enumerate(self.flags):
+            if flag:
+                flag_bytes[i // 8] |= 1 << (i % 8)
+        out = bytearray(self.leaves.to_bytes(4, "little"))
+        out += varint.encode(len(self.hashes))
+        for h in self.hashes:
+            out += h
+        out += varint.encode(len(flag_bytes))
+        out += flag_bytes
+        return bytes(out)
+
+    def extract(self) -> Tuple[bytes, List[Tuple[int, bytes]]]:
+        """Return the merkle root and the (index, hash) matched leaves.
+
+        The tree is validated as in Bitcoin Core CPartialMerkleTree,
+        including the rejection of duplicated sibling hashes (CVE-2012-2459).
+        """
+
+        if self.leaves == 0:
+            raise ValueError("empty partial merkle tree")
+        if self.leaves > _MAX_TRANSACTIONS:
+            raise ValueError(f"too many leaves: {self.leaves}")
+        if len(self.hashes) > self.leaves:
+            raise ValueError("more hashes than leaves")
+        if len(self.flags) < len(self.hashes):
+            raise ValueError("fewer flags than hashes")
+
+        sizes = [self.leaves]
+        while sizes[-1] > 1:
+            sizes.append((sizes[-1] + 1) // 2)
+        matched: List[Tuple[int, bytes]] = []
+        used = [0, 0]  # flags, hashes
+
+        def traverse(level: int, index: int) -> bytes:
+            if used[0] >= len(self.flags):
+                raise ValueError("not enough flags")
+            parent_of_match = self.flags[used[0]]
+            used[0] += 1
+            if level == 0 or not parent_of_match:
+                if used[1] >= len(self.hashes):
+                    raise ValueError("not enough hashes")
+                h = self.hashes[used[1]]
+                used[1] += 1
+                if level == 0 and parent_of_match:
+                    matched.append((index, h))
+                return h
+            left = traverse(level - 1, 2 * index)
+            if 2 * index + 1 < sizes[level - 1]:
+                right = traverse(level - 1, 2 * index + 1)
+                if right == left:
+                    raise ValueError("duplicated sibling hashes")
+            else:
+                right = left
+            return hash256_slices(left, right)
+
+        root = traverse(len(sizes) - 1, 0)
+        if (used[0] + 7) // 8 != (len(self.flags) + 7) // 8:
+            raise ValueError("unused flags")
+        if used[1] != len(self.hashes):
+            raise ValueError("unused hashes")
+        return root, matched
+
+
+class MerkleTree:
+    "Merkle tree of 32-bytes hashes, with all the levels cached."
+
+    def __init__(self, hashes: Iterable[Buffer]) -> None:
+
+        leaves = bytearray()
+        for h in hashes:
+            if len(h) != 32:
+                raise ValueError(f"invalid hash length: {len(h)}")
+            leaves += h
+        n = len(leaves) // 32
+        if n == 0:
+            raise ValueError("empty merkle tree")
+
+        # offsets (in hashes) and sizes of the levels, from the leaves
+        self._offsets = [0]
+        self._sizes = [n]
+        level = memoryview(leaves)
+        levels = [level]
+        while n > 1:
+            parents = bytearray()
+            # adjacent siblings are hashed as a single 64-bytes slice
+            for i in range(0, 32 * n - 32, 64):
+                parents += hash256_slices(level[i : i + 64])
+            if n % 2:
+                parents += hash256_slices(level[-32:], level[-32:])
+            self._offsets.append(self._offsets[-1] + n)
+            n = len(parents) // 32
+            self._sizes.append(n)
+            level = memoryview(parents)
+            levels.append(level)
+        self._buffer = b"".join(levels)
+
+    @property
+    def leaves(self) -> int:
+        return self._sizes[0]
+
+    @property
+    def height(self) -> int:
+        "Return the number of levels above the leaves."
+        return len(self._sizes) - 1
+
+    def node(self, level: int, index: int) -> bytes:
+        "Return the hash at the given level (0 being the leaves) and index."
+
+        if not 0 <= index < self._sizes[level]:
+            raise IndexError(f"invalid index at level {level}: {index}")
+        start = 32 * (self._offsets[level] + index)
+        return self._buffer[start : start + 32]
+
+    @property
+    def root_bytes(self) -> bytes:
+        "Return the root in internal byte order (i.e. not reversed)."
+        return self._buffer[-32:]
+
+    @property
+    def root(self) -> str:
+        return self._buffer[-32:][::-1].hex()
+
+    def proof(self, index: int) -> List[bytes]:
+        "Return the inclusion proof of a leaf, i.e. the siblings up to the root."
+
+        if not 0 <= index < self.leaves:
+            raise IndexError(f"invalid leaf index: {index}")
+        siblings = []
+        for level in range(self.height):
+            # the last node of an odd level is its own sibling
+            sibling = min(index ^ 1, self._sizes[level] - 1)
+            siblings.append(self.node(level, sibling))
+            index >>= 1
+        return siblings
+
+    def partial(self, matches: Sequence[bool]) -> PartialMerkleTree:
+        "Return the BIP37 partial merkle tree of the matched leaves."
+
+        if len(matches) != self.leaves:
+            m = len(matches)
+            raise ValueError(f"{m} matches for {self.leaves} leaves")
+        hashes: List[bytes] = []
+        flags: List[bool] = []
+
+        def traverse(level: int, index: int) -> None:
+            first = index << level
+            last = min((index + 1) << level, self.leaves)
+            parent_of_match = any(matches[first:last])
+            flags.append(parent_of_match)
+            if level == 0 or not parent_of_match:
+                hashes.append(self.node(level, index))
+            else:
+                traverse(level - 1, 2 * index)
+                if 2 * index + 1 < self._sizes[level - 1]:
+                    traverse(level - 1, 2 * index + 1)
+
+        traverse(self.height, 0)
+        return PartialMerkleTree(self.leaves, hashes, flags)
+
+
+def merkle_root_from_proof(leaf: Octets, index: int, proof: Sequence[Octets]) -> bytes:
+    "Return the merkle root (in internal byte order) from the inclusion proof."
+
+    h = bytes_from_octets(leaf, 32)
+    for sibling in proof:
+        sibling = bytes_from_octets(sibling, 32)
+        h = hash256_slices(sibling, h) if index & 1 else hash256_slices(h, sibling)
+        index >>= 1
+    if index:
+        raise ValueError("leaf index beyond the proof height")
+    return h
+
+
+def verify_proof(
+    leaf: Octets, index: int, proof: Sequence[Octets], root: Octets
+) -> bool:
+    "Verify the inclusion proof against the merkle root (internal byte order)."
+
+    try:
+        return merkle_root_from_proof(leaf, index, proof) == bytes_from_octets(root)
+    except ValueError:
+        return False
+
+
+def witness_merkle_tree(wtxids: Iterable[Buffer]) -> MerkleTree:
+    "Return the BIP141 merkle tree of the wtxids, the coinbase one being null."
+
+    wtxids = iter(wtxids)
+    next(wtxids, None)
+    return MerkleTree([b"\x00" * 32, *wtxids])
+
+
+def witness_commitment(
+    wtxids: Iterable[Buffer], witness_reserved_value: Optional[Octets] = None
+) -> bytes:
+    "Return the BIP141 witness commitment, i.e. hash256(root || reserved value)."
+
+    if witness_reserved_value is None:
+        reserved = b"\x00" * 32
+    else:
+        reserved = bytes_from_octets(witness_reserved_value, 32)
+    return hash256_slices(witness_merkle_tree(wtxids).root_bytes, reserved)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Toy block creation and mining.
+
+The first 64 bytes of the serialized header (version, previous block hash,
+and most of the merkle root) do not depend on the nonce:
+their SHA-256 midstate is computed once and copied for each nonce,
+hashing only the last 16 header bytes.
+When the 32-bit nonce space is exhausted, the coinbase extranonce
+is incremented: as the merkle branch of the coinbase does not depend
+on the coinbase itself, only log2(transactions) hashes are needed
+to update the merkle root.
+
+The nonce space is split in ranges searched by worker processes.
+Python hashing is many orders of magnitude slower than mining hardware:
+this is meant for regtest-like targets.
+"""
+
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Deque, List, Optional
+
+from . import script
+from .alias import Octets
+from .blocks import Block, BlockHeader
+from .header_chain import target_from_compact
+from .merkle import MerkleTree, merkle_root_from_proof, witness_commitment
+from .tx import Tx
+from .tx_in import OutPoint, TxIn
+from .tx_out import TxOut
+from .utils import hash256_slices
+
+_NONCES = 1 << 32
+_WITNESS_HEADER = b"\xaa\x21\xa9\xed"
+
+
+def subsidy(height: int, halving_interval: int = 210000) -> int:
+    "Return the block subsidy in satoshi."
+
+    halvings = height // halving_interval
+    return 0 if halvings >= 64 else (50 * 100000000) >> halvings
+
+
+def _search_nonces(header76: bytes, target: int, start: int, stop: int) -> int:
+    "Return the first nonce meeting the target in the range, -1 if none."
+
+    midstate = hashlib.sha256(header76[:64])
+    tail = header76[64:]
+    sha256 = hashlib.sha256
+    for nonce in range(start, stop):
+        h = midstate.copy()
+        h.update(tail + nonce.to_bytes(4, "little"))
+        if int.from_bytes(sha256(h.digest()).digest(), "little") <= target:
+            return nonce
+    return -1
+
+
+class _Template:
+    """Block template, with the extranonce as last coinbase scriptSig push.
+
+    The coinbase is serialized once: for each extranonce
+    its txid and the merkle root are computed from byte slices.
+    """
+
+    def __init__(
+        self,
+        previousblockhash: str,
+        height: int,
+        transactions: List[Tx],
+        scriptPubKey: Octets,
+        value: int,
+        time: int,
+        bits: bytes,
+        version: int,
+        extranonce_size: int,
+    ) -> None:
+
+        if extranonce_size < 1:
+            raise ValueError(f"invalid extranonce size: {extranonce_size}")
+        self.transactions = transactions
+        self.extranonce_size = extranonce_size
+
+        vout = [TxOut(value, script.decode(scriptPubKey))]
+        self.coinbase_witness: List[str] = []
+        if any(tx_in.txinwitness for t in transactions for tx_in in t.vin):
+            # BIP141 commitment, with null witness reserved value
+            wtxids = [bytes.fromhex(t.hash)[::-1] for t in transactions]
+            commitment = witness_commitment([b"\x00" * 32, *wtxids])
+            scriptPubKey = script.encode(["OP_RETURN", _WITNESS_HEADER + commitment])
+            vout.append(TxOut(0, script.decode(scriptPubKey)))
+            self.coinbase_witness = ["00" * 32]
+        self.vout = vout
+
+        # BIP34 height push, then the extranonce push
+        extranonce_push = script.encode([bytes(extranonce_size)])
+        self.scriptSig = script.encode([height]) + extranonce_push[:-extranonce_size]
+        # coinbase scriptSigs are at most 100 bytes
+        if len(self.scriptSig) + extranonce_size > 100:
+            raise ValueError(f"invalid extranonce size: {extranonce_size}")
+        serialized = self.coinbase(0).serialize(include_witness=False)
+        # version, input count, null prevout, and (1-byte) scriptSig length
+        start = 4 + 1 + 36 + 1 + len(self.scriptSig)
+        self.coinbase_prefix = serialized[:start]
+        self.coinbase_suffix = serialized[start + extranonce_size :]
+
+        # the coinbase merkle branch does not depend on the coinbase
+        txids = [bytes.fromhex(t.txid)[::-1] for t in transactions]
+        self.branch = MerkleTree([b"\x00" * 32, *txids]).proof(0)
+
+        self.header_prefix = version.to_bytes(4, "little")
+        self.header_prefix += bytes.fromhex(previousblockhash)[::-1]
+        self.header_suffix = time.to_bytes(4, "little") + bits[::-1]
+        self.header = BlockHeader(version, previousblockhash, "", time, bits, 0)
+
+    def coinbase(self, extranonce: int) -> Tx:
+        scriptSig = self.scriptSig
+        scriptSig += extranonce.to_bytes(self.extranonce_size, "little")
+        null_prevout = OutPoint("00" * 32, 0xFFFFFFFF)
+        tx_in = TxIn(null_prevout, [], scriptSig.hex(), 0xFFFFFFFF, [])
+        tx_in.txinwitness = self.coinbase_witness[:]
+        vout = [TxOut(o.nValue, o.scriptPubKey[:]) for o in self.vout]
+        return Tx(1, 0, [tx_in], vout)
+
+    def merkleroot(self, extranonce: int) -> bytes:
+        "Return the merkle root (internal byte order) for the extranonce."
+
+        txid = hash256_slices(
+            self.coinbase_prefix,
+            extranonce.to_bytes(self.extranonce_size, "little"),
+            self.coinbase_suffix,
+        )
+        return merkle_root_from_proof(txid, 0, self.branch)
+
+    def header76(self, extranonce: int) -> bytes:
+        "Return the serialized header, without the nonce."
+        return self.header_prefix + self.merkleroot(extranonce) + self.header_suffix
+
+    def block(self, extranonce: int, nonce: int) -> Block:
+        merkleroot = self.merkleroot(extranonce)[::-1].hex()
+        header = replace(self.header, merkleroot=merkleroot, nonce=nonce)
+        return Block(header, [self.coinbase(extranonce), *self.transactions])
+
+
+def mine(
+    previousblockhash: str,
+    height: int,
+    scriptPubKey: Octets,
+    time: int,
+    bits: bytes,
+    transactions: Optional[List[Tx]] = None,
+    fees: int = 0,
+    version: int = 0x20000000,
+    extranonce_size: int = 4,
+    max_workers: Optional[int] = 1,
+    chunk_size: int = 1 << 20,
+    halving_interval: int = 210000,
+) -> Block:
+    """Return a mined block extending the previous block.
+
+    The coinbase pays the subsidy and the fees to the scriptPubKey
+    and commits to the witness data (if any) of the transactions.
+    The nonce space is searched in chunks by max_workers processes
+    (in the calling process if max_workers is 1); None means all the CPUs.
+    """
+
+    transactions = [] if transactions is None else transactions
+    value = subsidy(height, halving_interval) + fees
+    template = _Template(
+        previousblockhash,
+        height,
+        transactions,
+        scriptPubKey,
+        value,
+        time,
+        bits,
+        version,
+        extranonce_size,
+    )
+    target = target_from_compact(int.from_bytes(bits, "big"))
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1:
+        for extranonce in range(1 << (8 * extranonce_size)):
+            header76 = template.header76(extranonce)
+            nonce = _search_nonces(header76, target, 0, _NONCES)
+            if nonce != -1:
+                return template.block(extranonce, nonce)
+        raise ValueError("nonce and extranonce spaces exhausted")
+
+    # the process pool is reused for all the extranonces
+    with ProcessPoolExecutor(workers) as executor:
+        for extranonce in range(1 << (8 * extranonce_size)):
+            header76 = template.header76(extranonce)
+            nonce = _parallel_search(header76, target, executor, workers, chunk_size)
+            if nonce != -1:
+                return template.block(extranonce, nonce)
+    raise ValueError("nonce and extranonce spaces exhausted")
+
+
+def _parallel_search(
+    header76: bytes,
+    target: int,
+    executor: ProcessPoolExecutor,
+    workers: int,
+    chunk_size: int,
+) -> int:
+    "Return the lowest nonce meeting the target, -1 if none."
+
+    pending: Deque = deque()
+    starts = iter(range(0, _NONCES, chunk_size))
+    while True:
+        # keep the workers busy, bounding the submitted chunks
+        for start in starts:
+            stop = min(start + chunk_size, _NONCES)
+            future = executor.submit(_search_nonces, header76, target, start, stop)
+            pending.append(future)
+            if len(pending) >= 2 * workers:
+                break
+        if not pending:
+            return -1
+        nonce = pending.popleft().result()
+        if nonce != -1:
+            for future in pending:
+                future.cancel()
+            return nonce
@@ -17,12 +17,15 @@ better served by the bip39 and electrum module functions.
 """
 
 from os import path
-from typing import List
+from typing import Dict, List
 
 from .utils import ensure_is_power_of_two
 
 WordList = List[str]
 
+# BIP39 words are unique in their first four letters
+_PREFIX_LENGTH = 4
+
 
 class WordLists:
     """Class for word-lists to be used in entropy/mnemonic conversions.
@@ -35,6 +38,12 @@ class WordLists:
     More word-lists can be added using the load_lang method.
 
     Word-lists are loaded only if needed and read only once from disk.
+
+    When a word-list is loaded, the following indexes are also built:
+
+    * word to word-list index, for constant-time word lookup
+    * unique four-letter prefix to word, for abbreviated words
+    * one-letter-deletion variants to words, for typo correction
     """
 
     def __init__(self) -> None:
@@ -54,6 +63,10 @@ class WordLists:
         self._bits_per_word = dict(zip(self.languages, zeros))
         self._language_length = dict(zip(self.languages, zeros))
 
+        self._index: Dict[str, Dict[str, int]] = {}
+        self._prefix_index: Dict[str, Dict[str, str]] = {}
+        self._deletes_index: Dict[str, Dict[str, List[str]]] = {}
+
     def load_lang(self, lang: str, filename: str = None) -> None:
         """Load/add a language word-list if not loaded/added yet.
 
@@ -83,7 +96,34 @@ class WordLists:
 
             self._language_length[lang] = nwords
             # clean up and normalization are missing, but removal of \n
-            self._wordlist[lang] = [line[:-1] for line in lines]
+            wordlist = [line[:-1] for line in lines]
+            self._wordlist[lang] = wordlist
+            self._build_indexes(lang, wordlist)
+
+    def _build_indexes(self, lang: str, wordlist: WordList) -> None:
+
+        self._index[lang] = {word: i for i, word in enumerate(wordlist)}
+
+        # ambiguous prefixes (if any) are not indexed
+        prefix_index: Dict[str, str] = {}
+        ambiguous = set()
+        for word in wordlist:
+            prefix = word[:_PREFIX_LENGTH]
+            if prefix in prefix_index:
+                ambiguous.add(prefix)
+            prefix_index[prefix] = word
+        for prefix in ambiguous:
+            del prefix_index[prefix]
+        self._prefix_index[lang] = prefix_index
+
+        # symmetric delete index: two words are within edit distance one
+        # (substitution, insertion, deletion, or transposition)
+        # only if they share a one-letter-deletion variant (or the word itself)
+        deletes_index: Dict[str, List[str]] = {}
+        for word in wordlist:
+            for variant in _deletes(word):
+                deletes_index.setdefault(variant, []).append(word)
+        self._deletes_index[lang] = deletes_index
 
     def wordlist(self, lang: str) -> WordList:
         """Return the language word-list."""
@@ -97,6 +137,81 @@ class WordLists:
         self.load_lang(lang)
         return self._language_length[lang]
 
+    def index(self, word: str, lang: str) -> int:
+        """Return the index of the word in the language word-list."""
+
+        self.load_lang(lang)
+        try:
+            return self._index[lang][word]
+        except KeyError:
+            raise ValueError(f"'{word}' is not in the '{lang}' word-list")
+
+    def word_from_prefix(self, prefix: str, lang: str) -> str:
+        """Return the word-list word uniquely identified by the prefix.
+
+        The prefix can be the word itself or an abbreviation
+        including at least its first four letters.
+        """
+
+        self.load_lang(lang)
+        if prefix in self._index[lang]:
+            return prefix
+        word = self._prefix_index[lang].get(prefix[:_PREFIX_LENGTH], "")
+        if len(prefix) < _PREFIX_LENGTH or not word.startswith(prefix):
+            raise ValueError(f"'{prefix}' is not a '{lang}' word-list prefix")
+        return word
+
+    def nearest_words(self, word: str, lang: str) -> WordList:
+        """Return the word-list words at edit distance zero or one.
+
+        Edit distance is the Damerau-Levenshtein one:
+        a letter substitution, insertion, deletion,
+        or transposition of two adjacent letters.
+
+        If the word is included in the word-list,
+        then it is the only returned word;
+        otherwise, candidates are returned in word-list order.
+        """
+
+        self.load_lang(lang)
+        if word in self._index[lang]:
+            return [word]
+        deletes_index = self._deletes_index[lang]
+        candidates = set()
+        for variant in _deletes(word):
+            candidates.update(deletes_index.get(variant, []))
+        nearest = [w for w in candidates if _edit_distance_one(word, w)]
+        return sorted(nearest, key=self._index[lang].__getitem__)
+
+
+def _deletes(word: str) -> List[str]:
+    "Return the word itself and all its one-letter-deletion variants."
+
+    return [word] + [word[:i] + word[i + 1 :] for i in range(len(word))]
+
+
+def _edit_distance_one(a: str, b: str) -> bool:
+    "Return True if the two words are at Damerau-Levenshtein distance one."
+
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) - len(b) > 1:
+        return False
+    # first mismatching position
+    i = 0
+    while i < len(b) and a[i] == b[i]:
+        i += 1
+    if len(a) > len(b):
+        # deletion
+        return a[i + 1 :] == b[i:]
+    if i == len(a):
+        # same word
+        return False
+    # substitution or transposition
+    if a[i + 1 :] == b[i + 1 :]:
+        return True
+    return a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2 :] == b[i + 2 :]
+
 
 # singleton
 _wordlists = WordLists()
@@ -127,5 +242,4 @@ def _indexes_from_mnemonic(mnemonic: Mnemonic, lang: str) -> List[int]:
     """
 
     words = mnemonic.split()
-    wordlist = _wordlists.wordlist(lang)
-    return [wordlist.index(w) for w in words]
+    return [_wordlists.index(w, lang) for w in words]
@@ -22,7 +22,7 @@ from . import script, varint
 from .alias import Token
 from .scriptpubkey import payload_from_scriptPubKey
 from .tx import Tx
-from .tx_in import witness_deserialize, witness_serialize
+from .tx_in import witness_deserialize, witness_serialize_into
 from .tx_out import TxOut
 from .utils import hash160, sha256
 
@@ -151,15 +151,25 @@ class PsbtIn:
         return out
 
     def serialize(self) -> bytes:
-        out = b""
+        out = bytearray()
+        self.serialize_into(out)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
         if self.non_witness_utxo:
             out += b"\x01\x00"
-            utxo = self.non_witness_utxo.serialize()
-            out += varint.encode(len(utxo)) + utxo
+            # the length prefix is the one of the actual serialization
+            utxo = bytearray()
+            self.non_witness_utxo.serialize_into(utxo)
+            out += varint.encode(len(utxo))
+            out += utxo
         if self.witness_utxo:
             out += b"\x01\x01"
-            utxo = self.witness_utxo.serialize()
-            out += varint.encode(len(utxo)) + utxo
+            utxo = bytearray()
+            self.witness_utxo.serialize_into(utxo)
+            out += varint.encode(len(utxo))
+            out += utxo
         if self.partial_sigs:
             for key, value in self.partial_sigs.items():
                 out += b"\x22\x02" + bytes.fromhex(key)
@@ -184,8 +194,10 @@ class PsbtIn:
             out += script.serialize(self.final_script_sig)
         if self.final_script_witness:
             out += b"\x01\x08"
-            wit = witness_serialize(self.final_script_witness)
-            out += varint.encode(len(wit)) + wit
+            wit = bytearray()
+            witness_serialize_into(self.final_script_witness, wit)
+            out += varint.encode(len(wit))
+            out += wit
         if self.por_commitment:  # TODO
             out += b"\x01\x09"
             c = bytes.fromhex(self.por_commitment)
@@ -200,7 +212,6 @@ class PsbtIn:
             for key, value in self.unknown.items():
                 out += varint.encode(len(key) // 2) + bytes.fromhex(key)
                 out += varint.encode(len(value) // 2) + bytes.fromhex(value)
-        return out
 
     def assert_valid(self) -> None:
         pass
@@ -261,7 +272,12 @@ class PsbtOut:
         return out
 
     def serialize(self) -> bytes:
-        out = b""
+        out = bytearray()
+        self.serialize_into(out)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
         if self.redeem_script:
             out += b"\x01\x00"
             out += script.serialize(self.redeem_script)
@@ -284,7 +300,6 @@ class PsbtOut:
             for key, value in self.unknown.items():
                 out += varint.encode(len(key) // 2) + bytes.fromhex(key)
                 out += varint.encode(len(value) // 2) + bytes.fromhex(value)
-        return out
 
     def assert_valid(self) -> None:
         pass
@@ -368,10 +383,19 @@ class Psbt:
         return psbt
 
     def serialize(self) -> str:
-        out = bytes.fromhex("70736274ff")
+        out = bytearray()
+        self.serialize_into(out)
+        return b64encode(out).decode()
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the binary serialization to the buffer."
+        out += bytes.fromhex("70736274ff")
         out += b"\x01\x00"
-        tx = self.tx.serialize()
-        out += varint.encode(len(tx)) + tx
+        # the length prefix is the one of the actual serialization
+        tx = bytearray()
+        self.tx.serialize_into(tx)
+        out += varint.encode(len(tx))
+        out += tx
         if self.hd_keypaths:
             for xpub, hd_keypath in self.hd_keypaths.items():
                 out += b"\x4f\x01" + bytes.fromhex(xpub)
@@ -393,10 +417,11 @@ class Psbt:
                 out += varint.encode(len(value) // 2) + bytes.fromhex(value)
         out += b"\x00"
         for input_map in self.inputs:
-            out += input_map.serialize() + b"\x00"
+            input_map.serialize_into(out)
+            out += b"\x00"
         for output_map in self.outputs:
-            out += output_map.serialize() + b"\x00"
-        return b64encode(out).decode()
+            output_map.serialize_into(out)
+            out += b"\x00"
 
     def assert_valid(self) -> None:
         for vin in self.tx.vin:
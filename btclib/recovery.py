@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""BIP39 mnemonic recovery functions.
+
+Missing (or uncertain) mnemonic words and mistyped passphrases
+are recovered by brute force search over the candidate space.
+
+Each word of the mnemonic has its own list of candidate words:
+word combinations are enumerated in lexicographic order
+(i.e. the last word is the fastest changing) and pruned with
+the cheap BIP39 checksum verification, which discards
+15 out of 16 combinations for 12-word mnemonics.
+Only surviving mnemonics are stretched with PBKDF2 (for all
+passphrase candidates) and the resulting BIP32 keys are
+compared against the target: either the master key fingerprint
+or an address derived from the master key.
+
+The expensive part of the search is distributed across
+multiple processes; the search can be checkpointed
+and resumed later from the last checkpoint.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Deque, Iterator, List, Optional, Sequence, Tuple
+
+from . import bip32, bip39
+from .alias import Octets, Path, String
+from .curve import mult
+from .entropy import _intbits_from_indexes
+from .mnemonic import Mnemonic, _wordlists
+from .scriptpubkey import p2wpkh, payload_from_scriptPubKey
+from .scriptpubkey_address import scriptPubKey_from_address
+from .secpoint import bytes_from_point
+from .utils import bytes_from_octets, hash160
+
+# (script type, payload, derivation path), with script type being
+# "fingerprint" for a master key fingerprint target
+_Target = Tuple[str, bytes, Path]
+
+# (mnemonic, passphrase)
+Recovered = Tuple[Mnemonic, str]
+
+_BIP_PURPOSES = {"p2pkh": 44, "p2sh": 49, "p2wpkh": 84}
+
+
+def candidates_from_mnemonic(
+    mnemonic: Mnemonic,
+    lang: str = "en",
+    wildcard: str = "?",
+    max_distance: Optional[int] = None,
+) -> List[List[str]]:
+    """Return the lists of candidate words for an incomplete mnemonic.
+
+    Words (possibly abbreviated to their first four letters)
+    included in the language word-list are assumed to be correct.
+    Any other word, as the wildcard word,
+    could actually be any word of the word-list.
+
+    If max_distance is 1, any other word is assumed to be mistyped instead:
+    its candidates are the word-list words at edit distance one, if any,
+    otherwise the whole word-list.
+    This narrowing shrinks the search space, but misses the actual word
+    if the unknown word is not a typo of it.
+    """
+
+    if max_distance not in (None, 1):
+        raise ValueError(f"unsupported max_distance: {max_distance}")
+    wordlist = _wordlists.wordlist(lang)
+    candidates: List[List[str]] = []
+    for word in mnemonic.split():
+        if word == wildcard:
+            candidates.append(wordlist)
+            continue
+        try:
+            candidates.append([_wordlists.word_from_prefix(word, lang)])
+        except ValueError:
+            nearest = _wordlists.nearest_words(word, lang) if max_distance else []
+            candidates.append(nearest or wordlist)
+    return candidates
+
+
+def _target(
+    fingerprint: Optional[Octets], address: Optional[String], der_path: Optional[Path]
+) -> _Target:
+
+    if (fingerprint is None) == (address is None):
+        raise ValueError("either fingerprint or address must be provided")
+
+    if fingerprint is not None:
+        return "fingerprint", bytes_from_octets(fingerprint, 4), "m"
+
+    assert address is not None
+    scriptPubKey, network = scriptPubKey_from_address(address)
+    script_type, payload, _ = payload_from_scriptPubKey(scriptPubKey)
+    if script_type not in _BIP_PURPOSES:
+        raise ValueError(f"unmanaged address type: {script_type}")
+    assert isinstance(payload, bytes)
+    if der_path is None:
+        purpose = _BIP_PURPOSES[script_type]
+        coin_type = 0 if network == "mainnet" else 1
+        der_path = f"m/{purpose}h/{coin_type}h/0h/0/0"
+    return script_type, payload, der_path
+
+
+def _is_target(mnemonic: Mnemonic, passphrase: str, target: _Target) -> bool:
+
+    script_type, payload, der_path = target
+    seed = bip39.seed_from_mnemonic(mnemonic, passphrase, verify_checksum=False)
+    d = bip32.deserialize(bip32.rootxprv_from_seed(seed))
+    d = bip32._derive(d, der_path)
+    q = int.from_bytes(d["key"][1:], byteorder="big")
+    pubkey = bytes_from_point(mult(q))
+    if script_type == "p2sh":
+        # BIP49 p2wpkh nested in p2sh
+        return hash160(p2wpkh(pubkey)) == payload
+    # fingerprint, p2pkh, and p2wpkh
+    return hash160(pubkey)[: len(payload)] == payload
+
+
+def _combinations(sizes: Sequence[int], start: int, stop: int) -> Iterator[List[int]]:
+    "Yield the mixed-radix digits of all integers in [start, stop)."
+
+    # most significant digit first
+    digits: List[int] = []
+    i = start
+    for size in reversed(sizes):
+        i, digit = divmod(i, size)
+        digits.append(digit)
+    digits.reverse()
+
+    for _ in range(start, stop):
+        yield digits
+        for pos in reversed(range(len(sizes))):
+            digits[pos] += 1
+            if digits[pos] < sizes[pos]:
+                break
+            digits[pos] = 0
+
+
+def _recover_batch(
+    candidates: Sequence[Sequence[str]],
+    indexes: Sequence[Sequence[int]],
+    base: int,
+    passphrases: Sequence[str],
+    target: _Target,
+    start: int,
+    stop: int,
+) -> Optional[Recovered]:
+
+    sizes = [len(c) for c in candidates]
+    bits_per_word = base.bit_length() - 1
+    cs_bits = len(candidates) * bits_per_word
+    ent_bits = cs_bits * 32 // 33
+    checksum_mask = (1 << (cs_bits - ent_bits)) - 1
+    for digits in _combinations(sizes, start, stop):
+        word_indexes = [indexes[pos][d] for pos, d in enumerate(digits)]
+        int_cs_entropy, _ = _intbits_from_indexes(word_indexes, base)
+        # cheap checksum prefilter
+        intbits = int_cs_entropy >> (cs_bits - ent_bits), ent_bits
+        checksum, _ = bip39._intbits_checksum(intbits)
+        if int_cs_entropy & checksum_mask != checksum:
+            continue
+        words = [candidates[pos][d] for pos, d in enumerate(digits)]
+        mnemonic = " ".join(words)
+        for passphrase in passphrases:
+            if _is_target(mnemonic, passphrase, target):
+                return mnemonic, passphrase
+    return None
+
+
+def recover(
+    candidates: Sequence[Sequence[str]],
+    passphrases: Sequence[str] = ("",),
+    fingerprint: Optional[Octets] = None,
+    address: Optional[String] = None,
+    der_path: Optional[Path] = None,
+    lang: str = "en",
+    start: int = 0,
+    checkpoint: Optional[Callable[[int], None]] = None,
+    batch_size: int = 4096,
+    max_workers: Optional[int] = None,
+    processes: bool = True,
+) -> Optional[Recovered]:
+    """Return the (mnemonic, passphrase) matching the target, if any.
+
+    The target is either the BIP32 master key fingerprint
+    or an address derived from the master key;
+    in the latter case, if the derivation path is not provided,
+    the first receive address of the first account is assumed
+    according to BIP44 (p2pkh), BIP49 (p2sh), or BIP84 (p2wpkh).
+
+    Word combinations are enumerated in batches of batch_size and
+    the search starts from the start-th combination.
+    After each completed batch, the checkpoint callback (if any)
+    is called with the number of combinations fully searched so far:
+    that number can be used later as start value to resume the search.
+    """
+
+    target = _target(fingerprint, address, der_path)
+
+    nwords = len(candidates)
+    if nwords not in bip39._words:
+        msg = f"Wrong number of words: ({nwords}); expected: {bip39._words}"
+        raise ValueError(msg)
+    base = _wordlists.language_length(lang)
+    indexes = [[_wordlists.index(w, lang) for w in c] for c in candidates]
+    candidates = [list(c) for c in candidates]
+    passphrases = list(passphrases)
+
+    total = 1
+    for c in candidates:
+        total *= len(c)
+
+    workers = max_workers or os.cpu_count() or 1
+    executor: Executor
+    if processes:
+        executor = ProcessPoolExecutor(workers)
+    else:
+        executor = ThreadPoolExecutor(workers)
+    with executor:
+        pending: Deque = deque()
+        batches = iter(range(start, total, batch_size))
+        while True:
+            # keep the workers busy
+            for i in batches:
+                stop = min(i + batch_size, total)
+                args = (candidates, indexes, base, passphrases, target, i, stop)
+                pending.append((stop, executor.submit(_recover_batch, *args)))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                return None
+            # results are processed in order
+            stop, future = pending.popleft()
+            result = future.result()
+            if result is not None:
+                for _, f in pending:
+                    f.cancel()
+                return result
+            if checkpoint is not None:
+                checkpoint(stop)
@@ -17,6 +17,12 @@ Scripts are represented by List[Token], where Token = Union[int, str, bytes]:
 * int [-1, 16] are shorcuts for 'OP_1NEGATE', 'OP_0' - 'OP_16'
 * str are for opcodes (e.g. 'OP_HASH160') or hexstring data
 * bytes are for data (but integers are often casted to int)
+
+Decoding returns data as uppercase hexstrings by default;
+raw_data decoding returns data as bytes instead,
+avoiding the hex conversion round-trip when the tokens
+are going to be processed (or encoded again) as bytes.
+Opcodes are always returned as their (interned) name strings.
 """
 
 from typing import List
@@ -292,20 +298,25 @@ def _op_int(token: int) -> bytes:
         return _op_pushdata(data)
 
 
+def _data_from_str(token: str) -> bytes:
+    "Return the data pushed by a (stripped and uppercase) hex-string token."
+
+    try:
+        return bytes.fromhex(token)
+    except Exception:
+        raise ValueError(f"invalid string token: {token}")
+
+
 def _op_str(token: str) -> bytes:
     token = token.strip()
     token = token.upper()
     if token in OP_CODES:
         return OP_CODES[token]
-    try:
-        data = bytes.fromhex(token)
-    except Exception:
-        raise ValueError(f"invalid string token: {token}")
-    return _op_pushdata(data)
+    return _op_pushdata(_data_from_str(token))
 
 
 def encode(script: List[Token]) -> bytes:
-    r = b""
+    r = bytearray()
     for token in script:
         if isinstance(token, int):
             r += _op_int(token)
@@ -315,51 +326,87 @@ def encode(script: List[Token]) -> bytes:
             r += _op_pushdata(token)
         else:
             raise ValueError(f"Unmanaged {type(token)} token type")
-    return r
+    return bytes(r)
+
+
+def _pushdata_size(length: int) -> int:
+    "Return the size of the canonical push of length bytes (see _op_pushdata)."
 
+    if length < 76:
+        return 1 + length
+    if length < 256:
+        return 2 + length
+    if length < 521:
+        return 3 + length
+    raise ValueError(f"Too many bytes for OP_PUSHDATA: {length}")
 
-def decode(stream: BinaryData) -> List[Token]:
 
-    s = bytesio_from_binarydata(stream)
+def encoded_size(script: List[Token]) -> int:
+    "Return the length of the encoded script, computed without encoding it."
+
+    size = 0
+    for token in script:
+        if isinstance(token, int):
+            if -1 <= token <= 16:
+                size += 1
+            else:
+                # see _op_int: bit length plus a sign bit
+                size += _pushdata_size((token.bit_length() + 8) // 8)
+        elif isinstance(token, str):
+            token = token.strip().upper()
+            if token in OP_CODES:
+                size += 1
+            else:
+                # as in _op_str, e.g. hex-strings with internal spaces
+                size += _pushdata_size(len(_data_from_str(token)))
+        elif isinstance(token, bytes):
+            size += _pushdata_size(len(token))
+        else:
+            raise ValueError(f"Unmanaged {type(token)} token type")
+    return size
+
+
+def decode(stream: BinaryData, raw_data: bool = False) -> List[Token]:
+    """Return the tokens of the encoded script.
+
+    Data is returned as uppercase hexstrings or,
+    if raw_data is True, as bytes.
+    """
+
+    if isinstance(stream, bytes):
+        s = stream
+    else:
+        s = bytesio_from_binarydata(stream).read()
+    length = len(s)
     # initialize the result list
     r: List[Token] = []
-    while True:
-        # get one byte
-        t = s.read(1)
-        if not t:
-            break
-        # convert it to an integer
-        i = t[0]
+    pos = 0
+    while pos < length:
+        i = s[pos]
+        pos += 1
         if i == 0:
             # numeric value 0 (OP_0)
-            # r.append(OP_CODE_NAMES[i])
             r.append(i)
         elif i == 79:
             # numeric value -1 (OP_1NEGATE)
             r.append(-1)
         elif i > 80 and i < 97:
             # numeric values 1-16 (OP_1-OP_16)
-            # r.append(OP_CODE_NAMES[i])
             r.append(i - 80)
-        elif i < 76:
-            # 1-byte-data-length | data
-            data = s.read(i)
-            r.append(data.hex().upper())
-        elif i == 76:
-            # OP_PUSHDATA1 | 1-byte-data-length | data
-            data_length = int.from_bytes(s.read(1), byteorder="little")
-            data = s.read(data_length)
-            r.append(data.hex().upper())
-        elif i == 77:
-            # OP_PUSHDATA2 | 2-byte-data-length | data
-            data_length = int.from_bytes(s.read(2), byteorder="little")
-            data = s.read(data_length)
-            r.append(data.hex().upper())
-        elif i == 78:
-            # OP_PUSHDATA4 | 4-byte-data-length | data
-            data_length = int.from_bytes(s.read(4), byteorder="little")
-            data = s.read(data_length)
-            r.append(data.hex().upper())
+        elif i < 79:
+            if i < 76:
+                # 1-byte-data-length | data
+                data_length = i
+            else:
+                # OP_PUSHDATA1 | 1-byte-data-length | data
+                # OP_PUSHDATA2 | 2-byte-data-length | data
+                # OP_PUSHDATA4 | 4-byte-data-length | data
+                size = 1 << (i - 76)
+                data_length = int.from_bytes(s[pos : pos + size], byteorder="little")
+                pos += size
+            data = s[pos : pos + data_length]
+            pos += data_length
+            r.append(data if raw_data else data.hex().upper())
         else:
             # OP_CODE
             r.append(OP_CODE_NAMES[i])
@@ -374,10 +421,10 @@ def serialize(script: List[Token]) -> bytes:
     return varint.encode(length) + r
 
 
-def deserialize(stream: BinaryData) -> List[Token]:
+def deserialize(stream: BinaryData, raw_data: bool = False) -> List[Token]:
 
     stream = bytesio_from_binarydata(stream)
 
     length = varint.decode(stream)
     script = stream.read(length)
-    return decode(script)
+    return decode(script, raw_data)
@@ -8,17 +8,16 @@
 # No part of btclib including this file, may be copied, modified, propagated,
 # or distributed except according to the terms contained in the LICENSE file.
 
-"""ScriptPubKey functions.
+"""ScriptPubKey functions."""
 
-"""
-
-from typing import List, Optional, Tuple, Union
+from typing import Iterable, List, Optional, Tuple, Union
 
 from .alias import Key, Octets, Script, String, Token
 from .hashes import hash160_from_key, hash160_from_script, hash256_from_script
 from .script import decode, encode
 from .to_pubkey import pubkeyinfo_from_key
 from .utils import bytes_from_octets
+from .varint import Buffer
 
 # 1. Hash/WitnessProgram from pubkey/scriptPubKey
 
@@ -116,6 +115,91 @@ def scriptPubKey_from_payload(
 
 Payloads = Union[bytes, List[bytes]]
 
+# fixed-length templates
+# length: (prefix, suffix, script type, payload start, payload end)
+_TEMPLATES = {
+    # p2pkh [OP_DUP, OP_HASH160, pubkey_hash, OP_EQUALVERIFY, OP_CHECKSIG]
+    25: (b"\x76\xa9\x14", b"\x88\xac", "p2pkh", 3, 23),
+    # p2sh [OP_HASH160, script_hash, OP_EQUAL]
+    23: (b"\xa9\x14", b"\x87", "p2sh", 2, 22),
+    # p2wpkh [0, pubkey_hash]
+    22: (b"\x00\x14", b"", "p2wpkh", 2, 22),
+    # p2wsh [0, script_hash]
+    34: (b"\x00\x20", b"", "p2wsh", 2, 34),
+    # p2pk [compressed pubkey, OP_CHECKSIG]
+    35: (b"\x21", b"\xac", "p2pk", 1, 34),
+    # p2pk [uncompressed pubkey, OP_CHECKSIG]
+    67: (b"\x41", b"\xac", "p2pk", 1, 66),
+}
+
+
+def _is_pms(s: memoryview) -> bool:
+    "Return True if the script is a [m, pubkeys, n, OP_CHECKMULTISIG]."
+
+    length = len(s)
+    if length < 37 or s[-1] != 0xAE:
+        return False
+    m, n = s[0] - 0x50, s[-2] - 0x50
+    if not 1 <= m <= n <= 16:
+        return False
+    pos = 1
+    for _ in range(n):
+        if pos >= length - 2 or s[pos] not in (0x21, 0x41):
+            return False
+        pos += 1 + s[pos]
+    return pos == length - 2
+
+
+def classify(scriptPubKey: Buffer) -> Tuple[str, memoryview]:
+    """Return (scriptPubKey type, payload view) of the serialized scriptPubKey.
+
+    The standard templates are recognized by length and fixed-byte checks,
+    without decoding the script; the payload is a zero-copy view
+    over the input buffer: the public key for p2pk,
+    the concatenated public key pushes for p2ms, the pushed data
+    for nulldata, the hash for the other types.
+    Unrecognized scripts are of 'unknown' type,
+    with the whole script as payload.
+    """
+
+    s = memoryview(scriptPubKey)
+    length = len(s)
+    template = _TEMPLATES.get(length)
+    if template is not None:
+        prefix, suffix, script_type, start, end = template
+        if s[: len(prefix)] == prefix and s[end:] == suffix:
+            return script_type, s[start:end]
+    if length == 0:
+        return "unknown", s
+    # nulldata [OP_RETURN, data]
+    if s[0] == 0x6A and 1 < length <= 83:
+        if length < 78 and s[1] == length - 2:
+            return "nulldata", s[2:]
+        if length > 78 and s[1] == 0x4C and s[2] == length - 3:
+            return "nulldata", s[3:]
+    elif _is_pms(s):
+        return "p2ms", s[1:-2]
+    return "unknown", s
+
+
+def classify_many(scriptPubKeys: Iterable[Buffer]) -> List[Tuple[str, memoryview]]:
+    "Return the (scriptPubKey type, payload view) of the scriptPubKeys."
+
+    templates = _TEMPLATES
+    results: List[Tuple[str, memoryview]] = []
+    append = results.append
+    for scriptPubKey in scriptPubKeys:
+        s = memoryview(scriptPubKey)
+        # inlined fast path for the fixed-length templates
+        template = templates.get(len(s))
+        if template is not None:
+            prefix, suffix, script_type, start, end = template
+            if s[: len(prefix)] == prefix and s[end:] == suffix:
+                append((script_type, s[start:end]))
+                continue
+        append(classify(s))
+    return results
+
 
 def payload_from_nulldata_scriptPubKey(
     scriptPubKey: Script,
@@ -158,20 +242,20 @@ def payload_from_pms_scriptPubKey(scriptPubKey: Script) -> Tuple[str, Payloads,
         else bytes_from_octets(scriptPubKey)
     )
     # p2ms [m, pubkeys, n, OP_CHECKMULTISIG]
-    scriptPubKey = decode(scriptPubKey)
-    m = int(scriptPubKey[0])
-    if m < 1 or m > 16:
-        raise ValueError(f"invalid m in m-of-n multisignature: {m}")
-    n = len(scriptPubKey) - 3
+    tokens = decode(scriptPubKey, raw_data=True)
+    m = tokens[0]
+    if not isinstance(m, int) or m < 1 or m > 16:
+        raise ValueError(f"invalid m in m-of-n multisignature: {m!r}")
+    n = len(tokens) - 3
     if n < m or n > 16:
         raise ValueError(f"invalid number of pubkeys in {m}-of-n multisignature: {n}")
-    if n != int(scriptPubKey[-2]):
+    if n != tokens[-2]:
         err_msg = "wrong number of pubkeys "
-        err_msg += f"in {m}-of-{int(scriptPubKey[-2])} multisignature: {n}"
+        err_msg += f"in {m}-of-{tokens[-2]!r} multisignature: {n}"
         raise ValueError(err_msg)
     keys: List[bytes] = []
-    for pk in scriptPubKey[1:-2]:
-        if isinstance(pk, int):
+    for pk in tokens[1:-2]:
+        if not isinstance(pk, bytes):
             raise ValueError("invalid key in p2ms")
         key = bytes_from_octets(pk, (33, 65))
         keys.append(key)
@@ -186,42 +270,21 @@ def payload_from_scriptPubKey(scriptPubKey: Script) -> Tuple[str, Payloads, int]
         if isinstance(scriptPubKey, list)
         else bytes_from_octets(scriptPubKey)
     )
-    length = len(scriptPubKey)
 
-    # p2pk [pubkey, OP_CHECKSIG]
-    # 0x41{65-byte pubkey}AC or 0x21{33-byte pubkey}AC
-    if (
-        length == scriptPubKey[0] + 2
-        and scriptPubKey[0] in (0x41, 0x21)
-        and scriptPubKey[-1] == 0xAC
-    ):
-        return "p2pk", scriptPubKey[1:-1], 0
+    # fast path for the fixed-length templates
+    template = _TEMPLATES.get(len(scriptPubKey))
+    if template is not None:
+        prefix, suffix, script_type, start, end = template
+        if scriptPubKey.startswith(prefix) and scriptPubKey[end:] == suffix:
+            return script_type, scriptPubKey[start:end], 0
+
+    # p2pk, p2pkh, p2sh, p2wpkh, and p2wsh are fixed-length templates
     # p2ms [m, pubkeys, n, OP_CHECKMULTISIG]
-    elif scriptPubKey[-1] == 0xAE:
+    if scriptPubKey[-1] == 0xAE:
         return payload_from_pms_scriptPubKey(scriptPubKey)
     # nulldata [OP_RETURN, data]
-    elif length <= 83 and scriptPubKey[0] == 0x6A:
+    elif len(scriptPubKey) <= 83 and scriptPubKey[0] == 0x6A:
         return payload_from_nulldata_scriptPubKey(scriptPubKey)
-    # p2pkh [OP_DUP, OP_HASH160, pubkey_hash, OP_EQUALVERIFY, OP_CHECKSIG]
-    # 0x76A914{20-byte pubkey_hash}88AC
-    elif (
-        length == 25
-        and scriptPubKey[:3] == b"\x76\xa9\x14"
-        and scriptPubKey[-2:] == b"\x88\xac"
-    ):
-        return "p2pkh", scriptPubKey[3 : length - 2], 0
-    # p2sh [OP_HASH160, script_hash, OP_EQUAL]
-    # 0xA914{20-byte script_hash}87
-    elif length == 23 and scriptPubKey[:2] == b"\xa9\x14" and scriptPubKey[-1] == 0x87:
-        return "p2sh", scriptPubKey[2 : length - 1], 0
-    # p2wpkh [0, pubkey_hash]
-    # 0x0014{20-byte pubkey_hash}
-    elif length == 22 and scriptPubKey[:2] == b"\x00\x14":
-        return "p2wpkh", scriptPubKey[2:], 0
-    # p2wsh [0, script_hash]
-    # 0x0020{32-byte script_hash}
-    elif length == 34 and scriptPubKey[:2] == b"\x00\x20":
-        return "p2wsh", scriptPubKey[2:], 0
     # Unknow scriptPubKey
     else:
         raise ValueError(
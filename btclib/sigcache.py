@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Cache of valid signatures.
+
+The same signatures are verified again and again,
+e.g. first when a transaction is relayed and then when it is mined,
+or across PSBT round-trips.
+As in Bitcoin Core, only successful verifications are cached:
+the entry is a salted hash of the signature scheme,
+curve, hash function, message digest, public key, and signature.
+The random salt makes entries unpredictable to third parties.
+
+The cache is bounded, with least recently used eviction,
+and can be shared among threads.
+It is opt-in: pass it to the dsa and ssa verify functions.
+"""
+
+import secrets
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Optional, Tuple
+
+from .alias import HashF, Point
+from .curve import Curve
+
+
+class SignatureCache:
+    "Bounded, thread-safe cache of valid signatures."
+
+    def __init__(self, max_entries: int = 2 ** 16, salt: Optional[bytes] = None):
+        if max_entries < 1:
+            raise ValueError(f"invalid max_entries: {max_entries}")
+        self.max_entries = max_entries
+        salt = secrets.token_bytes(32) if salt is None else salt
+        # salted midstate
+        self._hasher = sha256(salt)
+        self._entries: "OrderedDict[bytes, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def entry(
+        self,
+        scheme: str,
+        m: bytes,
+        Q: Point,
+        sig: Tuple[int, int],
+        ec: Curve,
+        hf: HashF,
+    ) -> bytes:
+        "Return the cache entry for the signature verification."
+
+        h = self._hasher.copy()
+        h.update(f"{scheme}/{hf().name}/".encode())
+        psize = ec.psize
+        h.update(ec.p.to_bytes(psize, "big"))
+        h.update(ec.G[0].to_bytes(psize, "big"))
+        h.update(len(m).to_bytes(4, "big"))
+        h.update(m)
+        h.update(Q[0].to_bytes(psize, "big"))
+        h.update(Q[1].to_bytes(psize, "big"))
+        h.update(sig[0].to_bytes(psize, "big"))
+        h.update(sig[1].to_bytes(ec.nsize, "big"))
+        return h.digest()
+
+    def __contains__(self, entry: bytes) -> bool:
+        with self._lock:
+            if entry in self._entries:
+                self._entries.move_to_end(entry)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, entry: bytes) -> None:
+        with self._lock:
+            self._entries[entry] = None
+            self._entries.move_to_end(entry)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -8,69 +8,524 @@
 # No part of btclib including this file, may be copied, modified, propagated,
 # or distributed except according to the terms contained in the LICENSE file.
 
-from typing import List, Union
+"""Transaction signature hashes.
+
+The transaction-wide parts of the signature hash preimages
+(e.g. the BIP143 hashPrevouts, hashSequence, and hashOutputs)
+do not depend on the input being signed:
+a SighashCache bound to a transaction computes them once
+and reuses them for all inputs and hash types,
+as in Bitcoin Core PrecomputedTransactionData.
+
+Legacy signature hashes are quadratic by design, as each input
+commits to (almost) the whole transaction: the serialized
+unchanged parts of the transaction are cached and fed
+to the hash function as buffer slices, without serializing
+the transaction again for each input.
+
+Taproot (BIP341/342) signature hashes commit to single-SHA256 hashes
+of the transaction-wide data, including amounts and scriptPubKeys
+of all the spent outputs: these are computed once per transaction too,
+while the TapSighash tag is hashed once per process
+(the hashlib midstate being copied for each signature hash).
+"""
+
+from hashlib import sha256
+from typing import Any, Dict, List, Optional, Tuple
 
 from . import script, tx, tx_out, varint
 from .alias import Octets, Script, Token
 from .scriptpubkey import payload_from_scriptPubKey
 from .utils import bytes_from_octets, hash256
 
+SIGHASH_DEFAULT = 0
+SIGHASH_ALL = 1
+SIGHASH_NONE = 2
+SIGHASH_SINGLE = 3
+SIGHASH_ANYONECANPAY = 0x80
+
+# the output serialization used for the outputs not committed to
+# by SIGHASH_SINGLE: -1 value and empty script
+_NULL_OUTPUT = b"\xff" * 8 + b"\x00"
+
+OP_CODESEPARATOR = 0xAB
+
+_TAPROOT_HASHTYPES = (0x00, 0x01, 0x02, 0x03, 0x81, 0x82, 0x83)
+
+
+def _tagged_hasher(tag: str) -> Any:
+    "Return the sha256 midstate after the BIP340 tagged hash prefix."
+
+    tag_hash = sha256(tag.encode()).digest()
+    return sha256(tag_hash + tag_hash)
+
+
+_TAPSIGHASH = _tagged_hasher("TapSighash")
+_TAPLEAF = _tagged_hasher("TapLeaf")
+
+
+def tapleaf_hash(leaf_script: Octets, leaf_version: int = 0xC0) -> bytes:
+    "Return the BIP341 TapLeaf hash of a script."
+
+    leaf_script = bytes_from_octets(leaf_script)
+    h = _TAPLEAF.copy()
+    h.update(bytes([leaf_version & 0xFE]))
+    h.update(varint.encode(len(leaf_script)))
+    h.update(leaf_script)
+    return h.digest()
+
+
+def _next_op(script_bytes: bytes, pos: int) -> Tuple[int, int]:
+    """Return (opcode, next position) as in Bitcoin Core GetScriptOp.
+
+    The opcode is -1 at the end of the script or if the push is truncated:
+    in the latter case the position is past the push opcode and length.
+    """
+
+    length = len(script_bytes)
+    if pos >= length:
+        return -1, pos
+    opcode = script_bytes[pos]
+    pos += 1
+    if opcode <= 0x4E:
+        if opcode < 0x4C:
+            size = opcode
+        else:
+            # OP_PUSHDATA1, OP_PUSHDATA2, OP_PUSHDATA4
+            n = 1 << (opcode - 0x4C)
+            if length - pos < n:
+                return -1, pos
+            size = int.from_bytes(script_bytes[pos : pos + n], "little")
+            pos += n
+        if length - pos < size:
+            return -1, pos
+        pos += size
+    return opcode, pos
+
+
+def _find_and_delete(script_bytes: bytes, sub: bytes) -> bytes:
+    "Remove all the occurrences of sub at opcode boundaries, as in Bitcoin Core."
+
+    if not sub:
+        return script_bytes
+    result = bytearray()
+    found = False
+    start = pos = 0
+    while True:
+        result += script_bytes[start:pos]
+        while script_bytes.startswith(sub, pos):
+            pos += len(sub)
+            found = True
+        start = pos
+        opcode, pos = _next_op(script_bytes, pos)
+        if opcode == -1:
+            break
+    # the unparsable tail, if any, is kept
+    result += script_bytes[start:]
+    return bytes(result) if found else script_bytes
+
+
+def _legacy_scriptCode(scriptCode: bytes) -> bytes:
+    """Return the serialized scriptCode without OP_CODESEPARATORs.
+
+    As in Bitcoin Core, the length prefix is computed before dropping
+    the unparsable tail (if any) of the script.
+    """
+
+    out = bytearray()
+    separators = 0
+    start = pos = 0
+    while True:
+        opcode, next_pos = _next_op(scriptCode, pos)
+        if opcode == -1:
+            break
+        if opcode == OP_CODESEPARATOR:
+            separators += 1
+            out += scriptCode[start:pos]
+            start = next_pos
+        pos = next_pos
+    out += scriptCode[start:next_pos]
+    return varint.encode(len(scriptCode) - separators) + out
+
+
+class SighashCache:
+    """Precomputed transaction data for signature hashes.
+
+    Transaction-wide hashes are computed on first use:
+    the transaction must not be modified while the cache is in use.
+    Taproot signature hashes also require the outputs spent
+    by the transaction inputs, in input order.
+    """
+
+    def __init__(
+        self,
+        transaction: tx.Tx,
+        spent_outputs: Optional[List[tx_out.TxOut]] = None,
+    ) -> None:
+        self.tx = transaction
+        if spent_outputs is not None and len(spent_outputs) != len(transaction.vin):
+            m = len(spent_outputs)
+            n = len(transaction.vin)
+            raise ValueError(f"{m} spent outputs for {n} inputs")
+        self.spent_outputs = spent_outputs
+        self._prevouts: Optional[bytes] = None
+        self._sequences: Optional[bytes] = None
+        self._outputs: Optional[bytes] = None
+        self._hashPrevouts: Optional[bytes] = None
+        self._hashSequence: Optional[bytes] = None
+        self._hashOutputs: Optional[bytes] = None
+        # serialized inputs with empty scriptSig, keyed by zeroed nSequence
+        self._blank_inputs: Dict[bool, bytes] = {}
+        self._sha_prevouts: Optional[bytes] = None
+        self._sha_amounts: Optional[bytes] = None
+        self._sha_scriptpubkeys: Optional[bytes] = None
+        self._sha_sequences: Optional[bytes] = None
+        self._sha_outputs: Optional[bytes] = None
+
+    @property
+    def prevouts(self) -> bytes:
+        "Return the concatenated serialized prevouts."
+        if self._prevouts is None:
+            buffer = bytearray()
+            for vin in self.tx.vin:
+                vin.prevout.serialize_into(buffer)
+            self._prevouts = bytes(buffer)
+        return self._prevouts
+
+    @property
+    def sequences(self) -> bytes:
+        "Return the concatenated serialized nSequences."
+        if self._sequences is None:
+            buffer = bytearray()
+            for vin in self.tx.vin:
+                buffer += vin.nSequence.to_bytes(4, "little")
+            self._sequences = bytes(buffer)
+        return self._sequences
+
+    @property
+    def outputs(self) -> bytes:
+        "Return the concatenated serialized outputs."
+        if self._outputs is None:
+            buffer = bytearray()
+            for vout in self.tx.vout:
+                vout.serialize_into(buffer)
+            self._outputs = bytes(buffer)
+        return self._outputs
+
+    @property
+    def hashPrevouts(self) -> bytes:
+        if self._hashPrevouts is None:
+            self._hashPrevouts = hash256(self.prevouts)
+        return self._hashPrevouts
+
+    @property
+    def hashSequence(self) -> bytes:
+        if self._hashSequence is None:
+            self._hashSequence = hash256(self.sequences)
+        return self._hashSequence
+
+    @property
+    def hashOutputs(self) -> bytes:
+        if self._hashOutputs is None:
+            self._hashOutputs = hash256(self.outputs)
+        return self._hashOutputs
+
+    @property
+    def sha_prevouts(self) -> bytes:
+        if self._sha_prevouts is None:
+            self._sha_prevouts = sha256(self.prevouts).digest()
+        return self._sha_prevouts
+
+    @property
+    def sha_sequences(self) -> bytes:
+        if self._sha_sequences is None:
+            self._sha_sequences = sha256(self.sequences).digest()
+        return self._sha_sequences
+
+    @property
+    def sha_outputs(self) -> bytes:
+        if self._sha_outputs is None:
+            self._sha_outputs = sha256(self.outputs).digest()
+        return self._sha_outputs
+
+    def _get_spent_outputs(self) -> List[tx_out.TxOut]:
+        if self.spent_outputs is None:
+            raise ValueError("missing spent outputs")
+        return self.spent_outputs
+
+    def _hash_spent_outputs(self) -> None:
+        amounts = sha256()
+        scriptpubkeys = sha256()
+        for spent_output in self._get_spent_outputs():
+            buffer = bytearray()
+            spent_output.serialize_into(buffer)
+            view = memoryview(buffer)
+            amounts.update(view[:8])
+            scriptpubkeys.update(view[8:])
+        self._sha_amounts = amounts.digest()
+        self._sha_scriptpubkeys = scriptpubkeys.digest()
+
+    @property
+    def sha_amounts(self) -> bytes:
+        if self._sha_amounts is None:
+            self._hash_spent_outputs()
+        assert self._sha_amounts is not None
+        return self._sha_amounts
+
+    @property
+    def sha_scriptpubkeys(self) -> bytes:
+        if self._sha_scriptpubkeys is None:
+            self._hash_spent_outputs()
+        assert self._sha_scriptpubkeys is not None
+        return self._sha_scriptpubkeys
+
+    def _get_blank_inputs(self, zero_sequences: bool) -> bytes:
+        "Return the 41-bytes serialized inputs, with empty scriptSig."
+
+        if zero_sequences not in self._blank_inputs:
+            prevouts = self.prevouts
+            sequences = self.sequences
+            buffer = bytearray()
+            for i in range(len(self.tx.vin)):
+                buffer += prevouts[36 * i : 36 * i + 36]
+                buffer += b"\x00"
+                if zero_sequences:
+                    buffer += b"\x00\x00\x00\x00"
+                else:
+                    buffer += sequences[4 * i : 4 * i + 4]
+            self._blank_inputs[zero_sequences] = bytes(buffer)
+        return self._blank_inputs[zero_sequences]
+
+    def legacy_sighash(
+        self,
+        scriptCode: Octets,
+        input_index: int,
+        hashtype: int,
+        signature: Optional[Octets] = None,
+    ) -> bytes:
+        """Return the legacy (pre-segwit) signature hash.
 
-# workaround to handle CTransactions
-def _get_bytes(a: Union[int, str]) -> bytes:
-    return int.to_bytes(a, 32, "big") if isinstance(a, int) else bytes.fromhex(a)
+        OP_CODESEPARATORs are removed from the scriptCode, i.e. the script
+        following the last executed OP_CODESEPARATOR;
+        if the signature is provided, its push is removed too
+        (FindAndDelete).
+        """
+
+        transaction = self.tx
+        if not 0 <= input_index < len(transaction.vin):
+            raise ValueError(f"invalid input index: {input_index}")
+        anyonecanpay = hashtype & SIGHASH_ANYONECANPAY
+        base_type = hashtype & 0x1F
+        if base_type == SIGHASH_SINGLE and input_index >= len(transaction.vout):
+            # the infamous SIGHASH_SINGLE bug: the hash of 1 is signed
+            return (1).to_bytes(32, "little")
+
+        scriptCode = bytes_from_octets(scriptCode)
+        if signature is not None:
+            sig_push = script._op_pushdata(bytes_from_octets(signature))
+            scriptCode = _find_and_delete(scriptCode, sig_push)
+
+        i = input_index
+        txin = bytearray(self.prevouts[36 * i : 36 * i + 36])
+        txin += _legacy_scriptCode(scriptCode)
+        txin += self.sequences[4 * i : 4 * i + 4]
+
+        h = sha256(transaction.nVersion.to_bytes(4, "little"))
+        if anyonecanpay:
+            h.update(b"\x01")
+            h.update(txin)
+        else:
+            zero_sequences = base_type in (SIGHASH_NONE, SIGHASH_SINGLE)
+            blank_inputs = memoryview(self._get_blank_inputs(zero_sequences))
+            h.update(varint.encode(len(transaction.vin)))
+            h.update(blank_inputs[: 41 * i])
+            h.update(txin)
+            h.update(blank_inputs[41 * (i + 1) :])
+
+        if base_type == SIGHASH_NONE:
+            h.update(b"\x00")
+        elif base_type == SIGHASH_SINGLE:
+            h.update(varint.encode(i + 1))
+            h.update(_NULL_OUTPUT * i)
+            h.update(transaction.vout[i].serialize())
+        else:
+            h.update(varint.encode(len(transaction.vout)))
+            h.update(self.outputs)
+
+        h.update(transaction.nLockTime.to_bytes(4, "little"))
+        h.update(hashtype.to_bytes(4, "little"))
+        return sha256(h.digest()).digest()
+
+    def segwit_v0_sighash(
+        self, scriptCode: Octets, input_index: int, hashtype: int, amount: int
+    ) -> bytes:
+        "Return the BIP143 signature hash."
+
+        transaction = self.tx
+        if not 0 <= input_index < len(transaction.vin):
+            raise ValueError(f"invalid input index: {input_index}")
+        anyonecanpay = hashtype & SIGHASH_ANYONECANPAY
+        base_type = hashtype & 0x1F
+
+        hashPrevouts = b"\x00" * 32 if anyonecanpay else self.hashPrevouts
+
+        if not anyonecanpay and base_type not in (SIGHASH_NONE, SIGHASH_SINGLE):
+            hashSequence = self.hashSequence
+        else:
+            hashSequence = b"\x00" * 32
+
+        if base_type not in (SIGHASH_NONE, SIGHASH_SINGLE):
+            hashOutputs = self.hashOutputs
+        elif base_type == SIGHASH_SINGLE and input_index < len(transaction.vout):
+            hashOutputs = hash256(transaction.vout[input_index].serialize())
+        else:
+            hashOutputs = b"\x00" * 32
+
+        scriptCode = bytes_from_octets(scriptCode)
+        vin = transaction.vin[input_index]
+
+        preimage = bytearray(transaction.nVersion.to_bytes(4, "little"))
+        preimage += hashPrevouts
+        preimage += hashSequence
+        vin.prevout.serialize_into(preimage)
+        preimage += varint.encode(len(scriptCode)) + scriptCode
+        preimage += amount.to_bytes(8, "little")  # value
+        preimage += vin.nSequence.to_bytes(4, "little")
+        preimage += hashOutputs
+        preimage += transaction.nLockTime.to_bytes(4, "little")
+        preimage += hashtype.to_bytes(4, "little")
+
+        return hash256(bytes(preimage))
+
+    def taproot_sighash(
+        self,
+        input_index: int,
+        hashtype: int = SIGHASH_DEFAULT,
+        annex: Optional[Octets] = None,
+        leaf_hash: Optional[Octets] = None,
+        codesep_pos: int = 0xFFFFFFFF,
+    ) -> bytes:
+        """Return the BIP341 signature hash.
+
+        The BIP342 script path signature hash is returned
+        if the TapLeaf hash of the executed script is provided,
+        otherwise the key path one.
+        """
+
+        transaction = self.tx
+        if hashtype not in _TAPROOT_HASHTYPES:
+            raise ValueError(f"invalid taproot hash type: {hex(hashtype)}")
+        if not 0 <= input_index < len(transaction.vin):
+            raise ValueError(f"invalid input index: {input_index}")
+        anyonecanpay = hashtype & SIGHASH_ANYONECANPAY
+        base_type = hashtype & 0x03
+        if base_type == SIGHASH_SINGLE and input_index >= len(transaction.vout):
+            raise ValueError(f"missing SIGHASH_SINGLE output: {input_index}")
+
+        h = _TAPSIGHASH.copy()
+        h.update(b"\x00")  # epoch
+        h.update(bytes([hashtype]))
+        h.update(transaction.nVersion.to_bytes(4, "little"))
+        h.update(transaction.nLockTime.to_bytes(4, "little"))
+        if not anyonecanpay:
+            h.update(self.sha_prevouts)
+            h.update(self.sha_amounts)
+            h.update(self.sha_scriptpubkeys)
+            h.update(self.sha_sequences)
+        if base_type not in (SIGHASH_NONE, SIGHASH_SINGLE):
+            h.update(self.sha_outputs)
+
+        spend_type = (2 if leaf_hash is not None else 0) + (annex is not None)
+        h.update(bytes([spend_type]))
+        if anyonecanpay:
+            i = input_index
+            buffer = bytearray(self.prevouts[36 * i : 36 * i + 36])
+            self._get_spent_outputs()[i].serialize_into(buffer)
+            buffer += self.sequences[4 * i : 4 * i + 4]
+            h.update(buffer)
+        else:
+            h.update(input_index.to_bytes(4, "little"))
+        if annex is not None:
+            annex = bytes_from_octets(annex)
+            h.update(sha256(varint.encode(len(annex)) + annex).digest())
+        if base_type == SIGHASH_SINGLE:
+            h.update(sha256(transaction.vout[input_index].serialize()).digest())
+
+        if leaf_hash is not None:
+            h.update(bytes_from_octets(leaf_hash, 32))
+            h.update(b"\x00")  # key_version
+            h.update(codesep_pos.to_bytes(4, "little"))
+        return h.digest()
+
+
+def _sighash_cache(transaction: tx.Tx, cache: Optional[SighashCache]) -> SighashCache:
+    if cache is None:
+        return SighashCache(transaction)
+    if cache.tx is not transaction:
+        raise ValueError("the sighash cache is bound to another transaction")
+    return cache
 
 
 # https://github.com/bitcoin/bitcoin/blob/4b30c41b4ebf2eb70d8a3cd99cf4d05d405eec81/test/functional/test_framework/script.py#L673
 def segwit_v0_sighash(
-    scriptCode: Octets, transaction: tx.Tx, input_index: int, hashtype: int, amount: int
+    scriptCode: Octets,
+    transaction: tx.Tx,
+    input_index: int,
+    hashtype: int,
+    amount: int,
+    cache: Optional[SighashCache] = None,
 ) -> bytes:
 
-    hashtype_hex: str = hashtype.to_bytes(4, "little").hex()
-    if hashtype_hex[0] != "8":
-        hashPrevouts = b""
-        for vin in transaction.vin:
-            hashPrevouts += _get_bytes(vin.prevout.hash)[::-1]
-            hashPrevouts += vin.prevout.n.to_bytes(4, "little")
-        hashPrevouts = hash256(hashPrevouts)
-    else:
-        hashPrevouts = b"\x00" * 32
+    cache = _sighash_cache(transaction, cache)
+    return cache.segwit_v0_sighash(scriptCode, input_index, hashtype, amount)
 
-    if hashtype_hex[1] == "1" and hashtype_hex[0] != "8":
-        hashSequence = b""
-        for vin in transaction.vin:
-            hashSequence += vin.nSequence.to_bytes(4, "little")
-        hashSequence = hash256(hashSequence)
-    else:
-        hashSequence = b"\x00" * 32
-
-    if hashtype_hex[1] != "2" and hashtype_hex[1] != "3":
-        hashOutputs = b""
-        for vout in transaction.vout:
-            hashOutputs += vout.serialize()
-        hashOutputs = hash256(hashOutputs)
-    elif hashtype_hex[1] == "3" and input_index < len(transaction.vout):
-        hashOutputs = hash256(transaction.vout[input_index].serialize())
-    else:
-        hashOutputs = b"\x00" * 32
 
-    scriptCode = bytes_from_octets(scriptCode)
+def legacy_sighash(
+    scriptCode: Octets,
+    transaction: tx.Tx,
+    input_index: int,
+    hashtype: int,
+    signature: Optional[Octets] = None,
+    cache: Optional[SighashCache] = None,
+) -> bytes:
+
+    cache = _sighash_cache(transaction, cache)
+    return cache.legacy_sighash(scriptCode, input_index, hashtype, signature)
+
+
+def taproot_sighash(
+    transaction: tx.Tx,
+    input_index: int,
+    hashtype: int,
+    spent_outputs: List[tx_out.TxOut],
+    annex: Optional[Octets] = None,
+    leaf_hash: Optional[Octets] = None,
+    codesep_pos: int = 0xFFFFFFFF,
+) -> bytes:
+    """Return the BIP341 signature hash.
+
+    When signing (or verifying) multiple inputs of the same transaction,
+    use the SighashCache.taproot_sighash method instead.
+    """
 
-    outpoint = _get_bytes(transaction.vin[input_index].prevout.hash)[::-1]
-    outpoint += transaction.vin[input_index].prevout.n.to_bytes(4, "little")
+    cache = SighashCache(transaction, spent_outputs)
+    return cache.taproot_sighash(input_index, hashtype, annex, leaf_hash, codesep_pos)
 
-    preimage = transaction.nVersion.to_bytes(4, "little")
-    preimage += hashPrevouts
-    preimage += hashSequence
-    preimage += outpoint
-    preimage += varint.encode(len(scriptCode)) + scriptCode
-    preimage += amount.to_bytes(8, "little")  # value
-    preimage += transaction.vin[input_index].nSequence.to_bytes(4, "little")
-    preimage += hashOutputs
-    preimage += transaction.nLockTime.to_bytes(4, "little")
-    preimage += bytes.fromhex(hashtype_hex)
 
-    return hash256(preimage)
+def _taproot_witness(
+    witness: List[str],
+) -> Tuple[Optional[bytes], Optional[bytes]]:
+    "Return the (annex, TapLeaf hash) of a taproot witness."
+
+    stack = [bytes_from_octets(item) for item in witness]
+    annex = None
+    if len(stack) > 1 and stack[-1][:1] == b"\x50":
+        annex = stack.pop()
+    leaf_hash = None
+    if len(stack) > 1:  # script path spending
+        control_block, leaf_script = stack[-1], stack[-2]
+        leaf_hash = tapleaf_hash(leaf_script, control_block[0])
+    return annex, leaf_hash
 
 
 # FIXME: remove OP_CODESEPARATOR only if executed
@@ -82,6 +537,8 @@ def _get_witness_v0_scriptCodes(scriptPubKey: Script) -> List[str]:
         script_type = "unknown"
     if script_type == "p2wpkh":  # simple p2wpkh
         pubkeyhash = scriptPubKey[1]
+        if isinstance(pubkeyhash, bytes):
+            pubkeyhash = pubkeyhash.hex()
         assert isinstance(pubkeyhash, str)
         scriptCodes.append(f"76a914{pubkeyhash}88ac")
     else:
@@ -95,19 +552,45 @@ def _get_witness_v0_scriptCodes(scriptPubKey: Script) -> List[str]:
     return scriptCodes
 
 
+def _is_push(token: Token) -> bool:
+    if isinstance(token, bytes):
+        return True
+    return isinstance(token, str) and not token.upper().startswith("OP_")
+
+
 def get_sighash(
     transaction: tx.Tx,
     previous_output: tx_out.TxOut,
     input_index: int,
     sighash_type: int,
+    cache: Optional[SighashCache] = None,
 ) -> bytes:
+    """Return the signature hash of the transaction input.
+
+    When signing (or verifying) multiple inputs of the same transaction,
+    pass the same SighashCache to avoid quadratic hashing.
+    Taproot inputs require a SighashCache with the spent outputs;
+    annex and script path are taken from the input witness.
+    """
 
     value = previous_output.nValue
 
     scriptPubKey = previous_output.scriptPubKey
-    script_type = payload_from_scriptPubKey(scriptPubKey)[0]
+    try:
+        script_type = payload_from_scriptPubKey(scriptPubKey)[0]
+    except ValueError:
+        script_type = "unknown"
     if script_type == "p2sh":
-        scriptPubKey = transaction.vin[input_index].scriptSig
+        scriptSig = transaction.vin[input_index].scriptSig
+        if len(scriptSig) == 2 and scriptSig[0] == 0:
+            # the redeem script itself, as p2sh-wrapped segwit program
+            scriptPubKey = scriptSig
+        else:
+            # the redeem script is the last push of the scriptSig
+            redeem_script = scriptSig[-1] if scriptSig else 0
+            if isinstance(redeem_script, int) or not _is_push(redeem_script):
+                raise ValueError("missing p2sh redeem script")
+            scriptPubKey = script.decode(redeem_script)
 
     if len(scriptPubKey) == 2 and scriptPubKey[0] == 0:  # is segwit
         script_type = payload_from_scriptPubKey(scriptPubKey)[0]
@@ -116,12 +599,28 @@ def get_sighash(
         elif script_type == "p2wsh":
             # the real script is contained in the witness
             scriptCode = _get_witness_v0_scriptCodes(
-                script.decode(transaction.vin[input_index].txinwitness[-1])
+                script.decode(transaction.vin[input_index].txinwitness[-1], True)
             )[0]
         return segwit_v0_sighash(
-            bytes.fromhex(scriptCode), transaction, input_index, sighash_type, value
+            bytes.fromhex(scriptCode),
+            transaction,
+            input_index,
+            sighash_type,
+            value,
+            cache,
         )
-    raise RuntimeError("legacy transactions not supported yet")
+    # taproot, i.e. native (not p2sh-wrapped) 32-bytes witness v1 program
+    program = script.encode(previous_output.scriptPubKey)
+    if len(program) == 34 and program[:2] == b"\x51\x20":
+        cache = _sighash_cache(transaction, cache)
+        if cache.spent_outputs is None:
+            raise ValueError("taproot signature hashes require the spent outputs")
+        witness = transaction.vin[input_index].txinwitness
+        annex, leaf_hash = _taproot_witness(witness)
+        return cache.taproot_sighash(input_index, sighash_type, annex, leaf_hash)
+    return legacy_sighash(
+        script.encode(scriptPubKey), transaction, input_index, sighash_type, None, cache
+    )
 
 
 # def sign(
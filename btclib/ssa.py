@@ -69,6 +69,7 @@ from .curve import Curve, secp256k1
 from .curvegroup import _double_mult, _mult, _multi_mult
 from .hashes import reduce_to_hlen
 from .numbertheory import mod_inv
+from .sigcache import SignatureCache
 from .to_prvkey import int_from_prvkey
 from .to_pubkey import point_from_pubkey
 from .utils import bytes_from_octets, hex_string, int_from_bits
@@ -381,13 +382,31 @@ def assert_as_valid(
 
 
 def _verify(
-    m: Octets, Q: BIP340PubKey, sig: SSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    m: Octets,
+    Q: BIP340PubKey,
+    sig: SSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    cache: Optional[SignatureCache] = None,
 ) -> bool:
-    """Verify the BIP340 signature of the provided message."""
+    """Verify the BIP340 signature of the provided message.
+
+    If a SignatureCache is provided, valid signatures are looked up
+    in (and added to) the cache.
+    """
 
     # try/except wrapper for the Errors raised by _assert_as_valid
     try:
-        _assert_as_valid(m, Q, sig, ec, hf)
+        if cache is None:
+            _assert_as_valid(m, Q, sig, ec, hf)
+        else:
+            r, s = deserialize(sig, ec)
+            m = bytes_from_octets(m, hf().digest_size)
+            x_Q, y_Q = point_from_bip340pubkey(Q, ec)
+            entry = cache.entry("BIP340", m, (x_Q, y_Q), (r, s), ec, hf)
+            if entry not in cache:
+                _assert_as_valid(m, x_Q, (r, s), ec, hf)
+                cache.add(entry)
     except Exception:
         return False
     else:
@@ -395,12 +414,17 @@ def _verify(
 
 
 def verify(
-    msg: String, Q: BIP340PubKey, sig: SSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    msg: String,
+    Q: BIP340PubKey,
+    sig: SSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    cache: Optional[SignatureCache] = None,
 ) -> bool:
     """ECDSA signature verification (SEC 1 v.2 section 4.1.4)."""
 
     m = reduce_to_hlen(msg, hf)
-    return _verify(m, Q, sig, ec, hf)
+    return _verify(m, Q, sig, ec, hf, cache)
 
 
 def __recover_pubkey(c: int, r: int, s: int, ec: Curve) -> int:
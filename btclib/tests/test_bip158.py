@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.bip158` module."
+
+from array import array
+from os import path
+
+import pytest
+
+from btclib import bip158, script
+from btclib.bip158 import BlockFilter, FilterMatcher, filter_headers, siphash
+from btclib.block_files import LazyBlock
+from btclib.blocks import Block, BlockHeader
+from btclib.tx import Tx
+from btclib.utils import hash256
+
+GENESIS_COINBASE = Tx.deserialize(
+    "01000000010000000000000000000000000000000000000000000000000000000000000000"
+    "ffffffff4d04ffff001d0104455468652054696d65732030332f4a616e2f32303039204368"
+    "616e63656c6c6f72206f6e206272696e6b206f66207365636f6e64206261696c6f75742066"
+    "6f722062616e6b73ffffffff0100f2052a01000000434104678afdb0fe5548271967f1a671"
+    "30b7105cd6a828e03909a67962e0ea1f61deb649f6bc3f4cef38c4f35504e51ec112de5c38"
+    "4df7ba0b8d578a4c702b6bf11d5fac00000000"
+)
+GENESIS = Block(
+    BlockHeader(
+        1,
+        "00" * 32,
+        GENESIS_COINBASE.txid,
+        1231006505,
+        bytes.fromhex("1d00ffff"),
+        2083236893,
+    ),
+    [GENESIS_COINBASE],
+)
+
+
+@pytest.fixture(params=[False, True], ids=["array", "numpy"])
+def use_numpy(request) -> bool:
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
+
+
+def _block_200000() -> LazyBlock:
+    filename = path.join(path.dirname(__file__), "test_data", "block_200000.bin")
+    with open(filename, "rb") as f:
+        return LazyBlock(f.read())
+
+
+def test_siphash() -> None:
+    # reference test vectors from the SipHash paper
+    key = bytes(range(16))
+    assert siphash(key, b"") == 0x726FDB47DD0E0E31
+    assert siphash(key, bytes(range(15))) == 0xA129CA6149BE45E5
+    assert siphash(key.hex(), bytes(range(8))) == 0x93F5F5799A932462
+
+
+def test_genesis(use_numpy: bool) -> None:
+    block_filter = BlockFilter.from_block(GENESIS, [])
+    assert block_filter.block_hash == GENESIS.header.hash
+    # mainnet genesis basic filter
+    assert block_filter.serialize().hex() == "017fa880"
+    assert BlockFilter.deserialize("017fa880", block_filter.block_hash) == block_filter
+
+    scriptPubKey = script.encode(GENESIS_COINBASE.vout[0].scriptPubKey)
+    assert list(block_filter.values(use_numpy)) == [522888]
+    matcher = FilterMatcher([scriptPubKey, "51", scriptPubKey], use_numpy)
+    assert len(matcher.scripts) == 2
+    assert matcher.match(block_filter) == [scriptPubKey]
+    assert matcher.match_any(block_filter)
+    assert not FilterMatcher(["51"], use_numpy).match_any(block_filter)
+    assert not FilterMatcher([], use_numpy).match_any(block_filter)
+
+
+def test_block_filter(use_numpy: bool) -> None:
+    lazy_block = _block_200000()
+    block = lazy_block.to_block()
+    spent = [hash256(i.to_bytes(4, "little"))[:22] for i in range(300)]
+    block_filter = BlockFilter.from_block(lazy_block, spent)
+    # duplicated spent scripts and empty ones are ignored
+    assert BlockFilter.from_block(block, spent + spent[:10] + [b""]) == block_filter
+
+    scripts = {
+        script.encode(o.scriptPubKey) for t in block.transactions for o in t.vout
+    }
+    assert block_filter.n == len(scripts) + len(spent)
+    values = block_filter.values(use_numpy)
+    assert len(values) == block_filter.n
+    assert all(values[i] <= values[i + 1] for i in range(len(values) - 1))
+    assert values[-1] < block_filter.n * bip158.M
+
+    watched = [hash256(i.to_bytes(4, "big"))[:25] for i in range(1000)]
+    matcher = FilterMatcher(watched + spent[::50] + list(scripts)[:3], use_numpy)
+    matched = matcher.match(block_filter)
+    # false positives are possible, with 1/M probability
+    assert set(spent[::50] + list(scripts)[:3]) <= set(matched)
+    assert len(matched) == 9
+    assert block_filter.match(spent[:5]) == spent[:5]
+
+    data = block_filter.serialize()
+    assert BlockFilter.deserialize(data, block_filter.block_hash) == block_filter
+    truncated = BlockFilter.deserialize(data[:-10], block_filter.block_hash)
+    with pytest.raises(ValueError, match="truncated filter"):
+        truncated.values(use_numpy)
+
+
+def test_op_return() -> None:
+    transaction = Tx.deserialize(GENESIS_COINBASE.serialize())
+    transaction.vout[0].scriptPubKey = ["OP_RETURN", "00" * 20]
+    block = Block(GENESIS.header, [transaction])
+    block_filter = BlockFilter.from_block(block, [])
+    assert block_filter.n == 0
+    assert block_filter.serialize() == b"\x00"
+    assert block_filter.match(["6a"]) == []
+    # spent scripts are not filtered
+    block_filter = BlockFilter.from_block(block, ["6a"])
+    assert block_filter.match(["6a"]) == [b"\x6a"]
+
+
+def test_filter_headers() -> None:
+    filters = [
+        BlockFilter.from_block(GENESIS, []),
+        BlockFilter.from_block(_block_200000(), []),
+    ]
+    headers = filter_headers(filters)
+    filter_hash = hash256(filters[0].serialize())
+    assert headers[0] == hash256(filter_hash + bytes(32))[::-1].hex()
+    assert filters[0].hash == filter_hash[::-1].hex()
+    assert headers[1] == filters[1].header(headers[0])
+    assert filter_headers(filters[1:], headers[0]) == headers[1:]
+
+
+def test_without_numpy(monkeypatch) -> None:
+    monkeypatch.setattr(bip158, "np", None)
+    block_filter = BlockFilter.from_block(GENESIS, [])
+    assert isinstance(block_filter.values(), array)
+    assert not FilterMatcher(["51"]).use_numpy
+    with pytest.raises(ValueError, match="NumPy is not available"):
+        block_filter.values(use_numpy=True)
+    with pytest.raises(ValueError, match="NumPy is not available"):
+        FilterMatcher(["51"], use_numpy=True)
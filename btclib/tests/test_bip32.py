@@ -203,6 +203,41 @@ def test_rootxprv_from_mnemonic() -> None:
     assert rootxprv == exp
 
 
+def test_mxprvs_from_bip39_mnemonics() -> None:
+    filename = path.join(data_folder, "bip39_test_vectors.json")
+    with open(filename, "r") as f:
+        test_vectors = json.load(f)["english"]
+
+    mnemonics = [(mnemonic, "TREZOR") for _, mnemonic, _, _ in test_vectors]
+    keys = [key.encode("ascii") for _, _, _, key in test_vectors]
+    assert list(bip32.mxprvs_from_bip39_mnemonics(mnemonics)) == keys
+    mxprvs = bip32.mxprvs_from_bip39_mnemonics(mnemonics, max_workers=2)
+    assert list(mxprvs) == keys
+    mxprvs = bip32.mxprvs_from_bip39_mnemonics(iter(mnemonics[:4]), processes=True)
+    assert list(mxprvs) == keys[:4]
+
+    mnemonic = "abandon abandon atom trust ankle walnut oil across awake bunker divorce abstract"
+    mxprvs = bip32.mxprvs_from_bip39_mnemonics([(mnemonic, "")], "testnet")
+    assert next(mxprvs) == bip32.mxprv_from_bip39_mnemonic(mnemonic, "", "testnet")
+
+    wrong_mnemonic = mnemonic[:-8] + "oil"
+    with pytest.raises(ValueError, match="invalid checksum: "):
+        list(bip32.mxprvs_from_bip39_mnemonics([(wrong_mnemonic, "")]))
+
+
+def test_mxprvs_from_electrum_mnemonics() -> None:
+    filename = path.join(data_folder, "electrum_test_vectors.json")
+    with open(filename, "r") as f:
+        test_vectors = json.load(f)
+
+    test_vectors = [v for v in test_vectors if v[0] != ""]
+    mnemonics = [(mnemonic, passphrase) for mnemonic, passphrase, *_ in test_vectors]
+    keys = [mxprv.encode("ascii") for _, _, mxprv, _, _ in test_vectors]
+    assert list(bip32.mxprvs_from_electrum_mnemonics(mnemonics)) == keys
+    mxprvs = bip32.mxprvs_from_electrum_mnemonics(mnemonics, processes=True)
+    assert list(mxprvs) == keys
+
+
 def test_derive() -> None:
 
     test_vectors = {
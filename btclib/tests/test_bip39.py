@@ -37,7 +37,7 @@ def test_bip39() -> None:
     with pytest.raises(ValueError, match=err_msg):
         bip39.entropy_from_mnemonic(wrong_mnemonic, lang)
 
-    err_msg = "invalid checksum: "
+    err_msg = "invalid checksum: 1110; expected: 0011"
     with pytest.raises(ValueError, match=err_msg):
         wr_m = "abandon abandon atom trust ankle walnut oil across awake bunker divorce oil"
         bip39.entropy_from_mnemonic(wr_m, lang)
@@ -48,6 +48,9 @@ def test_bip39() -> None:
         binstr_entropy = "01" * 65  # 130 bits
         bip39._entropy_checksum(binstr_entropy)
 
+    assert bip39._entropy_checksum("0" * 128) == "0011"
+    assert bip39._intbits_checksum((0, 128)) == (0b0011, 4)
+
 
 def test_vectors() -> None:
     """BIP39 test vectors
@@ -72,6 +75,10 @@ def test_vectors() -> None:
         size = (len(raw_entr) + 7) // 8
         assert entropy == int(raw_entr, 2).to_bytes(size, byteorder="big")
 
+        intbits = bip39.intbits_from_mnemonic(mnemonic, lang)
+        assert intbits == (int.from_bytes(entropy, "big"), len(entropy) * 8)
+        assert mnemonic == bip39.mnemonic_from_intbits(intbits, lang)
+
 
 def test_zeroleadingbit() -> None:
     # it should not throw an error
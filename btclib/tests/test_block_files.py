@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.block_files` module."
+
+from os import path
+from typing import List
+
+import pytest
+
+from btclib.block_files import (
+    MAGIC,
+    LazyBlock,
+    iter_blocks,
+    iter_lazy_blocks,
+    map_blocks,
+)
+from btclib.blocks import Block
+
+fnames = ["block_1.bin", "block_170.bin", "block_200000.bin"]
+
+
+def _blocks_bytes() -> List[bytes]:
+    blocks = []
+    for fname in fnames:
+        filename = path.join(path.dirname(__file__), "test_data", fname)
+        with open(filename, "rb") as f:
+            blocks.append(f.read())
+    return blocks
+
+
+def _write_block_file(filename: str, blocks: List[bytes], padding: int = 0) -> None:
+    with open(filename, "wb") as f:
+        for block in blocks:
+            f.write(MAGIC["mainnet"] + len(block).to_bytes(4, "little") + block)
+        f.write(b"\x00" * padding)
+
+
+def _block_hash(block: LazyBlock) -> str:
+    return block.hash
+
+
+def test_lazy_blocks(tmp_path) -> None:
+    blocks = _blocks_bytes()
+    filename = str(tmp_path / "blk00000.dat")
+    _write_block_file(filename, blocks, padding=1024)
+
+    lazy_blocks = list(iter_lazy_blocks(filename))
+    assert len(lazy_blocks) == len(blocks)
+    for lazy_block, block_bytes in zip(lazy_blocks, blocks):
+        block = Block.deserialize(block_bytes)
+        assert lazy_block.serialize() == block_bytes
+        assert lazy_block.size == len(block_bytes)
+        assert lazy_block.header == block.header
+        assert lazy_block.hash == block.header.hash
+        assert lazy_block.previousblockhash == block.header.previousblockhash
+        txids = [t.txid for t in lazy_block.transactions]
+        assert txids == [t.txid for t in block.transactions]
+        lazy_block.assert_valid()
+        assert lazy_block.to_block() == block
+
+    decoded_blocks = list(iter_blocks(filename, check_validity=False))
+    assert decoded_blocks == [Block.deserialize(b) for b in blocks]
+
+
+def test_map_blocks(tmp_path) -> None:
+    blocks = _blocks_bytes()
+    filenames = []
+    for i in range(4):
+        filename = str(tmp_path / f"blk{i:05}.dat")
+        _write_block_file(filename, blocks[i % 2 :])
+        filenames.append(filename)
+    exp = [b.hash for f in filenames for b in iter_lazy_blocks(f)]
+    assert len(exp) == 10
+
+    assert list(map_blocks(_block_hash, filenames, max_workers=2)) == exp
+    assert list(map_blocks(_block_hash, filenames, processes=False)) == exp
+
+
+def test_empty_file(tmp_path) -> None:
+    filename = str(tmp_path / "blk00000.dat")
+    _write_block_file(filename, [])
+    assert list(iter_lazy_blocks(filename)) == []
+    _write_block_file(filename, [], padding=1024)
+    assert list(iter_lazy_blocks(filename)) == []
+
+
+def test_exceptions(tmp_path) -> None:
+    blocks = _blocks_bytes()
+    filename = str(tmp_path / "blk00000.dat")
+    _write_block_file(filename, blocks)
+
+    with pytest.raises(ValueError, match="invalid magic at offset 0: "):
+        list(iter_lazy_blocks(filename, "testnet"))
+
+    with open(filename, "rb") as f:
+        data = f.read()
+    with open(filename, "wb") as f:
+        f.write(data[:-1])
+    with pytest.raises(ValueError, match="truncated block at offset "):
+        list(iter_lazy_blocks(filename))
+
+    block = LazyBlock(blocks[1] + b"\x00")
+    with pytest.raises(ValueError, match="1 spurious bytes after the last"):
+        block.transactions
+
+    with pytest.raises(ValueError, match="truncated block: 80 bytes"):
+        LazyBlock(blocks[1][:80])
+
+    # wrong merkle root
+    block = LazyBlock(blocks[1][:36] + b"\x00" * 32 + blocks[1][68:])
+    with pytest.raises(ValueError, match="The block merkle root is not the merkle"):
+        block.assert_valid()
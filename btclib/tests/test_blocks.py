@@ -162,6 +162,11 @@ def test_block_481824_complete() -> None:
     assert block.size == 989323
     assert block.weight == 3954548
 
+    # serialize_into appends to the buffer
+    buffer = bytearray(b"\x00")
+    block.serialize_into(buffer)
+    assert buffer[1:] == block_bytes
+
 
 def test_only_79_bytes() -> None:
 
@@ -196,6 +201,12 @@ def test_invalid_merkleroot() -> None:
     with pytest.raises(ValueError, match=err_msg):
         block.assert_valid()
 
+    # the changed merkle root also invalidates the proof-of-work
+    with pytest.raises(ValueError, match="Invalid nonce"):
+        Block.deserialize(block.serialize())
+    # validation is skipped on request
+    assert Block.deserialize(block.serialize(), check_validity=False) == block
+
 
 def test_invalid_block_version() -> None:
     fname = "block_1.bin"
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.coin_selection` module."
+
+import random
+from typing import List
+
+import pytest
+
+from btclib import script
+from btclib.coin_selection import (
+    CHANGE_INPUT_WEIGHT,
+    CHANGE_OUTPUT_WEIGHT,
+    CoinSelector,
+    input_weight,
+    select_coins,
+)
+from btclib.scriptpubkey import p2ms, p2pk, p2pkh, p2sh, p2wpkh, p2wsh
+from btclib.tx_out import TxOut
+
+PUBKEY = "02" + "79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798"
+P2WPKH = script.decode(p2wpkh(PUBKEY))
+
+
+def _utxos(amounts: List[int]) -> List[TxOut]:
+    return [TxOut(amount, P2WPKH) for amount in amounts]
+
+
+def test_input_weight() -> None:
+    # vsizes as in Bitcoin Core wallet estimates (worst case signatures)
+    assert input_weight(p2pkh(PUBKEY)) == 148 * 4
+    assert input_weight(P2WPKH) == 272
+    assert input_weight(p2sh(p2wpkh(PUBKEY))) == 364
+    assert input_weight(p2pk(PUBKEY)) == 114 * 4
+    redeem_script = p2ms([PUBKEY, "03" + PUBKEY[2:]], 2)
+    assert input_weight(redeem_script) == (41 + 1 + 2 * 73) * 4
+    with pytest.raises(ValueError, match="unknown input weight for p2wsh"):
+        input_weight(p2wsh(redeem_script))
+
+
+def test_bnb() -> None:
+    fee = 68  # p2wpkh input at 1 sat/vB
+    amounts = [1000, 2000, 3000, 4000, 5000, 100000]
+    selector = CoinSelector(_utxos([a + fee for a in amounts]))
+    assert len(selector) == 6
+
+    # exact match without change
+    selection = selector.select(7000, 1.0, 1.0, algorithms=["bnb"])
+    assert selection.algorithm == "bnb"
+    assert not selection.change
+    assert selection.excess == 0
+    assert sum(amounts[i] for i in selection.indexes) == 7000
+    assert selection.fee == fee * len(selection.indexes)
+    assert selection.waste == 0
+    # at low fee rates consolidating more inputs is less wasteful
+    selection = selector.select(7000, 1.0, 10.0, algorithms=["bnb"])
+    assert selection.indexes == [0, 1, 3]
+    assert selection.waste < 0
+    # at high fee rates fewer inputs are preferred
+    fee = 68 * 20
+    selector = CoinSelector(_utxos([1000 + fee, 2000 + fee, 3000 + fee]))
+    selection = selector.select(3000, 20.0, 1.0, algorithms=["bnb"])
+    assert selection.indexes == [2]
+    selector = CoinSelector(_utxos([a + 68 for a in amounts]))
+
+    # within the cost of change, the excess is given up as fee
+    selection = selector.select(6990, 1.0, 1.0, algorithms=["bnb"])
+    assert selection.excess == 10 and selection.waste == 10
+    with pytest.raises(ValueError, match="insufficient funds for target: "):
+        selector.select(100000 + 15000 + 1, 1.0, algorithms=["bnb"])
+    with pytest.raises(ValueError, match="insufficient funds for target: "):
+        # no exact match
+        selector.select(50000, 1.0, algorithms=["bnb"])
+
+
+def test_change_algorithms() -> None:
+    fee_rate = 2.0
+    change_fee = CHANGE_OUTPUT_WEIGHT // 2
+    amounts = [10000 * (i + 1) + 136 for i in range(20)]
+    selector = CoinSelector(_utxos(amounts))
+    for algorithm in ("knapsack", "srd"):
+        selection = selector.select(
+            123456, fee_rate, algorithms=[algorithm], min_change=10000, seed=42
+        )
+        assert selection.algorithm == algorithm
+        assert selection.change
+        amount = sum(amounts[i] for i in selection.indexes)
+        assert amount == selection.amount
+        assert amount - selection.fee - 123456 == selection.excess
+        assert selection.excess >= change_fee + 10000
+        cost_of_change = change_fee + CHANGE_INPUT_WEIGHT * 10 // 4
+        long_term_fees = 68 * 10 * len(selection.indexes)
+        assert selection.waste == selection.fee - long_term_fees + cost_of_change
+
+    # the lowest larger value
+    selection = selector.select(
+        150000, fee_rate, algorithms=["knapsack"], min_change=10000
+    )
+    assert selection.indexes == [16]
+    # exact match
+    selection = selector.select(
+        40000 - change_fee, fee_rate, algorithms=["knapsack"], min_change=10000
+    )
+    assert selection.indexes == [3]
+    # all the smaller values
+    selector = CoinSelector(_utxos(amounts[:3]))
+    selection = selector.select(
+        60000 - change_fee, fee_rate, algorithms=["knapsack"], min_change=10000
+    )
+    assert selection.indexes == [0, 1, 2]
+
+
+def test_select() -> None:
+    # the choice among the algorithms is driven by the waste metric
+    amounts = [5000 + 68, 3000 + 68, 1000000]
+    selection = select_coins(_utxos(amounts), 8000, 1.0, 1.0)
+    assert selection.algorithm == "bnb"
+    assert selection.indexes == [0, 1]
+    selection = select_coins(_utxos(amounts), 9000, 1.0, 1.0, seed=1)
+    assert selection.algorithm != "bnb"
+    assert selection.change
+
+    # uneconomic outputs are not selected
+    selection = select_coins(_utxos([60, 1000000]), 1000, 1.0, seed=1)
+    assert selection.indexes == [1]
+
+    with pytest.raises(ValueError, match="invalid target: 0"):
+        select_coins(_utxos(amounts), 0, 1.0)
+    with pytest.raises(ValueError, match="unknown coin selection algorithm: "):
+        CoinSelector(_utxos(amounts)).select(1000, 1.0, algorithms=["fifo"])
+    with pytest.raises(ValueError, match="invalid input weights: 1 instead of 3"):
+        CoinSelector(_utxos(amounts), [272])
+    with pytest.raises(ValueError, match="insufficient funds for target: "):
+        select_coins(_utxos(amounts), 2000000, 1.0)
+
+
+def test_large_pool() -> None:
+    rng = random.Random(42)
+    amounts = [rng.randint(1000, 100000000) for _ in range(100000)]
+    selector = CoinSelector(_utxos(amounts), [272] * len(amounts))
+    for target in (333333, 12345678, 500000000):
+        selection = selector.select(target, 5.0, seed=1)
+        assert selection.excess >= 0
+        assert selection.amount - selection.fee - target == selection.excess
+        for algorithm in ("knapsack", "srd"):
+            selection = selector.select(target, 5.0, algorithms=[algorithm], seed=1)
+            assert selection.change
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.compact_tx` module."
+
+import tracemalloc
+from os import path
+
+import pytest
+
+from btclib.block_files import LazyBlock
+from btclib.compact_tx import (
+    CompactOutPoint,
+    CompactTx,
+    CompactTxIn,
+    CompactTxOut,
+)
+from btclib.tx import Tx
+from btclib.tx_in import OutPoint
+from btclib.tx_out import TxOut
+
+
+def _transactions(filename: str) -> list:
+    filename = path.join(path.dirname(__file__), "test_data", filename)
+    with open(filename, "rb") as f:
+        return [t.serialize() for t in LazyBlock(f.read()).transactions]
+
+
+def test_outpoint() -> None:
+    outpoint = OutPoint("11" * 31 + "22", 7)
+    compact = CompactOutPoint.from_outpoint(outpoint)
+    assert compact.hash_bytes == b"\x22" + b"\x11" * 31
+    assert compact.hash == outpoint.hash
+    assert compact.n == 7
+    assert compact.to_outpoint() == outpoint
+    assert compact.serialize() == outpoint.serialize()
+    assert CompactOutPoint.deserialize(outpoint.serialize().hex()) == compact
+    assert not compact.is_coinbase
+    # hashable, e.g. as dict key
+    assert {compact: 1}[CompactOutPoint(compact.hash_bytes, 7)] == 1
+    assert compact != CompactOutPoint(compact.hash_bytes, 8)
+    assert compact != outpoint
+    assert repr(compact) == f"CompactOutPoint(hash='{outpoint.hash}', n=7)"
+
+    null = CompactOutPoint(b"\x00" * 32, 0xFFFFFFFF)
+    assert null.is_coinbase
+    null.assert_valid()
+    with pytest.raises(ValueError, match="invalid tx_in"):
+        CompactOutPoint(b"\x00" * 32, 0).assert_valid()
+    with pytest.raises(ValueError, match="not enough data: 3 bytes, 4 needed"):
+        CompactOutPoint.deserialize(b"\x00" * 35)
+
+
+def test_transactions() -> None:
+    for filename in ("block_1.bin", "block_200000.bin", "block_481824.bin"):
+        for data in _transactions(filename):
+            tx = Tx.deserialize(data)
+            compact = CompactTx.deserialize(data)
+            assert compact.serialize() == data
+            assert compact.serialize(False) == tx.serialize(False)
+            assert compact.to_tx() == tx
+            assert CompactTx.from_tx(tx) == compact
+            assert compact.txid == tx.txid
+            assert compact.hash == tx.hash
+            assert compact.size == tx.size
+            assert compact.vsize == tx.vsize
+            assert compact.has_witness == any(t.txinwitness for t in tx.vin)
+            for tx_in, compact_in in zip(tx.vin, compact.vin):
+                assert compact_in.prevout.hash == tx_in.prevout.hash
+                assert compact_in.scriptSig == tx_in.scriptSig
+                assert compact_in.scriptSigHex == tx_in.scriptSigHex
+                assert compact_in.txinwitness == tx_in.txinwitness
+                assert CompactTxIn.deserialize(tx_in.serialize()).witness == ()
+            for tx_out, compact_out in zip(tx.vout, compact.vout):
+                assert compact_out.to_tx_out() == tx_out
+                assert compact_out.scriptPubKey == tx_out.scriptPubKey
+                assert CompactTxOut.deserialize(tx_out.serialize()) == compact_out
+
+
+def test_memory() -> None:
+    transactions = _transactions("block_481824.bin")
+    sizes = []
+    for cls in (Tx, CompactTx):
+        tracemalloc.start()
+        parsed = [cls.deserialize(data) for data in transactions]
+        sizes.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del parsed
+    assert 2 * sizes[1] < sizes[0]
+
+
+def test_invalid() -> None:
+    data = _transactions("block_200000.bin")[1]
+    with pytest.raises(ValueError, match="not enough data: "):
+        CompactTx.deserialize(data[:-1])
+    with pytest.raises(ValueError, match="1 spurious bytes after the tx"):
+        CompactTx.deserialize(data + b"\x00")
+
+    compact = CompactTx.deserialize(data)
+    with pytest.raises(ValueError, match="invalid prevout size: 35"):
+        CompactTxIn(compact.vin[0].prevout_bytes[:35])
+    compact.vout[0].nValue = -1
+    with pytest.raises(ValueError, match="negative value: -1"):
+        compact.assert_valid()
+    compact.vout[0].nValue = 2099999997690001
+    with pytest.raises(ValueError, match="value too high: "):
+        compact.assert_valid()
+    compact.vout[0].nValue = 1
+    compact.vout[0].scriptPubKey_bytes = b""
+    with pytest.raises(ValueError, match="empty scriptPubKey"):
+        compact.assert_valid()
+    compact.vout = []
+    with pytest.raises(ValueError, match="at least one output"):
+        compact.assert_valid()
+    compact.vin[0].prevout = CompactOutPoint(b"\x00" * 32, 0)
+    with pytest.raises(ValueError, match="invalid tx_in"):
+        compact.assert_valid()
+    compact.vin = []
+    with pytest.raises(ValueError, match="at least one input"):
+        compact.assert_valid()
+
+
+def test_witness() -> None:
+    tx_out = TxOut(1000, ["OP_0", "00" * 20])
+    tx_in = CompactTxIn(CompactOutPoint(b"\x01" * 32, 0), witness=[b"\x02" * 72])
+    compact = CompactTx(2, 0, [tx_in], [CompactTxOut.from_tx_out(tx_out)])
+    assert compact.has_witness
+    tx = compact.to_tx()
+    assert tx.vin[0].txinwitness == ["02" * 72]
+    assert tx.serialize() == compact.serialize()
+    assert tx.weight == compact.weight
+    assert "witness=(b'\\x02" in repr(compact)
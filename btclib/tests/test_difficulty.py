@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.difficulty` module."
+
+from array import array
+from math import isnan
+from os import path
+from typing import Any, List, Tuple
+
+import pytest
+
+from btclib import difficulty
+from btclib.blocks import BlockHeader
+from btclib.difficulty import (
+    RETARGET_INTERVAL,
+    TARGET_TIMESPAN,
+    chainwork,
+    compact_from_target,
+    hash_rates,
+    header_fields,
+    median_time_past,
+    next_bits,
+    targets_from_compacts,
+    verify_retargets,
+    works,
+)
+from btclib.header_chain import POW_LIMIT, target_from_compact, work_from_target
+
+
+def _arrays(use_numpy: bool, times: List[int], bits: List[int]) -> Tuple[Any, Any]:
+    "Return the times and bits arrays, as extracted from headers."
+
+    data = bytearray()
+    for t, b in zip(times, bits):
+        data += bytes(68) + t.to_bytes(4, "little") + b.to_bytes(4, "little")
+        data += bytes(4)
+    return header_fields(data, use_numpy)
+
+
+@pytest.fixture(params=[False, True], ids=["array", "numpy"])
+def use_numpy(request) -> bool:
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
+
+
+def test_header_fields(use_numpy: bool) -> None:
+    data = b""
+    headers = []
+    for fname in ("block_1.bin", "block_170.bin", "block_200000.bin"):
+        filename = path.join(path.dirname(__file__), "test_data", fname)
+        with open(filename, "rb") as f:
+            header_bytes = f.read(80)
+        data += header_bytes
+        headers.append(BlockHeader.deserialize(header_bytes))
+
+    times, bits = header_fields(data, use_numpy)
+    assert list(times) == [h.time for h in headers]
+    assert list(bits) == [int.from_bytes(h.bits, "big") for h in headers]
+    targets = targets_from_compacts(bits)
+    assert targets[0] == POW_LIMIT["mainnet"]
+    assert targets[2] == 0x05DB8B << 8 * (0x1A - 3)
+
+    assert chainwork(bits) == sum(work_from_target(t) for t in targets)
+    assert list(works(bits)) == [float(work_from_target(t)) for t in targets]
+
+    with pytest.raises(ValueError, match="invalid headers data size: 79"):
+        header_fields(data[:79], use_numpy)
+
+
+def test_compact() -> None:
+    for bits in (0x1D00FFFF, 0x1D00D86A, 0x1A05DB8B, 0x207FFFFF, 0x03123456):
+        assert compact_from_target(target_from_compact(bits)) == bits
+    assert compact_from_target(0) == 0
+    assert compact_from_target(0x80) == 0x02008000
+    assert compact_from_target(0x12) == 0x01120000
+    with pytest.raises(ValueError, match="negative target: -1"):
+        compact_from_target(-1)
+
+
+def test_next_bits() -> None:
+    # first mainnet retarget, at height 32256
+    assert next_bits(0, 1022578, 0x1D00FFFF) == 0x1D00D86A
+    # at most four times easier, but not easier than the limit
+    assert next_bits(0, 5 * TARGET_TIMESPAN, 0x1D00FFFF) == 0x1D00FFFF
+    bits = 0x1B0404CB
+    target = target_from_compact(bits)
+    easier = next_bits(0, 5 * TARGET_TIMESPAN, bits)
+    assert easier == compact_from_target(target * 4)
+    # at most four times harder
+    assert next_bits(0, 0, 0x1D00FFFF) == 0x1C3FFFC0
+
+
+def test_verify_retargets(use_numpy: bool) -> None:
+    n = 2 * RETARGET_INTERVAL + 10
+    # blocks are found twice as fast as expected
+    times = [1231006505 + 300 * i for i in range(n)]
+    bits = [0x1B0404CB] * RETARGET_INTERVAL
+    new_bits = next_bits(times[0], times[RETARGET_INTERVAL - 1], bits[-1])
+    assert target_from_compact(new_bits) < target_from_compact(bits[-1]) // 2
+    bits += [new_bits] * (RETARGET_INTERVAL + 10)
+    # the second retarget is not verified (below), it must change
+    i = 2 * RETARGET_INTERVAL
+    bits[i:] = [next_bits(times[i - RETARGET_INTERVAL], times[i - 1], new_bits)] * 10
+
+    t, b = _arrays(use_numpy, times, bits)
+    assert verify_retargets(t, b) == []
+    # the first retarget cannot be verified without the previous period
+    assert verify_retargets(t[5:], b[5:], start_height=5) == []
+
+    wrong = bits[:]
+    wrong[100] = 0x1B0404CA
+    wrong[RETARGET_INTERVAL] = bits[0]
+    t, b = _arrays(use_numpy, times, wrong)
+    i = RETARGET_INTERVAL
+    assert verify_retargets(t, b) == [100, 101, i, i + 1]
+    assert verify_retargets(t[5:], b[5:], start_height=5) == [100, 101, i + 1]
+
+    with pytest.raises(ValueError, match="10 times for 9 bits"):
+        verify_retargets(t[:10], b[:9])
+
+
+def test_median_time_past(use_numpy: bool) -> None:
+    times = [5, 1, 4, 2, 3, 10, 9, 8, 7, 6, 11, 0, 12, 13]
+    t, _ = _arrays(use_numpy, times, [0x1D00FFFF] * len(times))
+    exp = []
+    for i in range(len(times)):
+        window = sorted(times[max(0, i - 10) : i + 1])
+        exp.append(window[len(window) // 2])
+    assert list(median_time_past(t)) == exp
+    assert list(median_time_past(t[:5])) == exp[:5]
+    exp3 = []
+    for i in range(len(times)):
+        window = sorted(times[max(0, i - 2) : i + 1])
+        exp3.append(window[len(window) // 2])
+    assert list(median_time_past(t, 3)) == exp3
+    assert list(median_time_past(array("q", times))) == exp
+
+
+def test_hash_rates(use_numpy: bool) -> None:
+    n = 300
+    times = [1231006505 + 600 * i for i in range(n)]
+    t, b = _arrays(use_numpy, times, [0x1D00FFFF] * n)
+    rates = hash_rates(t, b)
+    assert len(rates) == n - 120
+    # difficulty 1 every 10 minutes
+    exp = work_from_target(POW_LIMIT["mainnet"]) / 600
+    assert all(abs(rate - exp) < 1e-6 * exp for rate in rates)
+    assert len(hash_rates(t, b, n - 1)) == 1
+
+    # out-of-order timestamps: no elapsed time, no estimate
+    times = [1231006505, 1231007105, 1231006505, 1231006000, 1231008000]
+    t, b = _arrays(use_numpy, times, [0x1D00FFFF] * len(times))
+    rates = hash_rates(t, b, 2)
+    assert all(isnan(rate) for rate in rates[:2])
+    assert rates[2] == pytest.approx(2 * work_from_target(POW_LIMIT["mainnet"]) / 1495)
+
+    with pytest.raises(ValueError, match="invalid window: 0"):
+        hash_rates(t, b, 0)
+
+
+def test_without_numpy(monkeypatch) -> None:
+    monkeypatch.setattr(difficulty, "np", None)
+    times, bits = header_fields(bytes(80))
+    assert isinstance(times, array)
+    assert isinstance(bits, array)
+    with pytest.raises(ValueError, match="NumPy is not available"):
+        header_fields(bytes(80), use_numpy=True)
@@ -10,12 +10,17 @@
 
 "Tests for `btclib.electrum` module."
 
+import hmac
 import json
+import random
+from hashlib import sha512
 from os import path
 
 import pytest
 
 from btclib import bip32, electrum, slip132
+from btclib.entropy import _indexes_from_entropy, binstr_from_entropy
+from btclib.mnemonic import _mnemonic_from_indexes, _wordlists
 
 
 def test_mnemonic() -> None:
@@ -62,6 +67,44 @@ def test_mnemonic() -> None:
     assert "2fa" == electrum.version_from_mnemonic(mnemonic)[0]
 
 
+def _mnemonic_from_entropy(int_entropy: int, version: str, lang: str) -> str:
+    "Reference implementation, converting the whole entropy at each trial."
+
+    base = _wordlists.language_length(lang)
+    while True:
+        nbits = int_entropy.bit_length()
+        binstr_entropy = binstr_from_entropy(int_entropy, nbits)
+        indexes = _indexes_from_entropy(binstr_entropy, base)
+        mnemonic = _mnemonic_from_indexes(indexes, lang)
+        s = hmac.new(b"Seed version", mnemonic.encode(), sha512).hexdigest()
+        if s.startswith(electrum._MNEMONIC_VERSIONS[version]):
+            return mnemonic
+        int_entropy += 1
+
+
+def test_mnemonic_search() -> None:
+    lang = "en"
+    entropies = [
+        0x110AAAA03974D093EDA670121023CD0772,
+        # all 2047 indexes: the first increment adds one more word
+        2 ** 132 - 1,
+        2 ** 132 - 2,
+    ]
+    for entropy in entropies:
+        for eversion in ("standard", "segwit", "2fa", "2fa_segwit"):
+            mnemonic = electrum.mnemonic_from_entropy(entropy, eversion, lang)
+            assert mnemonic == _mnemonic_from_entropy(entropy, eversion, lang)
+
+    entropy = random.Random(42).getrandbits(132)
+    for eversion in ("standard", "segwit"):
+        mnemonic = electrum.mnemonic_from_entropy(entropy, eversion, lang)
+        mnemonic2 = electrum.mnemonic_from_entropy(
+            entropy, eversion, lang, processes=True, max_workers=2
+        )
+        assert mnemonic == mnemonic2
+        assert mnemonic == _mnemonic_from_entropy(entropy, eversion, lang)
+
+
 def test_vectors() -> None:
     fname = "electrum_test_vectors.json"
     filename = path.join(path.dirname(__file__), "test_data", fname)
@@ -78,6 +121,8 @@ def test_vectors() -> None:
             entr = int(electrum.entropy_from_mnemonic(mnemonic, lang), 2)
             mnem = electrum.mnemonic_from_entropy(entr, eversion, lang)
             assert mnem == mnemonic
+            intbits = electrum.intbits_from_mnemonic(mnemonic, lang)
+            assert intbits == (entr, len(mnemonic.split()) * 11)
 
         assert rmxpub.encode() == bip32.xpub_from_xprv(rmxprv)
 
@@ -21,12 +21,19 @@ from btclib.entropy import (
     _bits,
     _entropy_from_indexes,
     _indexes_from_entropy,
+    _indexes_from_intbits,
+    _intbits_from_indexes,
     binstr_from_binstr,
     binstr_from_bytes,
     binstr_from_entropy,
     binstr_from_int,
+    binstr_from_intbits,
     binstr_from_rolls,
     collect_rolls,
+    intbits_from_binstr,
+    intbits_from_bytes,
+    intbits_from_entropy,
+    intbits_from_int,
     randbinstr,
 )
 
@@ -50,6 +57,43 @@ def test_indexes() -> None:
         assert indexes == indx
 
 
+def test_intbits() -> None:
+    assert _indexes_from_intbits((0, 11), 2048) == [0]
+    assert _indexes_from_intbits((0, 12), 2048) == [0, 0]
+    assert binstr_from_intbits((0, 0)) == ""
+    assert binstr_from_intbits((0, 3)) == "000"
+    assert binstr_from_intbits((5, 8)) == "00000101"
+
+    for _ in range(10):
+        indexes = [secrets.randbelow(2048) for _ in range(12)]
+        intbits = _intbits_from_indexes(indexes, 2048)
+        assert intbits[1] == 132
+        assert binstr_from_intbits(intbits) == _entropy_from_indexes(indexes, 2048)
+        assert _indexes_from_intbits(intbits, 2048) == indexes
+
+    test_vectors = [
+        "10101011" * 32,
+        "00101011" * 32,
+        "00000000" + "10101011" * 31,
+        "0" * 128,
+        "10" + "11111111" * (max(_bits) // 8),
+    ]
+    for raw in test_vectors:
+        i = int(raw, 2)
+        b = i.to_bytes((len(raw) + 7) // 8, "big")
+        for intbits, binstr in (
+            (intbits_from_binstr(raw), binstr_from_binstr(raw)),
+            (intbits_from_int(i), binstr_from_int(i)),
+            (intbits_from_int(hex(i)), binstr_from_int(hex(i))),
+            (intbits_from_bytes(b), binstr_from_bytes(b)),
+            (intbits_from_entropy(raw), binstr_from_entropy(raw)),
+            (intbits_from_entropy(i), binstr_from_entropy(i)),
+            (intbits_from_entropy(b), binstr_from_entropy(b)),
+        ):
+            assert binstr_from_intbits(intbits) == binstr
+            assert intbits == (int(binstr, 2), len(binstr))
+
+
 def test_conversions() -> None:
 
     test_vectors = [
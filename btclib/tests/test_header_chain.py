@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.header_chain` module."
+
+from os import path
+from typing import List
+
+import pytest
+
+from btclib.blocks import BlockHeader
+from btclib.header_chain import (
+    POW_LIMIT,
+    HeaderChain,
+    target_from_compact,
+    work_from_target,
+)
+from btclib.utils import hash256
+
+GENESIS = BlockHeader(
+    version=1,
+    previousblockhash="00" * 32,
+    merkleroot="4a5e1e4baab89f3a32518a88c31bc87f618f76673e2cc77ab2127b7afdeda33b",
+    time=1231006505,
+    bits=bytes.fromhex("1d00ffff"),
+    nonce=2083236893,
+).serialize()
+
+REGTEST_BITS = bytes.fromhex("207fffff")
+
+
+def _mine(previous: bytes, n: int, tag: int = 0) -> List[bytes]:
+    "Return n regtest headers following the previous one."
+
+    headers = []
+    for i in range(n):
+        prev_hash = hash256(previous)
+        header = bytearray(4 + 32 + 32 + 12)
+        header[0:4] = (4).to_bytes(4, "little")
+        header[4:36] = prev_hash
+        header[36:68] = bytes([tag]) * 32
+        header[68:72] = (1296688602 + 600 * i).to_bytes(4, "little")
+        header[72:76] = REGTEST_BITS[::-1]
+        for nonce in range(1 << 32):
+            header[76:80] = nonce.to_bytes(4, "little")
+            if int.from_bytes(hash256(bytes(header)), "little") <= POW_LIMIT["regtest"]:
+                break
+        previous = bytes(header)
+        headers.append(previous)
+    return headers
+
+
+def test_target_from_compact() -> None:
+    # test vectors from Bitcoin Core arith_uint256_tests.cpp
+    assert target_from_compact(0x00123456) == 0
+    assert target_from_compact(0x01003456) == 0
+    assert target_from_compact(0x02000056) == 0
+    assert target_from_compact(0x01803456) == 0
+    assert target_from_compact(0x01123456) == 0x12
+    assert target_from_compact(0x02123456) == 0x1234
+    assert target_from_compact(0x03123456) == 0x123456
+    assert target_from_compact(0x04123456) == 0x12345600
+    assert target_from_compact(0x05009234) == 0x92340000
+    assert target_from_compact(0x20123456) == 0x123456 << 232
+    assert target_from_compact(0x1D00FFFF) == POW_LIMIT["mainnet"]
+    with pytest.raises(ValueError, match="negative target: "):
+        target_from_compact(0x04923456)
+    with pytest.raises(ValueError, match="negative target: "):
+        target_from_compact(0x01FEDCBA)
+    with pytest.raises(ValueError, match="overflowing target: "):
+        target_from_compact(0xFF123456)
+
+    assert work_from_target(POW_LIMIT["mainnet"]) == 0x100010001
+
+
+def test_mainnet() -> None:
+    chain = HeaderChain(GENESIS)
+    genesis_hash = "000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f"
+    assert chain.tip == genesis_hash
+    assert chain.height == 0
+    assert chain.chainwork == 0x100010001
+
+    filename = path.join(path.dirname(__file__), "test_data", "block_1.bin")
+    with open(filename, "rb") as f:
+        header_1 = f.read(80)
+    assert chain.add_headers(header_1) == 1
+    # known headers are skipped
+    assert chain.add_headers(GENESIS + header_1) == 0
+    assert chain.height == 1
+    assert chain.chainwork == 2 * 0x100010001
+    assert chain.header(1) == BlockHeader.deserialize(header_1)
+    assert chain.hash(0) == genesis_hash
+    assert chain.height_of(chain.tip) == 1
+    assert chain.headers_bytes() == GENESIS + header_1
+
+    # block 170 does not follow block 1
+    filename = path.join(path.dirname(__file__), "test_data", "block_170.bin")
+    with open(filename, "rb") as f:
+        header_170 = f.read(80)
+    with pytest.raises(ValueError, match="unknown previous block at offset 0"):
+        chain.add_headers(header_170)
+
+    invalid = header_1[:76] + b"\x00" * 4
+    with pytest.raises(ValueError, match="invalid proof-of-work at offset 80"):
+        chain.add_headers(header_1 + invalid)
+    with pytest.raises(ValueError, match="invalid headers data size: 79"):
+        chain.add_headers(header_1[:79])
+    with pytest.raises(ValueError, match="invalid header size: 79"):
+        HeaderChain(GENESIS[:79])
+    # regtest target on mainnet
+    with pytest.raises(ValueError, match="invalid target at offset 0: "):
+        HeaderChain(_mine(GENESIS, 1)[0])
+
+
+def test_fork_choice(tmp_path) -> None:
+    genesis = _mine(b"\x00" * 80, 1)[0]
+    main = _mine(genesis, 6)
+    fork = _mine(main[1], 6, tag=1)
+
+    chain = HeaderChain(genesis, network="regtest")
+    work = chain.chainwork
+    filename = str(tmp_path / "headers.dat")
+    with open(filename, "wb") as f:
+        f.write(b"".join(main))
+    assert chain.add_headers_from_file(filename) == 6
+    assert chain.height == 6
+    assert chain.chainwork == 7 * work
+    assert chain.tip == hash256(main[-1])[::-1].hex()
+
+    # a shorter fork does not change the best chain
+    assert chain.add_headers(b"".join(fork[:3])) == 3
+    assert len(chain) == 10
+    assert chain.tip == hash256(main[-1])[::-1].hex()
+    fork_tip = hash256(fork[2])[::-1].hex()
+    assert fork_tip in chain
+    assert chain.height_of(fork_tip) is None
+    assert chain.chainwork_of(fork_tip) == 6 * work
+
+    # equal work: the first seen tip is kept
+    assert chain.add_headers(fork[3]) == 1
+    assert chain.tip == hash256(main[-1])[::-1].hex()
+
+    # reorg
+    assert chain.add_headers(fork[4]) == 1
+    assert chain.height == 7
+    assert chain.tip == hash256(fork[4])[::-1].hex()
+    assert chain.headers_bytes(3) == b"".join(fork[:5])
+    assert chain.height_of(hash256(main[1])[::-1].hex()) == 2
+    assert chain.height_of(hash256(main[2])[::-1].hex()) is None
+    assert chain.height_of("00" * 32) is None
+
+    # back to the main chain, the error leaving the valid headers
+    invalid = main[-1][:76] + b"\xff" * 4
+    with pytest.raises(ValueError, match="invalid proof-of-work at offset 80"):
+        chain.add_headers(b"".join(_mine(main[-1], 2)[:1]) + invalid)
+    assert chain.tip == hash256(fork[4])[::-1].hex()
+    chain.add_headers(b"".join(_mine(main[-1], 2)))
+    assert chain.height == 8
+    assert chain.hash(3) == hash256(main[2])[::-1].hex()
+
+    with pytest.raises(IndexError, match="invalid height: 9"):
+        chain.hash(9)
+    with pytest.raises(ValueError, match="unknown header: "):
+        chain.chainwork_of("00" * 32)
+
+    # checkpoint start
+    chain = HeaderChain(main[3], height=4, chainwork=4 * work, network="regtest")
+    chain.add_headers(b"".join(main[4:]))
+    assert chain.height == 6
+    assert chain.chainwork == 7 * work
+    assert chain.hash(4) == hash256(main[3])[::-1].hex()
+    with pytest.raises(IndexError, match="invalid height: 3"):
+        chain.hash(3)
+    assert chain.headers_bytes() == b"".join(main[3:])
+    assert chain.headers_bytes(5) == b"".join(main[4:])
+    with pytest.raises(IndexError, match="invalid height: 0"):
+        chain.headers_bytes(0)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.lazy_tx` module."
+
+import os
+
+import pytest
+
+from btclib import varint
+from btclib.blocks import Block
+from btclib.lazy_tx import LazyTx
+from btclib.tx import Tx
+
+
+def _assert_same(lazy_tx: LazyTx, transaction: Tx) -> None:
+    assert lazy_tx.nVersion == transaction.nVersion
+    assert lazy_tx.nLockTime == transaction.nLockTime
+    assert len(lazy_tx.vin) == len(transaction.vin)
+    for lazy_in, tx_in in zip(lazy_tx.vin, transaction.vin):
+        assert lazy_in.prevout_hash == tx_in.prevout.hash
+        assert lazy_in.prevout_n == tx_in.prevout.n
+        assert lazy_in.prevout_bytes == tx_in.prevout.serialize()
+        if lazy_in.is_coinbase:
+            assert lazy_in.scriptSigBytes.hex() == tx_in.scriptSigHex
+        else:
+            assert lazy_in.scriptSig == tx_in.scriptSig
+        assert lazy_in.nSequence == tx_in.nSequence
+        assert lazy_in.txinwitness == tx_in.txinwitness
+    assert len(lazy_tx.vout) == len(transaction.vout)
+    for lazy_out, tx_out in zip(lazy_tx.vout, transaction.vout):
+        assert lazy_out.nValue == tx_out.nValue
+        assert lazy_out.scriptPubKey == tx_out.scriptPubKey
+    assert lazy_tx.txid == transaction.txid
+    assert lazy_tx.hash == transaction.hash
+    assert lazy_tx.txid_bytes == bytes.fromhex(transaction.txid)[::-1]
+    assert lazy_tx.hash_bytes == bytes.fromhex(transaction.hash)[::-1]
+    assert lazy_tx.size == transaction.size
+    assert lazy_tx.weight == transaction.weight
+    assert lazy_tx.vsize == transaction.vsize
+    assert lazy_tx.serialize() == transaction.serialize()
+    assert lazy_tx.serialize(False) == transaction.serialize(False)
+    assert lazy_tx.to_tx() == transaction
+
+
+def test_lazy_tx() -> None:
+    # a4b76807519aba5740f7865396bc4c5ca0eb8aa7c3744ca2db88fcc9e345424c
+    tx_bytes = "01000000000102322d4f05c3a4f78e97deda01bd8fc5ff96777b62c8f2daa72b02b70fa1e3e1051600000017160014e123a5263695be634abf3ad3456b4bf15f09cc6afffffffffdfee6e881f12d80cbcd6dc54c3fe390670678ebd26c3ae2dd129f41882e3efc25000000171600145946c8c3def6c79859f01b34ad537e7053cf8e73ffffffff02c763ac050000000017a9145ffd6df9bd06dedb43e7b72675388cbfc883d2098727eb180a000000001976a9145f9e96f739198f65d249ea2a0336e9aa5aa0c7ed88ac024830450221009b364c1074c602b2c5a411f4034573a486847da9c9c2467596efba8db338d33402204ccf4ac0eb7793f93a1b96b599e011fe83b3e91afdc4c7ab82d765ce1da25ace01210334d50996c36638265ad8e3cd127506994100dd7f24a5828155d531ebaf736e160247304402200c6dd55e636a2e4d7e684bf429b7800a091986479d834a8d462fbda28cf6f8010220669d1f6d963079516172f5061f923ef90099136647b38cc4b3be2a80b820bdf90121030aa2a1c2344bc8f38b7a726134501a2a45db28df8b4bee2df4428544c62d731400000000"
+    lazy_tx = LazyTx(tx_bytes)
+    assert lazy_tx.has_witness
+    assert lazy_tx.txid == (
+        "a4b76807519aba5740f7865396bc4c5ca0eb8aa7c3744ca2db88fcc9e345424c"
+    )
+    _assert_same(lazy_tx, Tx.deserialize(tx_bytes))
+
+    # https://en.bitcoin.it/wiki/Protocol_documentation#tx
+    tx_bytes = "01000000016dbddb085b1d8af75184f0bc01fad58d1266e9b63b50881990e4b40d6aee3629000000008b483045022100f3581e1972ae8ac7c7367a7a253bc1135223adb9a468bb3a59233f45bc578380022059af01ca17d00e41837a1d58e97aa31bae584edec28d35bd96923690913bae9a0141049c02bfc97ef236ce6d8fe5d94013c721e915982acd2b12b65d9b7d59e20a842005f8fc4e02532e873d37b96f09d6d4511ada8f14042f46614a4c70c0f14beff5ffffffff02404b4c00000000001976a9141aa0cd1cbea6e7458a7abad512a9d9ea1afb225e88ac80fae9c7000000001976a9140eab5bea436a0484cfab12485efda0b78b4ecc5288ac00000000"
+    lazy_tx = LazyTx(bytearray.fromhex(tx_bytes))
+    assert not lazy_tx.has_witness
+    _assert_same(lazy_tx, Tx.deserialize(tx_bytes))
+
+    err_msg = "truncated transaction: "
+    for truncated in (tx_bytes[:-2], tx_bytes[:100], tx_bytes[:8]):
+        with pytest.raises(ValueError, match=err_msg):
+            LazyTx(truncated)
+
+
+def test_block_transactions() -> None:
+    for fname in ("block_170.bin", "block_200000.bin", "block_481824.bin"):
+        filename = os.path.join(os.path.dirname(__file__), "test_data", fname)
+        block_bytes = open(filename, "rb").read()
+        block = Block.deserialize(block_bytes)
+
+        # transactions are parsed in place, one after the other
+        n, offset = varint.decode_at(block_bytes, 80)
+        for transaction in block.transactions:
+            lazy_tx = LazyTx(block_bytes, offset)
+            _assert_same(lazy_tx, transaction)
+            offset = lazy_tx.end
+        assert offset == len(block_bytes)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.merkle` module."
+
+from os import path
+
+import pytest
+
+from btclib.blocks import Block
+from btclib.merkle import (
+    MerkleTree,
+    PartialMerkleTree,
+    merkle_root_from_proof,
+    verify_proof,
+    witness_commitment,
+)
+from btclib.utils import hash256
+
+
+def _block(fname: str) -> Block:
+    filename = path.join(path.dirname(__file__), "test_data", fname)
+    with open(filename, "rb") as f:
+        return Block.deserialize(f.read())
+
+
+def test_merkle_tree() -> None:
+    block = _block("block_200000.bin")
+    txids = [bytes.fromhex(t.txid)[::-1] for t in block.transactions]
+    tree = MerkleTree(txids)
+    assert tree.root == block.header.merkleroot
+    assert tree.root_bytes == bytes.fromhex(block.header.merkleroot)[::-1]
+    assert tree.leaves == 388
+    assert tree.height == 9
+    assert tree.node(0, 5) == txids[5]
+    assert tree.node(1, 0) == hash256(txids[0] + txids[1])
+    # odd level: the last node is hashed with itself
+    assert tree.node(3, 48) == hash256(tree.node(2, 96) + tree.node(2, 96))
+
+    for i in (0, 1, 2, 193, 386, 387):
+        proof = tree.proof(i)
+        assert len(proof) == tree.height
+        assert merkle_root_from_proof(txids[i], i, proof) == tree.root_bytes
+        assert verify_proof(txids[i], i, proof, tree.root_bytes)
+        assert not verify_proof(txids[i], i ^ 1, proof, tree.root_bytes)
+        assert not verify_proof(txids[i + 1 - 2 * (i % 2)], i, proof, tree.root_bytes)
+    assert not verify_proof(txids[0], 1 << tree.height, tree.proof(0), tree.root_bytes)
+
+    # single leaf tree
+    tree = MerkleTree(txids[:1])
+    assert tree.root_bytes == txids[0]
+    assert tree.height == 0
+    assert tree.proof(0) == []
+
+    with pytest.raises(ValueError, match="empty merkle tree"):
+        MerkleTree([])
+    with pytest.raises(ValueError, match="invalid hash length: 31"):
+        MerkleTree([txids[0][1:]])
+    with pytest.raises(IndexError, match="invalid leaf index: 1"):
+        tree.proof(1)
+    with pytest.raises(IndexError, match="invalid index at level 0: 1"):
+        tree.node(0, 1)
+
+
+def test_partial_merkle_tree() -> None:
+    block = _block("block_200000.bin")
+    txids = [bytes.fromhex(t.txid)[::-1] for t in block.transactions]
+
+    for n in (1, 2, 3, 7, 388):
+        tree = MerkleTree(txids[:n])
+        for selected in ([], [0], [n - 1], [0, n // 2, n - 1], list(range(n))):
+            matches = [i in selected for i in range(n)]
+            partial = tree.partial(matches)
+            partial2 = PartialMerkleTree.deserialize(partial.serialize())
+            assert partial2.hashes == partial.hashes
+            # flags are padded to a multiple of 8
+            assert partial2.flags[: len(partial.flags)] == partial.flags
+            root, matched = partial2.extract()
+            assert root == tree.root_bytes
+            assert matched == [(i, txids[i]) for i in sorted(set(selected))]
+
+    tree = MerkleTree(txids[:3])
+    partial = tree.partial([False, False, True])
+    assert len(partial.hashes) == 2
+
+    with pytest.raises(ValueError, match="2 matches for 3 leaves"):
+        tree.partial([True, False])
+    with pytest.raises(ValueError, match="empty partial merkle tree"):
+        PartialMerkleTree(0, [], []).extract()
+    with pytest.raises(ValueError, match="too many leaves: "):
+        PartialMerkleTree(20000, [], []).extract()
+    with pytest.raises(ValueError, match="more hashes than leaves"):
+        PartialMerkleTree(1, [txids[0], txids[1]], [True, True]).extract()
+    with pytest.raises(ValueError, match="fewer flags than hashes"):
+        PartialMerkleTree(3, partial.hashes, partial.flags[:1]).extract()
+    with pytest.raises(ValueError, match="not enough flags"):
+        PartialMerkleTree(3, partial.hashes[:1], partial.flags[:1]).extract()
+    with pytest.raises(ValueError, match="not enough hashes"):
+        PartialMerkleTree(3, partial.hashes[:1], partial.flags).extract()
+    with pytest.raises(ValueError, match="unused hashes"):
+        PartialMerkleTree(3, partial.hashes + txids[:1], partial.flags).extract()
+    flags = partial.flags + [False] * 8
+    with pytest.raises(ValueError, match="unused flags"):
+        PartialMerkleTree(3, partial.hashes, flags).extract()
+    with pytest.raises(ValueError, match="truncated partial merkle tree hashes"):
+        PartialMerkleTree.deserialize(partial.serialize()[:40])
+
+    # CVE-2012-2459: duplicated last transactions
+    tree = MerkleTree(txids[:2] + txids[1:2])
+    assert tree.root_bytes == MerkleTree(txids[:2] + txids[1:2] * 2).root_bytes
+    partial = MerkleTree(txids[:2] + txids[1:2] * 2).partial([True] * 4)
+    with pytest.raises(ValueError, match="duplicated sibling hashes"):
+        partial.extract()
+
+
+def test_witness_commitment() -> None:
+    block = _block("block_481824_complete.bin")
+    # OP_RETURN aa21a9ed commitment
+    commitment = block.transactions[0].vout[-1].scriptPubKey[1]
+    assert isinstance(commitment, str)
+    assert block.witness_commitment().hex() == commitment[8:].lower()
+
+    wtxids = [bytes.fromhex(t.hash)[::-1] for t in block.transactions]
+    reserved = block.transactions[0].vin[0].txinwitness[0]
+    assert witness_commitment(wtxids, reserved) == block.witness_commitment()
+    # the coinbase wtxid is ignored
+    wtxids[0] = b"\x01" * 32
+    assert witness_commitment(wtxids, reserved) == block.witness_commitment()
+    assert witness_commitment(wtxids) == witness_commitment(wtxids, "00" * 32)
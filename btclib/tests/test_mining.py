@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.mining` module."
+
+import pytest
+
+from btclib import script
+from btclib.blocks import Block
+from btclib.header_chain import HeaderChain, target_from_compact
+from btclib.mining import _search_nonces, mine, subsidy
+from btclib.tx import Tx
+from btclib.tx_in import OutPoint, TxIn
+from btclib.tx_out import TxOut
+
+REGTEST_BITS = bytes.fromhex("207fffff")
+SCRIPT_PUBKEY = script.encode(["OP_1"])
+
+
+def test_subsidy() -> None:
+    assert subsidy(0) == 50 * 100000000
+    assert subsidy(209999) == 50 * 100000000
+    assert subsidy(210000) == 25 * 100000000
+    assert subsidy(150, 150) == 25 * 100000000
+    assert subsidy(64 * 210000) == 0
+
+
+def test_regtest_chain() -> None:
+    genesis = mine("00" * 32, 0, SCRIPT_PUBKEY, 1296688602, REGTEST_BITS)
+    genesis.assert_valid()
+    chain = HeaderChain(genesis.header.serialize(), network="regtest")
+
+    blocks = [genesis]
+    for height in range(1, 21):
+        previous = blocks[-1].header.hash
+        time = 1296688602 + 600 * height
+        block = mine(previous, height, SCRIPT_PUBKEY, time, REGTEST_BITS)
+        blocks.append(block)
+    assert chain.add_headers(b"".join(b.header.serialize() for b in blocks)) == 20
+    assert chain.height == 20
+    assert chain.tip == blocks[-1].header.hash
+
+    block = blocks[17]
+    # round trip, including validation
+    assert Block.deserialize(block.serialize()) == block
+    coinbase = block.transactions[0]
+    # BIP34 height push, then the extranonce push
+    assert coinbase.vin[0].scriptSigHex[:6] == "0111" "04"
+    assert coinbase.vout[0].nValue == subsidy(17)
+    assert script.encode(coinbase.vout[0].scriptPubKey) == SCRIPT_PUBKEY
+
+
+def test_transactions() -> None:
+    previous = "00" * 32
+    txs = []
+    for i in range(3):
+        tx_in = TxIn(OutPoint(f"{i + 1:064x}", 0), [], "", 0xFFFFFFFF, [])
+        if i:
+            tx_in.txinwitness = ["00" * 72, "02" * 33]
+        tx_out = TxOut(1000, ["OP_0", "00" * 20])
+        txs.append(Tx(2, 0, [tx_in], [tx_out]))
+
+    block = mine(previous, 500, SCRIPT_PUBKEY, 1296688602, REGTEST_BITS, txs, 300)
+    block.assert_valid()
+    assert block.transactions[1:] == txs
+    coinbase = block.transactions[0]
+    assert coinbase.vout[0].nValue == subsidy(500) + 300
+    commitment = b"\xaa\x21\xa9\xed" + block.witness_commitment()
+    assert coinbase.vout[1].scriptPubKey == script.decode(b"\x6a\x24" + commitment)
+    assert coinbase.vin[0].txinwitness == ["00" * 32]
+
+    # no witness commitment without witness data
+    block = mine(previous, 500, SCRIPT_PUBKEY, 1296688602, REGTEST_BITS, txs[:1])
+    block.assert_valid()
+    assert len(block.transactions[0].vout) == 1
+    assert block.transactions[0].vin[0].txinwitness == []
+
+
+def test_extranonce() -> None:
+    # a target met by about one header every 256 hashes
+    bits = bytes.fromhex("1f00ffff")
+    previous = "00" * 32
+    block = mine(previous, 1, SCRIPT_PUBKEY, 1296688602, bits, extranonce_size=1)
+    block.assert_valid()
+
+    header = block.header.serialize()
+    target = target_from_compact(0x1F00FFFF)
+    assert _search_nonces(header[:76], target, 0, block.header.nonce) == -1
+    nonce = block.header.nonce
+    assert _search_nonces(header[:76], target, 0, nonce + 1) == nonce
+
+    args = (previous, 1, SCRIPT_PUBKEY, 1296688602, bits)
+    # OP_1 height push, OP_PUSHDATA1 extranonce push: 100 bytes scriptSig
+    block = mine(*args, extranonce_size=97)
+    block.assert_valid()
+    assert len(block.transactions[0].vin[0].scriptSigHex) == 200
+    for extranonce_size in (0, -1, 98):
+        with pytest.raises(ValueError, match="invalid extranonce size: "):
+            mine(*args, extranonce_size=extranonce_size)
+
+
+def test_workers() -> None:
+    bits = bytes.fromhex("1f00ffff")
+    previous = "00" * 32
+    block = mine(previous, 1, SCRIPT_PUBKEY, 1296688602, bits)
+    # same lowest nonce, searching chunks in parallel
+    parallel = mine(
+        previous, 1, SCRIPT_PUBKEY, 1296688602, bits, max_workers=2, chunk_size=64
+    )
+    assert parallel == block
@@ -63,3 +63,41 @@ def test_wordlist_2() -> None:
     _wordlists.load_lang(lang, filename)
     length = _wordlists.language_length(lang)
     assert length == 2048
+
+
+def test_wordlist_indexes() -> None:
+    lang = "en"
+    wordlist = _wordlists.wordlist(lang)
+    for i, word in enumerate(wordlist):
+        assert _wordlists.index(word, lang) == i
+        assert _wordlists.word_from_prefix(word, lang) == word
+        assert _wordlists.word_from_prefix(word[:4], lang) == word
+        assert _wordlists.nearest_words(word, lang) == [word]
+
+    err_msg = "'abandom' is not in the 'en' word-list"
+    with pytest.raises(ValueError, match=err_msg):
+        _wordlists.index("abandom", lang)
+    with pytest.raises(ValueError, match="is not in the 'en' word-list"):
+        _indexes_from_mnemonic("abandon abandom", lang)
+
+    assert _wordlists.word_from_prefix("aban", lang) == "abandon"
+    assert _wordlists.word_from_prefix("abando", lang) == "abandon"
+    for prefix in ("aba", "abam", "abandom", "abandonn"):
+        err_msg = f"'{prefix}' is not a 'en' word-list prefix"
+        with pytest.raises(ValueError, match=err_msg):
+            _wordlists.word_from_prefix(prefix, lang)
+
+
+def test_nearest_words() -> None:
+    lang = "en"
+    # deletion, insertion, substitution, and transposition
+    for typo in ("abandn", "abandonn", "abandom", "abnadon", "bandon"):
+        assert _wordlists.nearest_words(typo, lang) == ["abandon"]
+    assert _wordlists.nearest_words("aple", lang) == ["able", "apple", "maple"]
+    assert _wordlists.nearest_words("zo", lang) == ["zoo"]
+    # edit distance two
+    assert _wordlists.nearest_words("abndn", lang) == []
+    assert _wordlists.nearest_words("xyzw", lang) == []
+
+    lang = "it"
+    assert _wordlists.nearest_words("abacco", lang) == ["abaco", "tabacco"]
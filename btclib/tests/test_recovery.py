@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.recovery` module."
+
+from typing import List
+
+import pytest
+
+from btclib import bip32
+from btclib.mnemonic import _wordlists
+from btclib.network import NETWORKS
+from btclib.recovery import candidates_from_mnemonic, recover
+from btclib.slip132 import address_from_xkey
+
+mnemonic = "zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo zoo wrong"
+xprv = "xprv9s21ZrQH143K2V4oox4M8Zmhi2Fjx5XK4Lf7GKRvPSgydU3mjZuKGCTg7UPiBUD7ydVPvSLtg9hjp7MQTYsW67rZHAXeccqYqrsx8LcXnyd"
+
+
+def test_candidates_from_mnemonic() -> None:
+    wordlist = _wordlists.wordlist("en")
+    words = "zoo ? abando zooo xyzw aple"
+    candidates = candidates_from_mnemonic(words)
+    assert candidates == [["zoo"], wordlist, ["abandon"], wordlist, wordlist, wordlist]
+    # mistyped words are narrowed to their nearest words only if required
+    candidates = candidates_from_mnemonic(words, max_distance=1)
+    exp = [
+        ["zoo"],
+        wordlist,
+        ["abandon"],
+        ["zoo"],
+        wordlist,
+        ["able", "apple", "maple"],
+    ]
+    assert candidates == exp
+    with pytest.raises(ValueError, match="unsupported max_distance: 2"):
+        candidates_from_mnemonic(words, max_distance=2)
+    candidates = candidates_from_mnemonic("zoo * zoo", wildcard="*")
+    assert candidates == [["zoo"], wordlist, ["zoo"]]
+
+
+def test_recover_fingerprint() -> None:
+    fingerprint = bip32.deserialize(bip32.derive(xprv, "m/0"))["parent_fingerprint"]
+    candidates = candidates_from_mnemonic(mnemonic)
+    # restrict the search space to speed up the test
+    candidates[5] = _wordlists.wordlist("en")[-256:]
+    passphrases = ["", "trezor", "TREZOR"]
+
+    checkpoints: List[int] = []
+    args = (candidates, passphrases, fingerprint)
+    result = recover(*args, checkpoint=checkpoints.append, batch_size=64)
+    assert result == (mnemonic, "TREZOR")
+    # the solution is the last word in the last batch
+    assert checkpoints == [64, 128, 192]
+
+    # resume from a checkpoint
+    assert recover(*args, start=192, processes=False) == (mnemonic, "TREZOR")
+    # nothing left to search
+    assert recover(*args, start=256) is None
+
+    assert recover(candidates, [""], fingerprint, processes=False) is None
+
+
+def test_recover_address() -> None:
+    candidates = candidates_from_mnemonic(mnemonic)
+    candidates[5] = _wordlists.wordlist("en")[-32:]
+    passphrases = ["", "TREZOR"]
+    mainnet = NETWORKS["mainnet"]
+    for der_path, version in (
+        ("m/44h/0h/0h/0/0", mainnet["bip32_prv"]),
+        ("m/49h/0h/0h/0/0", mainnet["slip132_p2wpkh_p2sh_prv"]),
+        ("m/84h/0h/0h/0/0", mainnet["slip132_p2wpkh_prv"]),
+    ):
+        xkey = bip32.derive(xprv, der_path, version)
+        address = address_from_xkey(xkey)
+        result = recover(candidates, passphrases, address=address, processes=False)
+        assert result == (mnemonic, "TREZOR")
+
+    # explicit derivation path
+    address = address_from_xkey(bip32.derive(xprv, "m/0/1"))
+    result = recover(
+        candidates, passphrases, address=address, der_path="m/0/1", processes=False
+    )
+    assert result == (mnemonic, "TREZOR")
+
+
+def test_exceptions() -> None:
+    candidates = candidates_from_mnemonic(mnemonic)
+
+    err_msg = "either fingerprint or address must be provided"
+    with pytest.raises(ValueError, match=err_msg):
+        recover(candidates)
+    with pytest.raises(ValueError, match=err_msg):
+        recover(
+            candidates,
+            fingerprint="00" * 4,
+            address="1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2",
+        )
+
+    with pytest.raises(ValueError, match="Wrong number of words: "):
+        recover(candidates[:-1], fingerprint="00" * 4)
+
+    address = "bc1qrp33g0q5c5txsp9arysrx4k6zdkfs4nce4xj0gdcccefvpysxf3qccfmv3"
+    with pytest.raises(ValueError, match="unmanaged address type: "):
+        recover(candidates, address=address)
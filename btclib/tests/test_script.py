@@ -126,6 +126,48 @@ def test_op_pushdata() -> None:
     assert len(script._op_pushdata(b)) == (length + 1) + 3
 
 
+def test_encoded_size() -> None:
+    script_list: List[List[Token]] = [
+        ["ab cd ef", "OP_TRUE"],
+        ["1A DD", " op_dup ", "1ADD", b"\x1a\xdd"],
+        [0, 16, -1, 17, -17, 2 ** 31, "OP_1NEGATE", ""],
+        ["1F" * 75, "1F" * 76, "1F " * 255, "1F" * 256, "1F" * 520],
+    ]
+    for tokens in script_list:
+        assert script.encoded_size(tokens) == len(script.encode(tokens))
+
+    for token in ("zz", "abc", "ab c"):
+        with pytest.raises(ValueError, match="invalid string token: "):
+            script.encode([token])
+        with pytest.raises(ValueError, match="invalid string token: "):
+            script.encoded_size([token])
+    with pytest.raises(ValueError, match="Too many bytes for OP_PUSHDATA: 521"):
+        script.encoded_size(["1F" * 521])
+
+
+def test_raw_data() -> None:
+    script_list: List[List[Token]] = [
+        [2, 3, "OP_ADD", 5, "OP_EQUAL"],
+        ["1ADD", "OP_1ADD", "1ADE", "OP_EQUAL"],
+        ["1F" * 75, "OP_DROP", "1F" * 76, "OP_DROP", "1F" * 520, "OP_DROP"],
+        ["OP_RETURN", "11" * 79],
+    ]
+    for tokens in script_list:
+        script_bytes = script.encode(tokens)
+        raw_tokens = script.decode(script_bytes, raw_data=True)
+        assert raw_tokens == [
+            bytes.fromhex(t) if isinstance(t, str) and t[:3] != "OP_" else t
+            for t in tokens
+        ]
+        assert script.encode(raw_tokens) == script_bytes
+        serialized = script.serialize(tokens)
+        assert script.deserialize(serialized, raw_data=True) == raw_tokens
+
+    # A scriptPubKey with OP_PUSHDATA4 can be decoded
+    script_bytes = bytes.fromhex("4e09020000" + "00" * 521 + "75")
+    assert script.decode(script_bytes, True) == [b"\x00" * 521, "OP_DROP"]
+
+
 def test_encoding():
     script_bytes = b"jKBIP141 \\o/ Hello SegWit :-) keep it strong! LLAP Bitcoin twitter.com/khs9ne"
     assert script.encode(script.decode(script_bytes)) == script_bytes
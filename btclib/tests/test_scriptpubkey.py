@@ -12,14 +12,18 @@
 
 import json
 from os import path
+from typing import List
 
 import pytest
 
 from btclib import base58address, bech32address, script
 from btclib.base58address import b58address_from_h160, b58address_from_witness
 from btclib.bech32address import b32address_from_witness
+from btclib.blocks import Block
 from btclib.network import NETWORKS
 from btclib.scriptpubkey import (
+    classify,
+    classify_many,
     nulldata,
     p2ms,
     p2pk,
@@ -34,6 +38,7 @@ from btclib.scriptpubkey_address import (
     address_from_scriptPubKey,
     scriptPubKey_from_address,
 )
+from btclib.tx_out import TxOut
 from btclib.utils import hash160, sha256
 
 
@@ -569,3 +574,67 @@ def test_CLT() -> None:
     address = b"bc1q0df3qvuuvqqlw4s5m2jsswpelf2dgct97mzkqfwv2nfe02z62uyq7n4zjj"
     assert address == address_from_scriptPubKey(scriptPubKey, network)
     assert address == b32address_from_witness(0, payload, network)
+
+
+def test_classify() -> None:
+    pubkey = "02 79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798"
+    uncompressed_pubkey = "04 cc71eb30d653c0c3163990c47b976f3fb3f37cccdcbedb169a1dfef58bbfbfaf f7d8a473e7e2e6d317b87bafe8bde97e3cf8f065dec022b51d11fcdd0d348ac4"
+    pubkeys = [pubkey, uncompressed_pubkey]
+    scriptPubKeys = [
+        p2pk(pubkey),
+        p2pk(uncompressed_pubkey),
+        p2ms(pubkeys, 1),
+        p2pkh(pubkey),
+        p2sh(p2pkh(pubkey)),
+        p2wpkh(pubkey),
+        p2wsh(p2pkh(pubkey)),
+        nulldata(b"\x00" * 10),
+        nulldata(b"\x00" * 80),
+    ]
+    for scriptPubKey in scriptPubKeys:
+        script_type, payload = classify(scriptPubKey)
+        exp_type, exp_payload, _ = payload_from_scriptPubKey(scriptPubKey)
+        assert script_type == exp_type
+        if script_type == "p2ms":
+            assert isinstance(exp_payload, list)
+            exp_payload = b"".join(script._op_pushdata(k) for k in exp_payload)
+        assert payload == exp_payload
+        # zero-copy views
+        assert payload.obj is scriptPubKey
+
+    assert classify_many(scriptPubKeys) == [classify(s) for s in scriptPubKeys]
+
+    # a p2wpkh witness program ending with 0xAE is not a p2ms
+    scriptPubKey = b"\x00\x14" + b"\x00" * 19 + b"\xae"
+    assert classify(scriptPubKey)[0] == "p2wpkh"
+    assert payload_from_scriptPubKey(scriptPubKey)[0] == "p2wpkh"
+
+    unknown_scripts = [
+        b"",
+        b"\x6a",
+        b"\x6a\x01",
+        # the last pubkey is shorter than 33 bytes
+        p2ms(pubkeys, 1)[:-3] + b"\x52\xae",
+        # wrong n
+        p2ms(pubkeys, 1)[:-2] + b"\x53\xae",
+        script.encode(["OP_1", "OP_1", "OP_CHECKMULTISIG"]),
+    ]
+    for scriptPubKey in unknown_scripts:
+        assert classify(scriptPubKey) == ("unknown", scriptPubKey)
+
+
+def test_classify_block() -> None:
+    fname = "block_481824_complete.bin"
+    filename = path.join(path.dirname(__file__), "test_data", fname)
+    with open(filename, "rb") as f:
+        block = Block.deserialize(f.read())
+    vout: List[TxOut] = [tx_out for t in block.transactions for tx_out in t.vout]
+    scriptPubKeys = [script.encode(tx_out.scriptPubKey) for tx_out in vout]
+    for scriptPubKey, (script_type, payload) in zip(
+        scriptPubKeys, classify_many(scriptPubKeys)
+    ):
+        if script_type == "unknown":
+            with pytest.raises(ValueError):
+                payload_from_scriptPubKey(scriptPubKey)
+        elif script_type in ("p2pkh", "p2sh", "p2wpkh", "p2wsh"):
+            assert payload_from_scriptPubKey(scriptPubKey)[1] == payload
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.sigcache` module."
+
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+
+import pytest
+
+from btclib import dsa, ssa
+from btclib.curve import CURVES
+from btclib.hashes import reduce_to_hlen
+from btclib.secpoint import bytes_from_point
+from btclib.sigcache import SignatureCache
+
+
+def test_dsa_cache() -> None:
+    msg = "Satoshi Nakamoto"
+    q, Q = dsa.gen_keys(0x01)
+    sig = dsa.sign(msg, q)
+
+    cache = SignatureCache()
+    assert dsa.verify(msg, Q, sig, cache=cache)
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (0, 1)
+    # different representations of the same key and signature
+    assert dsa.verify(msg, bytes_from_point(Q), dsa.serialize(*sig), cache=cache)
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # invalid signatures are not cached
+    assert not dsa.verify("Craig Wright", Q, sig, cache=cache)
+    assert not dsa.verify("Craig Wright", Q, sig, cache=cache)
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (1, 3)
+    # malformed data is rejected before looking up the cache
+    assert not dsa.verify(msg, Q, (0, sig[1]), cache=cache)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    # different curve
+    ec = CURVES["secp256r1"]
+    q, Q = dsa.gen_keys(0x01, ec)
+    sig = dsa.sign(msg, q, ec=ec)
+    assert dsa.verify(msg, Q, sig, ec, cache=cache)
+    assert len(cache) == 2
+
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_ssa_cache() -> None:
+    msg = "Satoshi Nakamoto"
+    q, x_Q = ssa.gen_keys(0x01)
+    sig = ssa.sign(msg, q)
+
+    cache = SignatureCache()
+    assert ssa.verify(msg, x_Q, sig, cache=cache)
+    assert ssa.verify(msg, x_Q.to_bytes(32, "big"), ssa.serialize(*sig), cache=cache)
+    assert len(cache) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not ssa.verify("Craig Wright", x_Q, sig, cache=cache)
+    assert len(cache) == 1
+
+    # the same data is not confused with an ECDSA entry
+    m = reduce_to_hlen(msg, sha256)
+    Q = ssa.point_from_bip340pubkey(x_Q)
+    ssa_entry = cache.entry("BIP340", m, Q, sig, CURVES["secp256k1"], sha256)
+    assert ssa_entry in cache
+    dsa_entry = cache.entry("ECDSA", m, Q, sig, CURVES["secp256k1"], sha256)
+    assert dsa_entry not in cache
+
+
+def test_eviction() -> None:
+    cache = SignatureCache(max_entries=3)
+    for i in range(3):
+        cache.add(bytes([i]))
+    # refresh the oldest entry
+    assert b"\x00" in cache
+    cache.add(b"\x03")
+    assert len(cache) == 3
+    assert b"\x01" not in cache
+    assert b"\x00" in cache
+
+    with pytest.raises(ValueError, match="invalid max_entries: 0"):
+        SignatureCache(0)
+
+
+def test_salt() -> None:
+    msg = "Satoshi Nakamoto"
+    q, Q = dsa.gen_keys(0x01)
+    sig = dsa.sign(msg, q)
+    m = reduce_to_hlen(msg, sha256)
+    ec = CURVES["secp256k1"]
+
+    args = ("ECDSA", m, Q, sig, ec, sha256)
+    assert SignatureCache().entry(*args) != SignatureCache().entry(*args)
+    salt = b"\x00" * 32
+    assert SignatureCache(salt=salt).entry(*args) == SignatureCache(salt=salt).entry(
+        *args
+    )
+
+
+def test_threads() -> None:
+    msgs = [f"message {i}" for i in range(8)]
+    q, Q = dsa.gen_keys(0x01)
+    sigs = [dsa.sign(msg, q) for msg in msgs]
+
+    cache = SignatureCache(max_entries=4)
+
+    def verify(i: int) -> bool:
+        return dsa.verify(msgs[i % 8], Q, sigs[i % 8], cache=cache)
+
+    with ThreadPoolExecutor(4) as executor:
+        assert all(executor.map(verify, range(32)))
+    assert len(cache) == 4
+    assert cache.hits + cache.misses == 32
@@ -11,12 +11,25 @@
 "Tests for `btclib.sighash` module."
 
 # test vector at https://github.com/bitcoin/bips/blob/master/bip-0143.mediawiki
-from btclib import script, tx, tx_out
+from hashlib import sha256
+from os import path
+
+import pytest
+
+from btclib import dsa, script, tx, tx_out, varint
+from btclib.blocks import Block
+from btclib.scriptpubkey import p2ms, p2pkh, p2sh, p2wpkh
 from btclib.sighash import (
+    SighashCache,
+    _find_and_delete,
     _get_witness_v0_scriptCodes,
     get_sighash,
+    legacy_sighash,
     segwit_v0_sighash,
+    tapleaf_hash,
+    taproot_sighash,
 )
+from btclib.utils import hash256
 
 
 def test_native_p2wpkh():
@@ -179,3 +192,470 @@ def test_wrapped_p2wsh():
         get_sighash(transaction, previous_txout, 0, 0x83).hex()
         == "511e8e52ed574121fc1b654970395502128263f62662e076dc6baf05c2e6a99b"
     )
+
+
+def test_sighash_cache():
+    transaction = tx.Tx.deserialize(
+        "0100000002fe3dc9208094f3ffd12645477b3dc56f60ec4fa8e6f5d67c565d1c6b9216b36e0000000000ffffffff0815cf020f013ed6cf91d29f4202e8a58726b1ac6c79da47c23d1bee0a6925f80000000000ffffffff0100f2052a010000001976a914a30741f8145e5acadf23f751864167f32e0963f788ac00000000"
+    )
+    transaction.vin[1].txinwitness = [
+        "21026dccc749adc2a9d0d89497ac511f760f45c47dc5ed9cf352a58ac706453880aeadab210255a9626aebf5e29c0e6538428ba0d1dcf6ca98ffdf086aa8ced5e0d0215ea465ac"
+    ]
+    previous_txout = tx.TxOut(
+        nValue=4900000000,
+        scriptPubKey=script.decode(
+            "00205d1b56b63d714eebe542309525f484b7e9d6f686b3781b6f61ef925d66d6f6a0"
+        ),
+    )
+
+    cache = SighashCache(transaction)
+    for hashtype in (0x01, 0x02, 0x03, 0x81, 0x82, 0x83):
+        sighash = get_sighash(transaction, previous_txout, 1, hashtype)
+        assert sighash == get_sighash(transaction, previous_txout, 1, hashtype, cache)
+    # the transaction-wide hashes have been computed only once
+    hashPrevouts = cache.hashPrevouts
+    assert cache.hashPrevouts is hashPrevouts
+
+    other_transaction = tx.Tx.deserialize(transaction.serialize())
+    err_msg = "the sighash cache is bound to another transaction"
+    with pytest.raises(ValueError, match=err_msg):
+        get_sighash(other_transaction, previous_txout, 1, 0x01, cache)
+
+
+def _naive_segwit_v0_sighash(scriptCode, transaction, i, hashtype, amount):
+    "Serialize the BIP143 preimage from scratch."
+
+    anyonecanpay = hashtype & 0x80
+    base_type = hashtype & 0x1F
+    hashPrevouts = hashSequence = hashOutputs = b"\x00" * 32
+    if not anyonecanpay:
+        hashPrevouts = hash256(b"".join(v.prevout.serialize() for v in transaction.vin))
+    if not anyonecanpay and base_type not in (2, 3):
+        hashSequence = hash256(
+            b"".join(v.nSequence.to_bytes(4, "little") for v in transaction.vin)
+        )
+    if base_type not in (2, 3):
+        hashOutputs = hash256(b"".join(o.serialize() for o in transaction.vout))
+    elif base_type == 3 and i < len(transaction.vout):
+        hashOutputs = hash256(transaction.vout[i].serialize())
+    preimage = transaction.nVersion.to_bytes(4, "little")
+    preimage += hashPrevouts + hashSequence
+    preimage += transaction.vin[i].prevout.serialize()
+    preimage += varint.encode(len(scriptCode)) + scriptCode
+    preimage += amount.to_bytes(8, "little")
+    preimage += transaction.vin[i].nSequence.to_bytes(4, "little")
+    preimage += hashOutputs
+    preimage += transaction.nLockTime.to_bytes(4, "little")
+    preimage += hashtype.to_bytes(4, "little")
+    return hash256(preimage)
+
+
+def test_segwit_v0_hashtypes():
+    transaction = tx.Tx.deserialize(
+        "0100000002fe3dc9208094f3ffd12645477b3dc56f60ec4fa8e6f5d67c565d1c6b9216b36e0000000000ffffffff0815cf020f013ed6cf91d29f4202e8a58726b1ac6c79da47c23d1bee0a6925f80000000000ffffffff0100f2052a010000001976a914a30741f8145e5acadf23f751864167f32e0963f788ac00000000"
+    )
+    scriptCode = script.encode(["OP_TRUE"])
+    cache = SighashCache(transaction)
+    # including the non-standard 0x00 and 0x04 base types
+    for i in range(2):
+        for hashtype in (0x00, 0x01, 0x02, 0x03, 0x04, 0x80, 0x81, 0x82, 0x83, 0x84):
+            exp = _naive_segwit_v0_sighash(scriptCode, transaction, i, hashtype, 1000)
+            assert cache.segwit_v0_sighash(scriptCode, i, hashtype, 1000) == exp
+
+    for i in (-1, 2):
+        with pytest.raises(ValueError, match=f"invalid input index: {i}"):
+            cache.segwit_v0_sighash(scriptCode, i, 0x01, 1000)
+
+
+def _naive_legacy_sighash(scriptCode, transaction, input_index, hashtype):
+    "Serialize the whole modified transaction (no OP_CODESEPARATOR)."
+
+    base_type = hashtype & 0x1F
+    if base_type == 3 and input_index >= len(transaction.vout):
+        return (1).to_bytes(32, "little")
+    indexes = range(len(transaction.vin))
+    if hashtype & 0x80:
+        indexes = range(input_index, input_index + 1)
+    preimage = transaction.nVersion.to_bytes(4, "little")
+    preimage += varint.encode(len(indexes))
+    for i in indexes:
+        vin = transaction.vin[i]
+        preimage += vin.prevout.serialize()
+        code = scriptCode if i == input_index else b""
+        preimage += varint.encode(len(code)) + code
+        if i != input_index and base_type in (2, 3):
+            preimage += b"\x00" * 4
+        else:
+            preimage += vin.nSequence.to_bytes(4, "little")
+    if base_type == 2:
+        preimage += b"\x00"
+    elif base_type == 3:
+        preimage += varint.encode(input_index + 1)
+        preimage += (b"\xff" * 8 + b"\x00") * input_index
+        preimage += transaction.vout[input_index].serialize()
+    else:
+        preimage += varint.encode(len(transaction.vout))
+        preimage += b"".join(vout.serialize() for vout in transaction.vout)
+    preimage += transaction.nLockTime.to_bytes(4, "little")
+    preimage += hashtype.to_bytes(4, "little")
+    return hash256(preimage)
+
+
+def test_legacy_sighash():
+    fname = "block_200000.bin"
+    filename = path.join(path.dirname(__file__), "test_data", fname)
+    with open(filename, "rb") as f:
+        block = Block.deserialize(f.read())
+
+    # multi-input multi-output transaction
+    transaction = next(t for t in block.transactions if len(t.vin) > 2)
+    scriptCode = script.encode(["OP_DUP", "OP_HASH160", "00" * 20, "OP_EQUALVERIFY"])
+    cache = SighashCache(transaction)
+    n = len(transaction.vin)
+    for i in range(n):
+        for hashtype in (0x01, 0x02, 0x03, 0x81, 0x82, 0x83, 0x00, 0x04):
+            exp = _naive_legacy_sighash(scriptCode, transaction, i, hashtype)
+            assert (
+                legacy_sighash(scriptCode, transaction, i, hashtype, None, cache) == exp
+            )
+    # the SIGHASH_SINGLE bug
+    i = len(transaction.vout)
+    assert i < n
+    sighash = legacy_sighash(scriptCode, transaction, i, 0x03)
+    assert sighash == (1).to_bytes(32, "little")
+
+    with pytest.raises(ValueError, match="invalid input index: "):
+        legacy_sighash(scriptCode, transaction, n, 0x01)
+
+    # actual p2pkh signatures
+    verified = 0
+    for transaction in block.transactions[1:40]:
+        cache = SighashCache(transaction)
+        for i, vin in enumerate(transaction.vin):
+            if len(vin.scriptSig) != 2:
+                continue
+            sig, pubkey = (bytes.fromhex(token) for token in vin.scriptSig)
+            previous_output = tx_out.TxOut(1, script.decode(p2pkh(pubkey)))
+            sighash = get_sighash(transaction, previous_output, i, sig[-1], cache)
+            assert dsa._verify(sighash, pubkey, sig[:-1])
+            verified += 1
+    assert verified > 20
+
+
+def test_p2sh_script_code():
+    transaction = tx.Tx.deserialize(
+        "0100000002fe3dc9208094f3ffd12645477b3dc56f60ec4fa8e6f5d67c565d1c6b9216b36e0000000000ffffffff0815cf020f013ed6cf91d29f4202e8a58726b1ac6c79da47c23d1bee0a6925f80000000000ffffffff0100f2052a010000001976a914a30741f8145e5acadf23f751864167f32e0963f788ac00000000"
+    )
+    pubkey = "02" + "79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798"
+    redeem_script = p2ms([pubkey], 1)
+    previous_txout = tx_out.TxOut(100000, script.decode(p2sh(redeem_script)))
+
+    # the redeem script is the scriptCode
+    sig = "30" * 71 + "01"
+    transaction.vin[0].scriptSig = [0, sig, redeem_script.hex()]
+    sighash = get_sighash(transaction, previous_txout, 0, 0x01)
+    assert sighash == legacy_sighash(redeem_script, transaction, 0, 0x01)
+    assert sighash != legacy_sighash(
+        script.encode(transaction.vin[0].scriptSig), transaction, 0, 0x01
+    )
+
+    # p2sh-wrapped p2wpkh, as actual scriptSig
+    redeem_script = p2wpkh(pubkey)
+    previous_txout = tx_out.TxOut(100000, script.decode(p2sh(redeem_script)))
+    transaction.vin[0].scriptSig = [redeem_script.hex()]
+    sighash = get_sighash(transaction, previous_txout, 0, 0x01)
+    scriptCode = _get_witness_v0_scriptCodes(script.decode(redeem_script))[0]
+    assert sighash == segwit_v0_sighash(
+        bytes.fromhex(scriptCode), transaction, 0, 0x01, 100000
+    )
+
+    for scriptSig in ([], [sig, "OP_CHECKSIG"], [sig, 1]):
+        transaction.vin[0].scriptSig = scriptSig
+        with pytest.raises(ValueError, match="missing p2sh redeem script"):
+            get_sighash(transaction, previous_txout, 0, 0x01)
+
+
+def test_legacy_script_code():
+    transaction = tx.Tx.deserialize(
+        "0100000002fe3dc9208094f3ffd12645477b3dc56f60ec4fa8e6f5d67c565d1c6b9216b36e0000000000ffffffff0815cf020f013ed6cf91d29f4202e8a58726b1ac6c79da47c23d1bee0a6925f80000000000ffffffff0100f2052a010000001976a914a30741f8145e5acadf23f751864167f32e0963f788ac00000000"
+    )
+    sig = bytes.fromhex("30" * 71)
+    push = script._op_pushdata(sig)
+    code = script.encode(["OP_1", "OP_DROP", "OP_CHECKSIG"])
+
+    # OP_CODESEPARATORs are removed
+    codesep = script.encode(["OP_1", "OP_CODESEPARATOR", "OP_DROP", "OP_CHECKSIG"])
+    sighash = legacy_sighash(codesep, transaction, 0, 0x01)
+    assert sighash == _naive_legacy_sighash(code, transaction, 0, 0x01)
+    # but not if they are push data
+    push_ab = script.encode(["ab", "OP_DROP"])
+    sighash = legacy_sighash(push_ab, transaction, 0, 0x01)
+    assert sighash == _naive_legacy_sighash(push_ab, transaction, 0, 0x01)
+
+    # the signature push is removed (FindAndDelete)
+    sighash = legacy_sighash(push + code + push, transaction, 0, 0x01, sig)
+    assert sighash == _naive_legacy_sighash(code, transaction, 0, 0x01)
+    assert _find_and_delete(push + code + push, push) == code
+    # ... at opcode boundaries only
+    pushed = script._op_pushdata(push)
+    assert _find_and_delete(pushed + code, push) == pushed + code
+    # ... repeatedly, but without re-scanning
+    assert _find_and_delete(push + push + code, push) == code
+    assert _find_and_delete(b"\x02\x02\x02\x02", b"\x02\x02") == b""
+    assert _find_and_delete(code, b"") == code
+    # the unparsable tail is kept
+    assert _find_and_delete(push + code + b"\x4c", push) == code + b"\x4c"
+    assert _find_and_delete(push + code + b"\x02\x01", push) == code + b"\x02\x01"
+
+
+def _tagged_hash(tag, m):
+    tag_hash = sha256(tag.encode()).digest()
+    return sha256(tag_hash + tag_hash + m).digest()
+
+
+def _naive_taproot_sighash(
+    transaction, i, hashtype, spent_outputs, annex=None, leaf_hash=None
+):
+    "Serialize the whole BIP341 SigMsg."
+
+    anyonecanpay = hashtype & 0x80
+    base_type = hashtype & 0x03
+    msg = bytes([0, hashtype])
+    msg += transaction.nVersion.to_bytes(4, "little")
+    msg += transaction.nLockTime.to_bytes(4, "little")
+    if not anyonecanpay:
+        msg += sha256(b"".join(v.prevout.serialize() for v in transaction.vin)).digest()
+        msg += sha256(b"".join(o.serialize()[:8] for o in spent_outputs)).digest()
+        msg += sha256(b"".join(o.serialize()[8:] for o in spent_outputs)).digest()
+        msg += sha256(
+            b"".join(v.nSequence.to_bytes(4, "little") for v in transaction.vin)
+        ).digest()
+    if base_type not in (2, 3):
+        msg += sha256(b"".join(o.serialize() for o in transaction.vout)).digest()
+    msg += bytes([(2 if leaf_hash else 0) + (1 if annex else 0)])
+    if anyonecanpay:
+        msg += transaction.vin[i].prevout.serialize()
+        msg += spent_outputs[i].serialize()
+        msg += transaction.vin[i].nSequence.to_bytes(4, "little")
+    else:
+        msg += i.to_bytes(4, "little")
+    if annex:
+        msg += sha256(varint.encode(len(annex)) + annex).digest()
+    if base_type == 3:
+        msg += sha256(transaction.vout[i].serialize()).digest()
+    if leaf_hash:
+        msg += leaf_hash + b"\x00" + b"\xff" * 4
+    return _tagged_hash("TapSighash", msg)
+
+
+def test_taproot_sighash():
+    transaction = tx.Tx.deserialize(
+        "0100000002fe3dc9208094f3ffd12645477b3dc56f60ec4fa8e6f5d67c565d1c6b9216b36e0000000000ffffffff0815cf020f013ed6cf91d29f4202e8a58726b1ac6c79da47c23d1bee0a6925f80000000000ffffffff0100f2052a010000001976a914a30741f8145e5acadf23f751864167f32e0963f788ac00000000"
+    )
+    spent_outputs = [
+        tx_out.TxOut(1000, script.decode("5120" + "11" * 32)),
+        tx_out.TxOut(2000, script.decode("5120" + "22" * 32)),
+    ]
+    cache = SighashCache(transaction, spent_outputs)
+    annex = b"\x50\x01\x02"
+    leaf_script = script.encode(["OP_TRUE"])
+    leaf_hash = tapleaf_hash(leaf_script)
+    exp = _tagged_hash("TapLeaf", b"\xc0\x01" + leaf_script)
+    assert leaf_hash == exp
+    for i in range(2):
+        for hashtype in (0x00, 0x01, 0x02, 0x03, 0x81, 0x82, 0x83):
+            if hashtype & 0x03 == 0x03 and i > 0:
+                err_msg = "missing SIGHASH_SINGLE output: "
+                with pytest.raises(ValueError, match=err_msg):
+                    cache.taproot_sighash(i, hashtype)
+                continue
+            for extra in ({}, {"annex": annex}, {"leaf_hash": leaf_hash}):
+                sighash = cache.taproot_sighash(i, hashtype, **extra)
+                exp = _naive_taproot_sighash(
+                    transaction, i, hashtype, spent_outputs, **extra
+                )
+                assert sighash == exp
+                args = (transaction, i, hashtype, spent_outputs)
+                assert taproot_sighash(*args, **extra) == exp
+
+    # key path
+    sighash = cache.taproot_sighash(0, 0x01)
+    assert get_sighash(transaction, spent_outputs[0], 0, 0x01, cache) == sighash
+    # script path, with annex
+    control_block = b"\xc0" + b"\x33" * 32
+    transaction.vin[0].txinwitness = [
+        "",
+        leaf_script.hex(),
+        control_block.hex(),
+        annex.hex(),
+    ]
+    sighash = cache.taproot_sighash(0, 0x00, annex, leaf_hash)
+    assert get_sighash(transaction, spent_outputs[0], 0, 0x00, cache) == sighash
+
+    err_msg = "taproot signature hashes require the spent outputs"
+    with pytest.raises(ValueError, match=err_msg):
+        get_sighash(transaction, spent_outputs[0], 0, 0x00)
+    with pytest.raises(ValueError, match="1 spent outputs for 2 inputs"):
+        SighashCache(transaction, spent_outputs[:1])
+    with pytest.raises(ValueError, match="invalid taproot hash type: "):
+        cache.taproot_sighash(0, 0x04)
+    with pytest.raises(ValueError, match="invalid input index: "):
+        cache.taproot_sighash(2, 0x00)
+    with pytest.raises(ValueError, match="missing spent outputs"):
+        SighashCache(transaction).taproot_sighash(0, 0x00)
+
+
+class _RawTxOut(tx_out.TxOut):
+    "TxOut with a raw scriptPubKey, not decodable as script tokens."
+
+    def __init__(self, nValue, script_bytes):
+        super().__init__(nValue, [])
+        self.script_bytes = script_bytes
+
+    def serialize_into(self, out):
+        out += self.nValue.to_bytes(8, "little")
+        out += varint.encode(len(self.script_bytes)) + self.script_bytes
+
+
+# BIP341 wallet-test-vectors.json, keyPathSpending
+# https://github.com/bitcoin/bips/blob/master/bip-0341/wallet-test-vectors.json
+def test_bip341_key_path_vectors():
+    # the second output scriptPubKey (32 random bytes) is not decodable
+    raw_script = bytes.fromhex(
+        "ac9a87f5594be208f8532db38cff670c450ed2fea8fcdefcc9a663f78bab962b"
+    )
+    raw_tx = "02000000097de20cbff686da83a54981d2b9bab3586f4ca7e48f57f5b55963115f3b334e9c010000000000000000d7b7cab57b1393ace2d064f4d4a2cb8af6def61273e127517d44759b6dafdd990000000000fffffffff8e1f583384333689228c5d28eac13366be082dc57441760d957275419a418420000000000fffffffff0689180aa63b30cb162a73c6d2a38b7eeda2a83ece74310fda0843ad604853b0100000000feffffffaa5202bdf6d8ccd2ee0f0202afbbb7461d9264a25e5bfd3c5a52ee1239e0ba6c0000000000feffffff956149bdc66faa968eb2be2d2faa29718acbfe3941215893a2a3446d32acd050000000000000000000e664b9773b88c09c32cb70a2a3e4da0ced63b7ba3b22f848531bbb1d5d5f4c94010000000000000000e9aa6b8e6c9de67619e6a3924ae25696bb7b694bb677a632a74ef7eadfd4eabf0000000000ffffffffa778eb6a263dc090464cd125c466b5a99667720b1c110468831d058aa1b82af10100000000ffffffff0200ca9a3b000000001976a91406afd46bcdfd22ef94ac122aa11f241244a37ecc88ac807840cb0000000020ac9a87f5594be208f8532db38cff670c450ed2fea8fcdefcc9a663f78bab962b0065cd1d"
+    transaction = tx.Tx.deserialize(
+        raw_tx.replace(raw_script.hex(), "00" * 32), check_validity=False
+    )
+    transaction.vout[1] = _RawTxOut(transaction.vout[1].nValue, raw_script)
+    assert transaction.serialize(include_witness=False).hex() == raw_tx
+    utxos_spent = [
+        (
+            "512053a1f6e454df1aa2776a2814a721372d6258050de330b3c6d10ee8f4e0dda343",
+            420000000,
+        ),
+        (
+            "5120147c9c57132f6e7ecddba9800bb0c4449251c92a1e60371ee77557b6620f3ea3",
+            462000000,
+        ),
+        ("76a914751e76e8199196d454941c45d1b3a323f1433bd688ac", 294000000),
+        (
+            "5120e4d810fd50586274face62b8a807eb9719cef49c04177cc6b76a9a4251d5450e",
+            504000000,
+        ),
+        (
+            "512091b64d5324723a985170e4dc5a0f84c041804f2cd12660fa5dec09fc21783605",
+            630000000,
+        ),
+        ("00147dd65592d0ab2fe0d0257d571abf032cd9db93dc", 378000000),
+        (
+            "512075169f4001aa68f15bbed28b218df1d0a62cbbcf1188c6665110c293c907b831",
+            672000000,
+        ),
+        (
+            "5120712447206d7a5238acc7ff53fbe94a3b64539ad291c7cdbc490b7577e4b17df5",
+            546000000,
+        ),
+        (
+            "512077e30a5522dd9f894c3f8b8bd4c4b2cf82ca7da8a3ea6a239655c39c050ab220",
+            588000000,
+        ),
+    ]
+    spent_outputs = [
+        tx_out.TxOut(amount, script.decode(scriptPubKey))
+        for scriptPubKey, amount in utxos_spent
+    ]
+    cache = SighashCache(transaction, spent_outputs)
+    # intermediary
+    assert (
+        cache.sha_amounts.hex()
+        == "58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde6"
+    )
+    assert (
+        cache.sha_outputs.hex()
+        == "a2e6dab7c1f0dcd297c8d61647fd17d821541ea69c3cc37dcbad7f90d4eb4bc5"
+    )
+    assert (
+        cache.sha_prevouts.hex()
+        == "e3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f"
+    )
+    assert (
+        cache.sha_scriptpubkeys.hex()
+        == "23ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e21"
+    )
+    assert (
+        cache.sha_sequences.hex()
+        == "18959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957e"
+    )
+
+    # (txinIndex, hashType, sigMsg, sigHash)
+    input_spending = [
+        (
+            0,
+            0x03,  # SIGHASH_SINGLE
+            "0003020000000065cd1de3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde623ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e2118959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957e0000000000d0418f0e9a36245b9a50ec87f8bf5be5bcae434337b87139c3a5b1f56e33cba0",
+            "2514a6272f85cfa0f45eb907fcb0d121b808ed37c6ea160a5a9046ed5526d555",
+        ),
+        (
+            1,
+            0x83,  # SIGHASH_SINGLE | SIGHASH_ANYONECANPAY
+            "0083020000000065cd1d00d7b7cab57b1393ace2d064f4d4a2cb8af6def61273e127517d44759b6dafdd9900000000808f891b00000000225120147c9c57132f6e7ecddba9800bb0c4449251c92a1e60371ee77557b6620f3ea3ffffffffffcef8fb4ca7efc5433f591ecfc57391811ce1e186a3793024def5c884cba51d",
+            "325a644af47e8a5a2591cda0ab0723978537318f10e6a63d4eed783b96a71a4d",
+        ),
+        (
+            3,
+            0x01,  # SIGHASH_ALL
+            "0001020000000065cd1de3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde623ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e2118959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957ea2e6dab7c1f0dcd297c8d61647fd17d821541ea69c3cc37dcbad7f90d4eb4bc50003000000",
+            "bf013ea93474aa67815b1b6cc441d23b64fa310911d991e713cd34c7f5d46669",
+        ),
+        (
+            4,
+            0x00,  # SIGHASH_DEFAULT
+            "0000020000000065cd1de3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde623ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e2118959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957ea2e6dab7c1f0dcd297c8d61647fd17d821541ea69c3cc37dcbad7f90d4eb4bc50004000000",
+            "4f900a0bae3f1446fd48490c2958b5a023228f01661cda3496a11da502a7f7ef",
+        ),
+        (
+            6,
+            0x02,  # SIGHASH_NONE
+            "0002020000000065cd1de3b33bb4ef3a52ad1fffb555c0d82828eb22737036eaeb02a235d82b909c4c3f58a6964a4f5f8f0b642ded0a8a553be7622a719da71d1f5befcefcdee8e0fde623ad0f61ad2bca5ba6a7693f50fce988e17c3780bf2b1e720cfbb38fbdd52e2118959c7221ab5ce9e26c3cd67b22c24f8baa54bac281d8e6b05e400e6c3a957e0006000000",
+            "15f25c298eb5cdc7eb1d638dd2d45c97c4c59dcaec6679cfc16ad84f30876b85",
+        ),
+        (
+            7,
+            0x82,  # SIGHASH_NONE | SIGHASH_ANYONECANPAY
+            "0082020000000065cd1d00e9aa6b8e6c9de67619e6a3924ae25696bb7b694bb677a632a74ef7eadfd4eabf00000000804c8b2000000000225120712447206d7a5238acc7ff53fbe94a3b64539ad291c7cdbc490b7577e4b17df5ffffffff",
+            "cd292de50313804dabe4685e83f923d2969577191a3e1d2882220dca88cbeb10",
+        ),
+        (
+            8,
+            0x81,  # SIGHASH_ALL | SIGHASH_ANYONECANPAY
+            "0081020000000065cd1da2e6dab7c1f0dcd297c8d61647fd17d821541ea69c3cc37dcbad7f90d4eb4bc500a778eb6a263dc090464cd125c466b5a99667720b1c110468831d058aa1b82af101000000002b0c230000000022512077e30a5522dd9f894c3f8b8bd4c4b2cf82ca7da8a3ea6a239655c39c050ab220ffffffff",
+            "cccb739eca6c13a8a89e6e5cd317ffe55669bbda23f2fd37b0f18755e008edd2",
+        ),
+    ]
+    for i, hashtype, sig_msg, sig_hash in input_spending:
+        sig_msg_bytes = bytes.fromhex(sig_msg)
+        assert _tagged_hash("TapSighash", sig_msg_bytes).hex() == sig_hash
+        assert cache.taproot_sighash(i, hashtype).hex() == sig_hash
+        args = (transaction, i, hashtype, spent_outputs)
+        assert taproot_sighash(*args).hex() == sig_hash
+        assert _naive_taproot_sighash(*args).hex() == sig_hash
+
+        # the key path vectors have no annex:
+        # it sets the spend_type bit and its hash follows the input data
+        annex = b"\x50" + sig_msg_bytes[:3]
+        sha_annex = sha256(varint.encode(len(annex)) + annex).digest()
+        # epoch, hash_type, nVersion, nLockTime, and the non-ANYONECANPAY hashes
+        spend_type_pos = 10 + (0 if hashtype & 0x80 else 128)
+        if hashtype & 0x03 not in (0x02, 0x03):
+            spend_type_pos += 32  # sha_outputs
+        assert sig_msg_bytes[spend_type_pos] == 0
+        input_data_end = (
+            spend_type_pos + 1 + (36 + 8 + 35 + 4 if hashtype & 0x80 else 4)
+        )
+        msg = sig_msg_bytes[:spend_type_pos] + b"\x01"
+        msg += sig_msg_bytes[spend_type_pos + 1 : input_data_end] + sha_annex
+        msg += sig_msg_bytes[input_data_end:]
+        exp = _tagged_hash("TapSighash", msg)
+        assert cache.taproot_sighash(i, hashtype, annex) == exp
@@ -10,9 +10,12 @@
 
 "Tests for `btclib.tx` module."
 
+from typing import List
+
 import pytest
 
 from btclib import tx, tx_in, tx_out
+from btclib.alias import Token
 
 
 def test_coinbase_1() -> None:
@@ -114,6 +117,72 @@ def test_double_witness() -> None:
     assert transaction.vsize == 259
 
 
+def test_frozen() -> None:
+    tx_bytes = "010000000001019bdea7abb2fa14dead47dd14d03cf82212a25b6096a8da6b14feec3658dbcf9d0100000000ffffffff02a02526000000000017a914f987c321394968be164053d352fc49763b2be55c874361610000000000220020701a8d401c84fb13e6baf169d59684e17abd9fa216c8cc5b9fc63d622ff8c58d04004730440220421fbbedf2ee096d6289b99973509809d5e09589040d5e0d453133dd11b2f78a02205686dbdb57e0c44e49421e9400dd4e931f1655332e8d078260c9295ba959e05d014730440220398f141917e4525d3e9e0d1c6482cb19ca3188dc5516a3a5ac29a0f4017212d902204ea405fae3a58b1fc30c5ad8ac70a76ab4f4d876e8af706a6a7b4cd6fa100f44016952210375e00eb72e29da82b89367947f29ef34afb75e8654f6ea368e0acdfd92976b7c2103a1b26313f430c4b15bb1fdce663207659d8cac749a0e53d70eff01874496feff2103c96d495bfdd5ba4145e3e046fee45e84a8a48ad05bd8dbb395c011a32cf9f88053ae00000000"
+
+    transaction = tx.Tx.deserialize(tx_bytes)
+    assert not transaction.frozen
+    txid = transaction.txid
+    wtxid = transaction.hash
+    transaction.freeze()
+    assert transaction.frozen
+    assert transaction == tx.Tx.deserialize(tx_bytes)
+    for _ in range(2):
+        assert transaction.serialize().hex() == tx_bytes
+        assert transaction.txid == txid
+        assert transaction.hash == wtxid
+        assert transaction.size == 380
+        assert transaction.weight == 758
+        assert transaction.vsize == 190
+
+    # replacing a field clears the cache
+    transaction.nLockTime = 1
+    assert transaction.frozen
+    assert transaction.serialize().hex() == tx_bytes[:-8] + "01000000"
+    assert transaction.txid != txid
+
+    # in-place changes require unfreezing
+    transaction.unfreeze()
+    transaction.nLockTime = 0
+    transaction.vin[0].txinwitness = []
+    assert transaction.txid == txid
+    assert transaction.hash == txid
+    assert transaction.size == transaction.vsize == len(transaction.serialize())
+
+
+def test_sizes() -> None:
+    prevout = tx_in.OutPoint("11" * 32, 0)
+    for length in (0, 1, 74, 75, 76, 77, 254, 255, 256, 257, 520):
+        data = "ab" * length
+        scripts: List[List[Token]] = [
+            [data],
+            [bytes.fromhex(data), "OP_CHECKSIG"],
+            [0, 16, -1, 17, -17, 2 ** 31, " op_dup ", data.upper()],
+        ]
+        for tokens in scripts:
+            transaction_in = tx_in.TxIn(prevout, tokens, "", 0xFFFFFFFF, [])
+            assert transaction_in.size == len(transaction_in.serialize())
+            transaction_out = tx_out.TxOut(1, tokens)
+            assert transaction_out.size == len(transaction_out.serialize())
+    # hex-string tokens with internal spaces
+    transaction = tx.Tx(
+        1,
+        0,
+        [tx_in.TxIn(prevout, ["ab cd ef"], "", 0xFFFFFFFF, [])],
+        [tx_out.TxOut(1, ["OP_TRUE"])],
+    )
+    assert transaction.size == len(transaction.serialize()) == 65
+    transaction.vin[0].txinwitness = ["ab cd", "", "01 02 03"]
+    assert transaction.size == len(transaction.serialize())
+    assert transaction.weight == transaction.size * 4 - 11 * 3
+    transaction_out = tx_out.TxOut(1, ["ab" * 521])
+    with pytest.raises(ValueError, match="Too many bytes for OP_PUSHDATA: 521"):
+        transaction_out.size
+    transaction_out = tx_out.TxOut(1, ["abc"])
+    with pytest.raises(ValueError, match="invalid string token: "):
+        transaction_out.size
+
+
 def test_invalid_tx_in() -> None:
     transaction_input = tx_in.TxIn(
         prevout=tx_in.OutPoint("00" * 31 + "01", 256 ** 4 - 1),
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.tx_graph` module."
+
+import random
+from typing import List, Tuple
+
+import pytest
+
+from btclib.alias import Token
+from btclib.tx import Tx
+from btclib.tx_graph import PackageStats, TxGraph
+from btclib.tx_in import OutPoint, TxIn
+from btclib.tx_out import TxOut
+
+SCRIPT: List[Token] = ["OP_0", "00" * 20]
+
+
+def _tx(prevouts: List[Tuple[str, int]], outputs: int = 2) -> Tx:
+    vin = [TxIn(OutPoint(h, n), [], "", 0xFFFFFFFF, []) for h, n in prevouts]
+    vout = [TxOut(1000 + i, SCRIPT) for i in range(outputs)]
+    return Tx(2, 0, vin, vout)
+
+
+def _check(graph: TxGraph) -> None:
+    "Compare the cached stats with the ones computed from scratch."
+    for txid in graph:
+        for stats, txids in (
+            (graph.ancestor_stats(txid), graph.ancestors(txid)),
+            (graph.descendant_stats(txid), graph.descendants(txid)),
+        ):
+            txids.add(txid)
+            assert stats.count == len(txids)
+            transactions = [graph.get(t) for t in txids]
+            assert stats.vsize == sum(t.vsize for t in transactions if t)
+            assert stats.fee == sum(graph.fee(t) for t in txids)
+
+
+def test_cpfp() -> None:
+    graph = TxGraph()
+    parent = _tx([("11" * 32, 0)])
+    child = _tx([(parent.txid, 1)])
+    assert graph.add(parent, 100) == parent.txid
+    graph.add(child, 10 * child.vsize)
+    assert len(graph) == 2
+    assert child.txid in graph
+    assert graph.get(parent.txid) == parent
+    assert graph.get("00" * 32) is None
+    assert graph.parents(child.txid) == {parent.txid}
+    assert graph.children(parent.txid) == {child.txid}
+    assert graph.spender(OutPoint(parent.txid, 1)) == child.txid
+    assert graph.spender(OutPoint(parent.txid, 0)) is None
+
+    stats = graph.ancestor_stats(child.txid)
+    assert stats == PackageStats(2, parent.vsize + child.vsize, 100 + 10 * child.vsize)
+    assert stats.fee_rate == stats.fee / stats.vsize
+    assert graph.descendant_stats(parent.txid) == stats
+    assert graph.descendant_stats(child.txid).count == 1
+    assert PackageStats().fee_rate == 0.0
+
+    # the parent is confirmed
+    assert graph.remove_for_block([parent]) == []
+    assert graph.ancestor_stats(child.txid) == PackageStats(
+        1, child.vsize, 10 * child.vsize
+    )
+    assert graph.parents(child.txid) == set()
+
+
+def test_errors() -> None:
+    graph = TxGraph()
+    tx = _tx([("11" * 32, 0)])
+    graph.add(tx, 100)
+    with pytest.raises(ValueError, match="duplicated transaction: "):
+        graph.add(tx, 100)
+    with pytest.raises(ValueError, match="negative fee: -1"):
+        graph.add(_tx([("22" * 32, 0)]), -1)
+    with pytest.raises(ValueError, match=f"conflicting transaction: {tx.txid}"):
+        graph.add(_tx([("22" * 32, 0), ("11" * 32, 0)]), 100)
+    with pytest.raises(ValueError, match="unknown transaction: "):
+        graph.ancestor_stats("00" * 32)
+    with pytest.raises(ValueError, match="unknown transaction: "):
+        graph.remove("00" * 32)
+
+
+def test_conflicts() -> None:
+    graph = TxGraph()
+    tx = _tx([("11" * 32, 0)])
+    child = _tx([(tx.txid, 0), (tx.txid, 1)])
+    grandchild = _tx([(child.txid, 0)])
+    for i, t in enumerate([tx, child, grandchild]):
+        graph.add(t, 100 * i)
+    other = _tx([("22" * 32, 0)])
+    graph.add(other, 100)
+
+    replacement = _tx([("11" * 32, 0)], 1)
+    assert graph.remove_for_block([replacement]) == [tx, child, grandchild]
+    assert list(graph) == [other.txid]
+    assert graph.remove_with_descendants(other.txid) == [other]
+    assert len(graph) == 0
+
+
+def test_random_order() -> None:
+    random.seed(42)
+    transactions: List[Tx] = []
+    outputs: List[Tuple[str, int]] = [(f"{i:064x}", 0) for i in range(20)]
+    for _ in range(200):
+        # diamonds: a transaction can spend several outputs of its ancestors
+        prevouts = random.sample(outputs, min(len(outputs), random.randint(1, 3)))
+        for prevout in prevouts:
+            outputs.remove(prevout)
+        tx = _tx(prevouts, random.randint(1, 3))
+        outputs.extend((tx.txid, n) for n in range(len(tx.vout)))
+        transactions.append(tx)
+
+    graph = TxGraph()
+    # children can be added before their parents
+    shuffled = random.sample(transactions, len(transactions))
+    for i, tx in enumerate(shuffled):
+        graph.add(tx, i * 7)
+    _check(graph)
+
+    for tx in random.sample(transactions, 50):
+        graph.remove(tx.txid)
+    _check(graph)
+    # a block including some roots
+    roots = [t for t in transactions if t.txid in graph and not graph.parents(t.txid)]
+    graph.remove_for_block(roots[:10])
+    _check(graph)
+    leaf = next(t for t in graph if graph.ancestors(t) and not graph.children(t))
+    graph.remove(leaf)
+    _check(graph)
+    parent = next(t for t in graph if graph.children(t))
+    removed = graph.remove_with_descendants(parent)
+    assert removed[0].txid == parent
+    _check(graph)
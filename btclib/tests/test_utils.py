@@ -23,6 +23,7 @@ from btclib.utils import (
     bytes_from_octets,
     hash160,
     hash256,
+    hash256_slices,
     hex_string,
     int_from_integer,
 )
@@ -39,6 +40,9 @@ def test_hash160_hash256() -> None:
         s = b.hex()  # lower case, no spaces
         assert hash160(hexstring) == hash160(s)
         assert hash256(hexstring) == hash256(s)
+        view = memoryview(bytearray(b))
+        assert hash256_slices(view[:3], b[3:]) == hash256(b)
+    assert hash256_slices() == hash256(b"")
 
 
 def test_int_from_integer() -> None:
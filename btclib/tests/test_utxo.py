@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.utxo` module."
+
+from os import path
+
+import pytest
+
+from btclib import script
+from btclib.block_files import LazyBlock
+from btclib.mining import mine, subsidy
+from btclib.psbt import Psbt, PsbtIn
+from btclib.scriptpubkey import p2pk, p2pkh, p2wpkh
+from btclib.sighash import SighashCache
+from btclib.tx import Tx
+from btclib.tx_in import OutPoint, TxIn
+from btclib.tx_out import TxOut
+from btclib.utxo import UtxoSet, compress_amount, decompress_amount
+
+REGTEST_BITS = bytes.fromhex("207fffff")
+PUBKEY = "02" + "79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798"
+UNCOMPRESSED_PUBKEY = (
+    "04"
+    "79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798"
+    "483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8"
+)
+
+
+def test_compress_amount() -> None:
+    # test vectors from Bitcoin Core compress_tests.cpp
+    assert compress_amount(0) == 0x0
+    assert compress_amount(1) == 0x1
+    assert compress_amount(1000000) == 0x7
+    assert compress_amount(100000000) == 0x9
+    assert compress_amount(50 * 100000000) == 0x32
+    assert compress_amount(21000000 * 100000000) == 0x1406F40
+    for amount in range(0, 100000, 7):
+        assert decompress_amount(compress_amount(amount)) == amount
+    for amount in (2099999997690000, 12345678901234, 100000000000):
+        assert decompress_amount(compress_amount(amount)) == amount
+
+
+@pytest.mark.parametrize(
+    "scriptPubKey",
+    [
+        p2pkh(PUBKEY),
+        script.encode(["OP_HASH160", "00" * 20, "OP_EQUAL"]),
+        p2pk(PUBKEY),
+        p2pk(UNCOMPRESSED_PUBKEY),
+        # not on the curve: not compressed
+        bytes.fromhex("4104" + "00" * 64 + "ac"),
+        p2wpkh(PUBKEY),
+        b"",
+    ],
+)
+def test_coins(scriptPubKey: bytes) -> None:
+    utxo_set = UtxoSet()
+    outpoint = OutPoint("11" * 32, 3)
+    tx_out = TxOut(12345, script.decode(scriptPubKey))
+    utxo_set.add(outpoint, tx_out, 1000, True)
+    assert outpoint in utxo_set
+    assert outpoint.serialize() in utxo_set
+    assert utxo_set.get_coin(outpoint) == (12345, scriptPubKey, 1000, True)
+    assert utxo_set.get(outpoint) == tx_out
+    assert len(utxo_set) == 1
+    assert utxo_set.spend(outpoint) == (12345, scriptPubKey, 1000, True)
+    assert outpoint not in utxo_set
+    assert utxo_set.get(outpoint) is None
+    assert len(utxo_set) == 0
+
+
+def test_hash_table() -> None:
+    utxo_set = UtxoSet(16)
+    tx_out = TxOut(50 * 100000000, script.decode(p2wpkh(PUBKEY)))
+    # many outpoints sharing the txid to force collisions
+    outpoints = [OutPoint(f"{i % 7:064x}", i) for i in range(3000)]
+    for height, outpoint in enumerate(outpoints):
+        utxo_set.add(outpoint, tx_out, height)
+    assert len(utxo_set) == 3000
+    for outpoint in outpoints[::3]:
+        utxo_set.spend(outpoint)
+    assert len(utxo_set) == 2000
+    utxo_set.compact()
+    for height, outpoint in enumerate(outpoints):
+        coin = utxo_set.get_coin(outpoint)
+        if height % 3:
+            assert coin is not None and coin[2] == height
+        else:
+            assert coin is None
+    with pytest.raises(ValueError, match="missing outpoint: "):
+        utxo_set.spend(outpoints[0])
+    with pytest.raises(ValueError, match="invalid outpoint size: 35"):
+        utxo_set.get(outpoints[1].serialize()[:35])
+
+    # replacement, as for the BIP30 duplicated coinbase transactions
+    utxo_set.add(outpoints[1], TxOut(1, tx_out.scriptPubKey), 5)
+    assert utxo_set.get_coin(outpoints[1]) == (1, p2wpkh(PUBKEY), 5, False)
+    assert len(utxo_set) == 2000
+
+
+def _spend(previous: Tx, n: int, scriptPubKey: bytes, fee: int = 1000) -> Tx:
+    tx_in = TxIn(OutPoint(previous.txid, n), [], "", 0xFFFFFFFF, [])
+    nValue = previous.vout[n].nValue - fee
+    vout = [
+        TxOut(nValue // 2, script.decode(scriptPubKey)),
+        TxOut(nValue - nValue // 2, script.decode(scriptPubKey)),
+        TxOut(0, ["OP_RETURN", "deadbeef"]),
+    ]
+    return Tx(2, 0, [tx_in], vout)
+
+
+def test_apply_undo(tmp_path) -> None:
+    scriptPubKey = p2wpkh(PUBKEY)
+    utxo_set = UtxoSet()
+    blocks = []
+    previous = "00" * 32
+    for height in range(3):
+        block = mine(previous, height, scriptPubKey, 1296688602, REGTEST_BITS)
+        previous = block.header.hash
+        blocks.append(block)
+        utxo_set.apply_block(block, height)
+    assert len(utxo_set) == 3
+    assert utxo_set.best_block == previous
+
+    coinbase = blocks[0].transactions[0]
+    tx1 = _spend(coinbase, 0, scriptPubKey)
+    # spending an output of the same block
+    tx2 = _spend(tx1, 1, p2pkh(PUBKEY))
+    block = mine(previous, 3, scriptPubKey, 1296688602, REGTEST_BITS, [tx1, tx2], 2000)
+    filename = str(tmp_path / "utxo.dat")
+    utxo_set.snapshot(filename)
+
+    undo = utxo_set.apply_block(LazyBlock(block.serialize()), 3)
+    assert utxo_set.best_block == block.header.hash
+    # spent: coinbase 0 and tx1:1; added: coinbase 3, tx1:0-1, tx2:0-1
+    assert len(utxo_set) == 3 - 2 + 5
+    assert OutPoint(coinbase.txid, 0) not in utxo_set
+    assert OutPoint(tx1.txid, 1) not in utxo_set
+    assert OutPoint(tx1.txid, 2) not in utxo_set
+    assert utxo_set.get_coin(OutPoint(tx2.txid, 0)) == (
+        tx2.vout[0].nValue,
+        p2pkh(PUBKEY),
+        3,
+        False,
+    )
+    block_coinbase = block.transactions[0]
+    coin = utxo_set.get_coin(OutPoint(block_coinbase.txid, 0))
+    assert coin == (subsidy(3) + 2000, scriptPubKey, 3, True)
+    tx3 = _spend(tx2, 0, scriptPubKey)
+    assert utxo_set.spent_outputs(tx3) == [tx2.vout[0]]
+    SighashCache(tx3, utxo_set.spent_outputs(tx3))
+    with pytest.raises(ValueError, match="missing outpoint: "):
+        utxo_set.spent_outputs(tx2)
+
+    # a block spending a missing output leaves the set unchanged
+    with pytest.raises(ValueError, match="missing outpoint: "):
+        utxo_set.apply_block(block, 4)
+    assert len(utxo_set) == 6
+    assert utxo_set.best_block == block.header.hash
+
+    utxo_set.undo_block(block, undo)
+    assert utxo_set.best_block == previous
+    loaded = UtxoSet.load(filename)
+    assert len(utxo_set) == len(loaded) == 3
+    assert loaded.best_block == utxo_set.best_block
+    for b in blocks:
+        outpoint = OutPoint(b.transactions[0].txid, 0)
+        assert utxo_set.get_coin(outpoint) == loaded.get_coin(outpoint)
+    loaded.apply_block(block, 3)
+    assert len(loaded) == 6
+
+    with pytest.raises(ValueError, match="invalid undo data size: "):
+        loaded.undo_block(block, undo + b"\x00")
+
+
+def test_snapshot_errors(tmp_path) -> None:
+    filename = str(tmp_path / "utxo.dat")
+    UtxoSet().snapshot(filename)
+    with open(filename, "rb") as f:
+        data = f.read()
+    assert len(UtxoSet.load(filename)) == 0
+
+    with open(filename, "wb") as f:
+        f.write(data[:-1])
+    with pytest.raises(ValueError, match="invalid UTXO snapshot size: "):
+        UtxoSet.load(filename)
+    with open(filename, "wb") as f:
+        f.write(b"\x00" + data[1:])
+    with pytest.raises(ValueError, match="invalid UTXO snapshot magic"):
+        UtxoSet.load(filename)
+    with open(filename, "wb") as f:
+        f.write(data[:12] + b"\x02" + data[13:])
+    with pytest.raises(ValueError, match="unsupported UTXO snapshot version: 2"):
+        UtxoSet.load(filename)
+    # the capacity must be a power of two, at least 16
+    for capacity in (8, 100):
+        header = data[:24] + capacity.to_bytes(8, "little") + data[32:72]
+        with open(filename, "wb") as f:
+            f.write(header + bytes(capacity * 44))
+        err_msg = f"invalid UTXO snapshot capacity: {capacity}"
+        with pytest.raises(ValueError, match=err_msg):
+            UtxoSet.load(filename)
+    with open(filename, "wb") as f:
+        f.write(data[:16] + (3 << 14 | 1).to_bytes(8, "little") + data[24:])
+    with pytest.raises(ValueError, match="invalid UTXO snapshot count: 49153"):
+        UtxoSet.load(filename)
+
+
+def test_block_200000() -> None:
+    filename = path.join(path.dirname(__file__), "test_data", "block_200000.bin")
+    with open(filename, "rb") as f:
+        lazy_block = LazyBlock(f.read())
+    block = lazy_block.to_block()
+
+    txids = {t.txid for t in block.transactions}
+    # fake coins for the outputs spent from previous blocks
+    utxo_set = UtxoSet()
+    tx_out = TxOut(100000000, script.decode(p2pkh(PUBKEY)))
+    for transaction in block.transactions[1:]:
+        for tx_in in transaction.vin:
+            if tx_in.prevout.hash not in txids:
+                utxo_set.add(tx_in.prevout, tx_out, 199999)
+    n = len(utxo_set)
+
+    undo = utxo_set.apply_block(block, 200000)
+    spent_in_block = [
+        tx_in.prevout
+        for t in block.transactions
+        for tx_in in t.vin
+        if tx_in.prevout.hash in txids
+    ]
+    outputs = sum(len(t.vout) for t in block.transactions)
+    assert len(utxo_set) == outputs - len(spent_in_block)
+    for transaction in block.transactions:
+        for i, tx_out in enumerate(transaction.vout):
+            outpoint = OutPoint(transaction.txid, i)
+            assert (outpoint in utxo_set) ^ (outpoint in spent_in_block)
+    utxo_set.undo_block(lazy_block, undo)
+    assert len(utxo_set) == n
+    for transaction in block.transactions[1:]:
+        for tx_in in transaction.vin:
+            if tx_in.prevout in spent_in_block:
+                continue
+            assert utxo_set.get_coin(tx_in.prevout) == (
+                100000000,
+                p2pkh(PUBKEY),
+                199999,
+                False,
+            )
+
+
+def test_fill_psbt() -> None:
+    utxo_set = UtxoSet()
+    utxo_set.add(OutPoint("11" * 32, 0), TxOut(1000, script.decode(p2wpkh(PUBKEY))), 1)
+    utxo_set.add(OutPoint("11" * 32, 1), TxOut(2000, script.decode(p2pkh(PUBKEY))), 1)
+    vin = [TxIn(OutPoint("11" * 32, i), [], "", 0xFFFFFFFF, []) for i in range(3)]
+    tx = Tx(2, 0, vin, [TxOut(2500, script.decode(p2wpkh(PUBKEY)))])
+    psbt = Psbt(tx, [PsbtIn() for _ in vin], [])
+    # segwit only, and only for known outputs
+    assert utxo_set.fill_psbt(psbt) == 1
+    assert psbt.inputs[0].witness_utxo == utxo_set.get(vin[0].prevout)
+    assert psbt.inputs[1].witness_utxo is None
+    assert psbt.inputs[2].witness_utxo is None
+    assert utxo_set.fill_psbt(psbt) == 0
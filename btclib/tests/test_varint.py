@@ -73,3 +73,14 @@ def test_varint_conversion() -> None:
     assert varint.decode("6a") == 106
     assert varint.decode("fd2602") == 550
     assert varint.decode("fe703a0f00") == 998000
+
+
+def test_decode_at() -> None:
+    for i in (0x00, 0xFC, 0xFD, 0xFFFF, 0x10000, 0xFFFFFFFF, 0x100000000):
+        b = b"\x01\x02" + varint.encode(i) + b"\x03"
+        for buffer in (b, memoryview(b)):
+            assert varint.decode_at(buffer, 2) == (i, len(b) - 1)
+        assert varint.size(i) == len(varint.encode(i))
+
+    with pytest.raises(ValueError, match="not enough data for a 4-bytes varint"):
+        varint.decode_at(b"\x00\xfe\x00\x00", 1)
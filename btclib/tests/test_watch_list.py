@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.watch_list` module."
+
+from os import path
+from typing import List
+
+from btclib import script
+from btclib.alias import Script
+from btclib.block_files import LazyBlock
+from btclib.scriptpubkey_address import address_from_scriptPubKey
+from btclib.tx_in import OutPoint
+from btclib.tx_out import TxOut
+from btclib.watch_list import Match, WatchList
+
+
+def _block_bytes() -> bytes:
+    filename = path.join(path.dirname(__file__), "test_data", "block_200000.bin")
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+def test_block() -> None:
+    data = _block_bytes()
+    block = LazyBlock(data).to_block()
+    txids = {t.txid for t in block.transactions}
+    # an output spent in the same block
+    spender = next(
+        t for t in block.transactions if any(i.prevout.hash in txids for i in t.vin)
+    )
+    i, spent = next(
+        (i, tx_in.prevout)
+        for i, tx_in in enumerate(spender.vin)
+        if tx_in.prevout.hash in txids
+    )
+    funding = next(t for t in block.transactions if t.txid == spent.hash)
+    spent_script = script.encode(funding.vout[spent.n].scriptPubKey)
+    # an output spent in a previous block
+    external = block.transactions[1].vin[0].prevout
+
+    p2pkh_script = next(
+        script.encode(o.scriptPubKey)
+        for t in block.transactions[2:]
+        for o in t.vout
+        if o.scriptPubKey[0] == "OP_DUP"
+    )
+    addresses = [address_from_scriptPubKey(p2pkh_script)]
+    # bytes, hex string, and tokens scriptPubKeys
+    scriptPubKeys: List[Script] = [spent_script, "51" * 25, script.decode("00" * 22)]
+
+    expected = [
+        (t.txid, i)
+        for t in block.transactions
+        for i, o in enumerate(t.vout)
+        if script.encode(o.scriptPubKey) in (spent_script, p2pkh_script)
+    ]
+    for scanned in (data, bytearray(data), LazyBlock(data), block):
+        watch_list = WatchList(scriptPubKeys, addresses, [external])
+        assert len(watch_list) == 4 + 1
+        matches = watch_list.match_block(scanned)
+        received = [(m.txid, m.index) for m in matches if not m.spent]
+        assert received == expected
+        spends = [m for m in matches if m.spent]
+        assert spends[0] == Match(
+            block.transactions[1].txid, 0, True, external.serialize(), b"", 0
+        )
+        nValue = funding.vout[spent.n].nValue
+        spent_match = Match(
+            spender.txid, i, True, spent.serialize(), spent_script, nValue
+        )
+        assert spent_match in spends
+        # spent outpoints are not watched anymore
+        assert external.serialize() not in watch_list.outpoints
+        assert spent.serialize() not in watch_list.outpoints
+        assert len(watch_list.outpoints) == len(received) + 1 - len(spends)
+
+
+def test_tx() -> None:
+    transaction = LazyBlock(_block_bytes()).to_block().transactions[1]
+    tx_out = transaction.vout[1]
+    outpoint = transaction.vin[0].prevout
+    watch_list = WatchList()
+    watch_list.add_scriptPubKey(script.encode(tx_out.scriptPubKey))
+    watch_list.add_outpoint(outpoint, TxOut(12345, tx_out.scriptPubKey))
+    for scanned in (transaction, transaction.serialize()):
+        matches = WatchList(watch_list.scriptPubKeys).match_tx(scanned)
+        assert [m.index for m in matches] == [1]
+        assert matches[0].outpoint == OutPoint(transaction.txid, 1).serialize()
+        assert matches[0].nValue == tx_out.nValue
+
+    matches = watch_list.match_tx(transaction)
+    assert [(m.spent, m.index) for m in matches] == [(True, 0), (False, 1)]
+    assert matches[0].nValue == 12345
+    assert matches[0].scriptPubKey == script.encode(tx_out.scriptPubKey)
+    # the outpoint has been spent
+    matches = watch_list.match_tx(transaction.serialize().hex())
+    assert [(m.spent, m.index) for m in matches] == [(False, 1)]
@@ -13,15 +13,27 @@
 https://en.bitcoin.it/wiki/Transaction
 https://learnmeabitcoin.com/guide/coinbase-transaction
 https://bitcoin.stackexchange.com/questions/20721/what-is-the-format-of-the-coinbase-transaction
+
+Sizes and weight are computed from the field lengths,
+without serializing the transaction.
+A transaction can be frozen to cache its serializations,
+hashes, and sizes: a frozen transaction must not be modified
+until it is unfrozen (top-level field assignment clears the cache,
+but in-place changes of inputs and outputs cannot be detected).
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from math import ceil
-from typing import List, Type, TypeVar
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
 
 from . import varint
 from .alias import BinaryData
-from .tx_in import TxIn, witness_deserialize, witness_serialize
+from .tx_in import (
+    TxIn,
+    witness_deserialize,
+    witness_serialize_into,
+    witness_size,
+)
 from .tx_out import TxOut
 from .utils import bytesio_from_binarydata, hash256
 
@@ -34,25 +46,51 @@ class Tx:
     nLockTime: int
     vin: List[TxIn]
     vout: List[TxOut]
+    _cache: Optional[Dict[str, Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # replacing a field of a frozen transaction clears the cache
+        if name != "_cache" and getattr(self, "_cache", None):
+            self._cache = {}
+        super().__setattr__(name, value)
+
+    def freeze(self) -> None:
+        "Cache serializations, hashes, and sizes from now on."
+        if self._cache is None:
+            self._cache = {}
+
+    def unfreeze(self) -> None:
+        "Drop the cache, allowing the transaction to be modified."
+        self._cache = None
+
+    @property
+    def frozen(self) -> bool:
+        return self._cache is not None
 
     @classmethod
-    def deserialize(cls: Type[_Tx], data: BinaryData) -> _Tx:
+    def deserialize(
+        cls: Type[_Tx], data: BinaryData, check_validity: bool = True
+    ) -> _Tx:
         stream = bytesio_from_binarydata(data)
         nVersion = int.from_bytes(stream.read(4), "little")
-        view: bytes = stream.getvalue()
         witness_flag = False
-        if view[stream.tell() : stream.tell() + 2] == b"\x00\x01":
+        # peek the segwit marker and flag, without copying the stream buffer
+        marker = stream.read(2)
+        if marker == b"\x00\x01":
             witness_flag = True
-            stream.read(2)
+        else:
+            stream.seek(-len(marker), 1)
         input_count = varint.decode(stream)
         vin: List[TxIn] = []
         for _ in range(input_count):
-            tx_input = TxIn.deserialize(stream)
+            tx_input = TxIn.deserialize(stream, check_validity)
             vin.append(tx_input)
         output_count = varint.decode(stream)
         vout: List[TxOut] = []
         for _ in range(output_count):
-            tx_output = TxOut.deserialize(stream)
+            tx_output = TxOut.deserialize(stream, check_validity)
             vout.append(tx_output)
         if witness_flag:
             for tx_input in vin:
@@ -60,43 +98,85 @@ class Tx:
                 tx_input.txinwitness = witness
         nLockTime = int.from_bytes(stream.read(4), "little")
         tx = cls(nVersion=nVersion, nLockTime=nLockTime, vin=vin, vout=vout)
-        tx.assert_valid()
+        if check_validity:
+            tx.assert_valid()
         return tx
 
     def serialize(self, include_witness: bool = True) -> bytes:
-        out = self.nVersion.to_bytes(4, "little")
-        witness_flag = False
+        if self._cache is None:
+            return self._serialize(include_witness)
+        key = "serialize" if include_witness else "serialize_base"
+        if key not in self._cache:
+            self._cache[key] = self._serialize(include_witness)
+        return self._cache[key]
+
+    def _serialize(self, include_witness: bool) -> bytes:
+        out = bytearray()
+        self._serialize_into(out, include_witness)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray, include_witness: bool = True) -> None:
+        "Append the serialization to the buffer."
+        if self._cache is None:
+            self._serialize_into(out, include_witness)
+        else:
+            out += self.serialize(include_witness)
+
+    def _serialize_into(self, out: bytearray, include_witness: bool) -> None:
+        witness_flag = include_witness and any(
+            tx_input.txinwitness != [] for tx_input in self.vin
+        )
+        out += self.nVersion.to_bytes(4, "little")
+        if witness_flag:
+            out += b"\x00\x01"
         out += varint.encode(len(self.vin))
         for tx_input in self.vin:
-            out += tx_input.serialize()
-            if tx_input.txinwitness != []:
-                witness_flag = True
+            tx_input.serialize_into(out)
         out += varint.encode(len(self.vout))
         for tx_output in self.vout:
-            out += tx_output.serialize()
-        if witness_flag and include_witness:
+            tx_output.serialize_into(out)
+        if witness_flag:
             for tx_input in self.vin:
-                out += witness_serialize(tx_input.txinwitness)
+                witness_serialize_into(tx_input.txinwitness, out)
         out += self.nLockTime.to_bytes(4, "little")
-        if witness_flag and include_witness:
-            out = out[:4] + b"\x00\x01" + out[4:]
-        return out
+
+    def _cached(self, key: str, value: Callable[[], Any]) -> Any:
+        if self._cache is None:
+            return value()
+        if key not in self._cache:
+            self._cache[key] = value()
+        return self._cache[key]
 
     @property
     def txid(self) -> str:
-        return hash256(self.serialize(False))[::-1].hex()
+        return self._cached("txid", lambda: hash256(self.serialize(False))[::-1].hex())
 
     @property
     def hash(self) -> str:
-        return hash256(self.serialize())[::-1].hex()
+        return self._cached("hash", lambda: hash256(self.serialize())[::-1].hex())
+
+    def _sizes(self) -> Tuple[int, int]:
+        "Return the (base, witness) sizes, computed without serializing."
+
+        base_size = 4 + varint.size(len(self.vin)) + varint.size(len(self.vout)) + 4
+        base_size += sum(tx_in.size for tx_in in self.vin)
+        base_size += sum(tx_out.size for tx_out in self.vout)
+        witness_size_ = 0
+        if any(tx_in.txinwitness != [] for tx_in in self.vin):
+            # segwit marker and flag
+            witness_size_ = 2
+            witness_size_ += sum(witness_size(t.txinwitness) for t in self.vin)
+        return base_size, witness_size_
 
     @property
     def size(self) -> int:
-        return len(self.serialize())
+        base_size, witness_size_ = self._cached("sizes", self._sizes)
+        return base_size + witness_size_
 
     @property
     def weight(self) -> int:
-        return len(self.serialize(False)) * 3 + len(self.serialize())
+        base_size, witness_size_ = self._cached("sizes", self._sizes)
+        return base_size * 4 + witness_size_
 
     @property
     def vsize(self) -> int:
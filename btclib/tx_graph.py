@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Transaction graph of unconfirmed transactions.
+
+Transactions are indexed by txid and by the outpoints they spend,
+with parent/child edges kept up to date as transactions are
+added or removed.
+
+As in Bitcoin Core mempool, each transaction caches the
+aggregated count, virtual size and fee of its ancestors
+and descendants (itself included), used for the package fee rates
+of CPFP and fee bumping.
+The caches are updated incrementally:
+adding a transaction without in-graph children
+(or removing one without children or without parents)
+only touches its ancestors (or descendants);
+the other cases, e.g. a parent added after its children,
+recompute the affected transactions only.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .tx import Tx
+from .tx_in import OutPoint
+
+
+@dataclass
+class PackageStats:
+    "Aggregated count, virtual size and fee of a set of transactions."
+
+    count: int = 0
+    vsize: int = 0
+    fee: int = 0
+
+    @property
+    def fee_rate(self) -> float:
+        "Return the package fee rate in satoshi per virtual byte."
+        return self.fee / self.vsize if self.vsize else 0.0
+
+    def _add(self, other: "PackageStats", sign: int = 1) -> None:
+        self.count += sign * other.count
+        self.vsize += sign * other.vsize
+        self.fee += sign * other.fee
+
+
+class _Entry:
+    __slots__ = ("tx", "own", "parents", "children", "ancestors", "descendants")
+
+    def __init__(self, tx: Tx, fee: int) -> None:
+        self.tx = tx
+        self.own = PackageStats(1, tx.vsize, fee)
+        self.parents: Set[str] = set()
+        self.children: Set[str] = set()
+        self.ancestors = PackageStats()
+        self.descendants = PackageStats()
+
+
+class TxGraph:
+    """Index of transactions by txid and spent outpoints.
+
+    Fees must be provided when adding a transaction,
+    as its inputs could spend outputs not in the graph.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, _Entry] = {}
+        # spent outpoint (txid, vout) -> spending txid
+        self._spenders: Dict[Tuple[str, int], str] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, txid: str) -> bool:
+        return txid in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def _entry(self, txid: str) -> _Entry:
+        entry = self._entries.get(txid)
+        if entry is None:
+            raise ValueError(f"unknown transaction: {txid}")
+        return entry
+
+    def get(self, txid: str) -> Optional[Tx]:
+        "Return the transaction, if in the graph."
+        entry = self._entries.get(txid)
+        return None if entry is None else entry.tx
+
+    def fee(self, txid: str) -> int:
+        "Return the fee of the transaction."
+        return self._entry(txid).own.fee
+
+    def spender(self, outpoint: OutPoint) -> Optional[str]:
+        "Return the txid of the transaction spending the outpoint, if any."
+        return self._spenders.get((outpoint.hash, outpoint.n))
+
+    def parents(self, txid: str) -> Set[str]:
+        return set(self._entry(txid).parents)
+
+    def children(self, txid: str) -> Set[str]:
+        return set(self._entry(txid).children)
+
+    def _walk(self, txid: str, edges: str) -> Set[str]:
+        result: Set[str] = set()
+        stack = list(getattr(self._entries[txid], edges))
+        while stack:
+            current = stack.pop()
+            if current not in result:
+                result.add(current)
+                stack.extend(getattr(self._entries[current], edges))
+        return result
+
+    def ancestors(self, txid: str) -> Set[str]:
+        "Return the in-graph ancestors of the transaction (itself excluded)."
+        self._entry(txid)
+        return self._walk(txid, "parents")
+
+    def descendants(self, txid: str) -> Set[str]:
+        "Return the in-graph descendants of the transaction (itself excluded)."
+        self._entry(txid)
+        return self._walk(txid, "children")
+
+    def ancestor_stats(self, txid: str) -> PackageStats:
+        "Return the aggregated stats of the transaction and its ancestors."
+        stats = self._entry(txid).ancestors
+        return PackageStats(stats.count, stats.vsize, stats.fee)
+
+    def descendant_stats(self, txid: str) -> PackageStats:
+        "Return the aggregated stats of the transaction and its descendants."
+        stats = self._entry(txid).descendants
+        return PackageStats(stats.count, stats.vsize, stats.fee)
+
+    def _sum(self, txids: Iterable[str], stats: PackageStats) -> PackageStats:
+        result = PackageStats(stats.count, stats.vsize, stats.fee)
+        for txid in txids:
+            result._add(self._entries[txid].own)
+        return result
+
+    def _recompute(self, txids: Iterable[str]) -> None:
+        for txid in txids:
+            entry = self._entries[txid]
+            entry.ancestors = self._sum(self._walk(txid, "parents"), entry.own)
+            entry.descendants = self._sum(self._walk(txid, "children"), entry.own)
+
+    def add(self, tx: Tx, fee: int) -> str:
+        "Add the transaction with its fee, returning its txid."
+
+        txid = tx.txid
+        if txid in self._entries:
+            raise ValueError(f"duplicated transaction: {txid}")
+        if fee < 0:
+            raise ValueError(f"negative fee: {fee}")
+        prevouts = [(tx_in.prevout.hash, tx_in.prevout.n) for tx_in in tx.vin]
+        for prevout in prevouts:
+            spender = self._spenders.get(prevout)
+            if spender is not None:
+                raise ValueError(f"conflicting transaction: {spender}")
+
+        entry = _Entry(tx, fee)
+        self._entries[txid] = entry
+        for prevout in prevouts:
+            self._spenders[prevout] = txid
+            if prevout[0] in self._entries:
+                entry.parents.add(prevout[0])
+                self._entries[prevout[0]].children.add(txid)
+        for n in range(len(tx.vout)):
+            child = self._spenders.get((txid, n))
+            if child is not None:
+                entry.children.add(child)
+                self._entries[child].parents.add(txid)
+
+        ancestors = self._walk(txid, "parents")
+        if entry.children:
+            descendants = self._walk(txid, "children")
+            self._recompute(ancestors | descendants | {txid})
+            return txid
+        entry.ancestors = self._sum(ancestors, entry.own)
+        entry.descendants = PackageStats(1, entry.own.vsize, entry.own.fee)
+        for ancestor in ancestors:
+            self._entries[ancestor].descendants._add(entry.own)
+        return txid
+
+    def remove(self, txid: str) -> Tx:
+        """Remove the transaction, returning it.
+
+        Its descendants are kept:
+        e.g. when the transaction has been included in a block.
+        """
+
+        entry = self._entry(txid)
+        ancestors = self._walk(txid, "parents")
+        descendants = self._walk(txid, "children")
+        for tx_in in entry.tx.vin:
+            del self._spenders[(tx_in.prevout.hash, tx_in.prevout.n)]
+        for parent in entry.parents:
+            self._entries[parent].children.discard(txid)
+        for child in entry.children:
+            self._entries[child].parents.discard(txid)
+        del self._entries[txid]
+
+        if not descendants:
+            for ancestor in ancestors:
+                self._entries[ancestor].descendants._add(entry.own, -1)
+        elif not ancestors:
+            for descendant in descendants:
+                self._entries[descendant].ancestors._add(entry.own, -1)
+        else:
+            self._recompute(ancestors | descendants)
+        return entry.tx
+
+    def remove_with_descendants(self, txid: str) -> List[Tx]:
+        """Remove the transaction and its descendants, returning them.
+
+        E.g. when the transaction has been replaced
+        or conflicts with a confirmed one.
+        The transactions are returned in topological order.
+        """
+
+        self._entry(txid)
+        txids = self._walk(txid, "children") | {txid}
+        removed: List[Tx] = []
+        while txids:
+            # remove leaves first, updating only their ancestors
+            leaves = [t for t in txids if not self._entries[t].children]
+            for leaf in leaves:
+                removed.append(self.remove(leaf))
+            txids.difference_update(leaves)
+        return removed[::-1]
+
+    def remove_for_block(self, transactions: Iterable[Tx]) -> List[Tx]:
+        """Remove the transactions included in a block.
+
+        Transactions conflicting with the block ones are removed
+        together with their descendants, and returned.
+        """
+
+        conflicts: List[Tx] = []
+        for tx in transactions:
+            txid = tx.txid
+            if txid in self._entries:
+                self.remove(txid)
+                continue
+            for tx_in in tx.vin:
+                spender = self._spenders.get((tx_in.prevout.hash, tx_in.prevout.n))
+                if spender is not None:
+                    conflicts.extend(self.remove_with_descendants(spender))
+        return conflicts
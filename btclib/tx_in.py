@@ -15,6 +15,11 @@ from . import script, varint
 from .alias import BinaryData, Token
 from .utils import bytesio_from_binarydata
 
+_NULL_TXID = "00" * 32
+_NULL_VOUT = 256 ** 4 - 1
+# serialized null outpoint of coinbase inputs
+_NULL_OUTPOINT = bytes.fromhex(_NULL_TXID) + _NULL_VOUT.to_bytes(4, "little")
+
 _OutPoint = TypeVar("_OutPoint", bound="OutPoint")
 
 
@@ -31,14 +36,17 @@ class OutPoint:
         return cls(hash, n)
 
     def serialize(self) -> bytes:
-        out = bytes.fromhex(self.hash)[::-1]
+        out = bytearray()
+        self.serialize_into(out)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
+        out += bytes.fromhex(self.hash)[::-1]
         out += self.n.to_bytes(4, "little")
-        return out
 
     def assert_valid(self) -> None:
-        null_txid = "00" * 32
-        null_vout = 256 ** 4 - 1
-        if (self.hash == null_txid) ^ (self.n == null_vout):
+        if (self.hash == _NULL_TXID) ^ (self.n == _NULL_VOUT):
             raise ValueError("invalid tx_in")
 
 
@@ -54,11 +62,13 @@ class TxIn:
     txinwitness: List[str]
 
     @classmethod
-    def deserialize(cls: Type[_TxIn], data: BinaryData) -> _TxIn:
+    def deserialize(
+        cls: Type[_TxIn], data: BinaryData, check_validity: bool = True
+    ) -> _TxIn:
         stream = bytesio_from_binarydata(data)
         prevout = OutPoint.deserialize(stream)
         is_coinbase = False
-        if prevout.hash == "00" * 32 and prevout.n == 256 ** 4 - 1:
+        if prevout.hash == _NULL_TXID and prevout.n == _NULL_VOUT:
             is_coinbase = True
         script_length = varint.decode(stream)
         scriptSig: List[Token] = []
@@ -76,18 +86,33 @@ class TxIn:
             nSequence=nSequence,
             txinwitness=txinwitness,
         )
-        tx_in.assert_valid()
+        if check_validity:
+            tx_in.assert_valid()
         return tx_in
 
     def serialize(self) -> bytes:
-        out = self.prevout.serialize()
-        if self.prevout.hash == "00" * 32 and self.prevout.n == 256 ** 4 - 1:
+        out = bytearray()
+        self.serialize_into(out)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
+        self.prevout.serialize_into(out)
+        if self.prevout.hash == _NULL_TXID and self.prevout.n == _NULL_VOUT:
             out += varint.encode(len(self.scriptSigHex) // 2)
             out += bytes.fromhex(self.scriptSigHex)
         else:
             out += script.serialize(self.scriptSig)
         out += self.nSequence.to_bytes(4, "little")
-        return out
+
+    @property
+    def size(self) -> int:
+        "Return the serialized size, computed without serializing."
+        if self.prevout.hash == _NULL_TXID and self.prevout.n == _NULL_VOUT:
+            length = len(self.scriptSigHex) // 2
+        else:
+            length = script.encoded_size(self.scriptSig)
+        return 36 + varint.size(length) + length + 4
 
     def assert_valid(self) -> None:
         self.prevout.assert_valid()
@@ -103,12 +128,26 @@ def witness_deserialize(data: BinaryData) -> List[str]:
     return witness
 
 
+def witness_size(witness: List[str]) -> int:
+    "Return the serialized witness size, computed without serializing."
+    out = varint.size(len(witness))
+    for stack_item in witness:
+        # as in witness_serialize_into, hex-strings may include spaces
+        length = len(bytes.fromhex(stack_item))
+        out += varint.size(length) + length
+    return out
+
+
 def witness_serialize(witness: List[str]) -> bytes:
-    out = b""
-    witness_count = len(witness)
-    out += varint.encode(witness_count)
-    for i in range(witness_count):
-        witness_bytes = bytes.fromhex(witness[i])
+    out = bytearray()
+    witness_serialize_into(witness, out)
+    return bytes(out)
+
+
+def witness_serialize_into(witness: List[str], out: bytearray) -> None:
+    "Append the witness serialization to the buffer."
+    out += varint.encode(len(witness))
+    for stack_item in witness:
+        witness_bytes = bytes.fromhex(stack_item)
         out += varint.encode(len(witness_bytes))
         out += witness_bytes
-    return out
@@ -17,6 +17,9 @@ from .utils import bytesio_from_binarydata
 
 _TxOut = TypeVar("_TxOut", bound="TxOut")
 
+# total bitcoin supply, in satoshis
+_MAX_NVALUE = 2099999997690000
+
 
 @dataclass
 class TxOut:
@@ -24,24 +27,38 @@ class TxOut:
     scriptPubKey: List[Token]
 
     @classmethod
-    def deserialize(cls: Type[_TxOut], data: BinaryData) -> _TxOut:
+    def deserialize(
+        cls: Type[_TxOut], data: BinaryData, check_validity: bool = True
+    ) -> _TxOut:
         stream = bytesio_from_binarydata(data)
         nValue = int.from_bytes(stream.read(8), "little")
         script_length = varint.decode(stream)
         scriptPubKey = script.decode(stream.read(script_length))
         tx_out = cls(nValue=nValue, scriptPubKey=scriptPubKey)
-        tx_out.assert_valid()
+        if check_validity:
+            tx_out.assert_valid()
         return tx_out
 
     def serialize(self) -> bytes:
-        out = self.nValue.to_bytes(8, "little")
+        out = bytearray()
+        self.serialize_into(out)
+        return bytes(out)
+
+    def serialize_into(self, out: bytearray) -> None:
+        "Append the serialization to the buffer."
+        out += self.nValue.to_bytes(8, "little")
         out += script.serialize(self.scriptPubKey)
-        return out
+
+    @property
+    def size(self) -> int:
+        "Return the serialized size, computed without serializing."
+        length = script.encoded_size(self.scriptPubKey)
+        return 8 + varint.size(length) + length
 
     def assert_valid(self) -> None:
         if self.nValue < 0:
             raise ValueError(f"negative value: {self.nValue}")
-        if self.nValue > 2099999997690000:
+        if self.nValue > _MAX_NVALUE:
             raise ValueError(f"value too high: {self.nValue}")
         if len(self.scriptPubKey) == 0:
             raise ValueError(f"empty scriptPubKey: {self.scriptPubKey}")
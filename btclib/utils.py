@@ -47,6 +47,19 @@ def hash256(o: Octets) -> bytes:
     return hashlib.sha256(t).digest()
 
 
+def hash256_slices(*slices: Union[bytes, bytearray, memoryview]) -> bytes:
+    """Return the SHA256(SHA256(*)) of the concatenation of the input slices.
+
+    The slices (e.g. memoryview slices of a serialized block)
+    are hashed in place, without concatenating them.
+    """
+
+    h = hashlib.sha256()
+    for s in slices:
+        h.update(s)
+    return hashlib.sha256(h.digest()).digest()
+
+
 NoneOneOrMoreInt = Optional[Union[int, Iterable[int]]]
 
 
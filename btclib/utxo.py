@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Compact unspent transaction output (UTXO) set.
+
+Unspent outputs are keyed by their 36-bytes serialized outpoint.
+Instead of per-entry objects, two packed buffers are used:
+
+- an open addressing hash table (linear probing), whose slots
+  are the outpoint followed by the 8-bytes offset of its coin;
+- the coins, serialized as in Bitcoin Core chainstate:
+  height and coinbase flag, compressed amount, and compressed script
+  (e.g. 21 bytes for P2PKH and P2SH, 33 bytes for P2PK).
+
+With the table at most 75% full, an entry takes
+about 60 to 120 bytes, i.e. a few GB for tens of millions of entries.
+The set can be saved as a snapshot file, loaded back
+reading its buffers in place, without parsing the entries.
+
+Blocks are applied in bulk, returning the undo data
+(the spent coins) needed to disconnect them in case of reorgs.
+"""
+
+import os
+from typing import Iterator, List, Optional, Tuple, Union
+
+from . import script
+from .block_files import LazyBlock
+from .blocks import Block
+from .psbt import Psbt
+from .secpoint import bytes_from_point, point_from_octets
+from .tx import Tx
+from .tx_in import OutPoint
+from .tx_out import TxOut
+from .varint import Buffer
+
+_MAGIC = b"btclib-utxo\x00"
+_VERSION = 1
+_HEADER_SIZE = len(_MAGIC) + 4 + 3 * 8 + 32
+
+_KEY_SIZE = 36
+_SLOT_SIZE = _KEY_SIZE + 8
+# Bitcoin Core MAX_SCRIPT_SIZE
+_MAX_SCRIPT_SIZE = 10000
+
+# (nValue, scriptPubKey, height, coinbase)
+Coin = Tuple[int, bytes, int, bool]
+
+
+def _write_varint(n: int, out: bytearray) -> None:
+    "Append the Bitcoin Core VARINT (not CompactSize) encoding."
+
+    tmp = bytearray()
+    while True:
+        tmp.append((n & 0x7F) | (0x80 if tmp else 0))
+        if n <= 0x7F:
+            break
+        n = (n >> 7) - 1
+    tmp.reverse()
+    out += tmp
+
+
+def _read_varint(data: Buffer, offset: int) -> Tuple[int, int]:
+    "Return the Bitcoin Core VARINT at the offset and the next offset."
+
+    n = 0
+    while True:
+        ch = data[offset]
+        offset += 1
+        n = (n << 7) | (ch & 0x7F)
+        if not ch & 0x80:
+            return n, offset
+        n += 1
+
+
+def compress_amount(n: int) -> int:
+    "Return the Bitcoin Core compressed amount."
+
+    if n == 0:
+        return 0
+    e = 0
+    while n % 10 == 0 and e < 9:
+        n //= 10
+        e += 1
+    if e < 9:
+        d = n % 10
+        n //= 10
+        return 1 + (n * 9 + d - 1) * 10 + e
+    return 1 + (n - 1) * 10 + 9
+
+
+def decompress_amount(x: int) -> int:
+    "Return the amount from its Bitcoin Core compressed form."
+
+    if x == 0:
+        return 0
+    x -= 1
+    e = x % 10
+    x //= 10
+    if e < 9:
+        d = x % 9 + 1
+        x //= 9
+        n = x * 10 + d
+    else:
+        n = x + 1
+    return n * 10 ** e
+
+
+def _compress_script(s: bytes, out: bytearray) -> None:
+    "Append the Bitcoin Core compressed script."
+
+    length = len(s)
+    if length == 25 and s[:3] == b"\x76\xa9\x14" and s[23:] == b"\x88\xac":
+        out.append(0x00)
+        out += s[3:23]
+        return
+    if length == 23 and s[:2] == b"\xa9\x14" and s[22] == 0x87:
+        out.append(0x01)
+        out += s[2:22]
+        return
+    if length == 35 and s[0] == 33 and s[1] in (2, 3) and s[34] == 0xAC:
+        out += s[1:34]
+        return
+    if length == 67 and s[:2] == b"\x41\x04" and s[66] == 0xAC:
+        try:
+            point_from_octets(s[1:66])
+        except (ValueError, TypeError):
+            pass
+        else:
+            out.append(0x04 | s[65] & 1)
+            out += s[2:34]
+            return
+    _write_varint(length + 6, out)
+    out += s
+
+
+def _decompress_script(data: Buffer, offset: int) -> Tuple[bytes, int]:
+    "Return the script compressed at the offset and the next offset."
+
+    size, offset = _read_varint(data, offset)
+    if size == 0x00:
+        payload = bytes(data[offset : offset + 20])
+        return b"\x76\xa9\x14" + payload + b"\x88\xac", offset + 20
+    if size == 0x01:
+        return b"\xa9\x14" + bytes(data[offset : offset + 20]) + b"\x87", offset + 20
+    if size in (0x02, 0x03):
+        x = bytes(data[offset : offset + 32])
+        return b"\x21" + bytes([size]) + x + b"\xac", offset + 32
+    if size in (0x04, 0x05):
+        x = bytes(data[offset : offset + 32])
+        Q = point_from_octets(bytes([size - 2]) + x)
+        return b"\x41" + bytes_from_point(Q, compressed=False) + b"\xac", offset + 32
+    size -= 6
+    return bytes(data[offset : offset + size]), offset + size
+
+
+def _encode_coin(
+    height: int, coinbase: bool, nValue: int, scriptPubKey: bytes
+) -> bytes:
+    out = bytearray()
+    _write_varint(height * 2 + coinbase, out)
+    _write_varint(compress_amount(nValue), out)
+    _compress_script(scriptPubKey, out)
+    return bytes(out)
+
+
+def _decode_coin(data: Buffer, offset: int) -> Tuple[Coin, int]:
+    "Return the coin serialized at the offset and the next offset."
+
+    code, offset = _read_varint(data, offset)
+    amount, offset = _read_varint(data, offset)
+    scriptPubKey, offset = _decompress_script(data, offset)
+    return (decompress_amount(amount), scriptPubKey, code >> 1, bool(code & 1)), offset
+
+
+def _coin_end(data: Buffer, offset: int) -> int:
+    "Return the offset following the coin, without decoding its script."
+
+    offset = _read_varint(data, _read_varint(data, offset)[1])[1]
+    size, offset = _read_varint(data, offset)
+    if size < 2:
+        return offset + 20
+    if size < 6:
+        return offset + 32
+    return offset + size - 6
+
+
+def _key(outpoint: Union[OutPoint, Buffer]) -> bytes:
+    if isinstance(outpoint, OutPoint):
+        return outpoint.serialize()
+    key = bytes(outpoint)
+    if len(key) != _KEY_SIZE:
+        raise ValueError(f"invalid outpoint size: {len(key)}")
+    return key
+
+
+def _is_unspendable(scriptPubKey: Buffer) -> bool:
+    n = len(scriptPubKey)
+    return n > _MAX_SCRIPT_SIZE or (n > 0 and scriptPubKey[0] == 0x6A)
+
+
+# txid, spent prevouts, and (nValue, scriptPubKey) outputs
+_TxData = Tuple[bytes, List[bytes], List[Tuple[int, bytes]]]
+
+
+def _block_transactions(block: Union[Block, LazyBlock]) -> Iterator[_TxData]:
+    "Yield the txid, the spent prevouts, and the outputs of each transaction."
+
+    if isinstance(block, LazyBlock):
+        for lazy_tx in block.transactions:
+            prevouts = [bytes(tx_in.prevout_bytes) for tx_in in lazy_tx.vin]
+            outputs = [(o.nValue, bytes(o.scriptPubKeyBytes)) for o in lazy_tx.vout]
+            yield lazy_tx.txid_bytes, prevouts, outputs
+    else:
+        for transaction in block.transactions:
+            prevouts = [tx_in.prevout.serialize() for tx_in in transaction.vin]
+            outputs = [
+                (o.nValue, script.encode(o.scriptPubKey)) for o in transaction.vout
+            ]
+            yield bytes.fromhex(transaction.txid)[::-1], prevouts, outputs
+
+
+class UtxoSet:
+    """Unspent transaction outputs, in packed buffers.
+
+    best_block is the hash of the last applied block, if any.
+    """
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+
+        # power of two number of slots
+        capacity = max(16, 1 << (capacity - 1).bit_length())
+        self._table = bytearray(capacity * _SLOT_SIZE)
+        self._mask = capacity - 1
+        self._count = 0
+        self._data = bytearray()
+        # size of the spent coins still in the data buffer
+        self._garbage = 0
+        self.best_block = "00" * 32
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _find(self, key: bytes) -> Tuple[int, int]:
+        "Return the key slot (or the empty slot ending the probe) and offset."
+
+        table = self._table
+        i = self._home(key)
+        while True:
+            start = i * _SLOT_SIZE
+            offset = int.from_bytes(
+                table[start + _KEY_SIZE : start + _SLOT_SIZE], "little"
+            )
+            if offset == 0 or table[start : start + _KEY_SIZE] == key:
+                return i, offset - 1
+            i = (i + 1) & self._mask
+
+    def _home(self, key: Buffer) -> int:
+        "Return the home slot of the key."
+
+        # txids are already uniformly distributed
+        h = int.from_bytes(key[:8], "little")
+        h ^= int.from_bytes(key[32:36], "little") * 0x9E3779B97F4A7C15
+        return h & self._mask
+
+    def __contains__(self, outpoint: Union[OutPoint, Buffer]) -> bool:
+        return self._find(_key(outpoint))[1] != -1
+
+    def get_coin(self, outpoint: Union[OutPoint, Buffer]) -> Optional[Coin]:
+        "Return the (nValue, scriptPubKey, height, coinbase) unspent coin."
+
+        offset = self._find(_key(outpoint))[1]
+        return None if offset == -1 else _decode_coin(self._data, offset)[0]
+
+    def get(self, outpoint: Union[OutPoint, Buffer]) -> Optional[TxOut]:
+        "Return the unspent output, None if not in the set."
+
+        coin = self.get_coin(outpoint)
+        return None if coin is None else TxOut(coin[0], script.decode(coin[1]))
+
+    def _put(self, key: bytes, coin: bytes) -> Optional[bytes]:
+        "Store the serialized coin, returning the replaced one (if any)."
+
+        i, offset = self._find(key)
+        replaced = None
+        if offset != -1:
+            end = _coin_end(self._data, offset)
+            replaced = bytes(self._data[offset:end])
+            self._garbage += end - offset
+        else:
+            self._count += 1
+        start = i * _SLOT_SIZE
+        self._table[start : start + _KEY_SIZE] = key
+        position = len(self._data) + 1
+        self._table[start + _KEY_SIZE : start + _SLOT_SIZE] = position.to_bytes(
+            8, "little"
+        )
+        self._data += coin
+        if replaced is None and self._count * 4 > (self._mask + 1) * 3:
+            self._resize(2 * (self._mask + 1))
+        return replaced
+
+    def _pop(self, key: bytes) -> bytes:
+        "Remove the entry, returning its serialized coin."
+
+        i, offset = self._find(key)
+        if offset == -1:
+            n = int.from_bytes(key[32:], "little")
+            raise ValueError(f"missing outpoint: {key[:32][::-1].hex()}:{n}")
+        end = _coin_end(self._data, offset)
+        coin = bytes(self._data[offset:end])
+        self._garbage += end - offset
+        self._count -= 1
+
+        # backward shift deletion, leaving no tombstones
+        table = self._table
+        mask = self._mask
+        j = i
+        while True:
+            j = (j + 1) & mask
+            start = j * _SLOT_SIZE
+            if not any(table[start + _KEY_SIZE : start + _SLOT_SIZE]):
+                break
+            home = self._home(table[start : start + _KEY_SIZE])
+            # move the entry if its home is not cyclically in (i, j]
+            if (i < j and not i < home <= j) or (i > j and j < home <= i):
+                table[i * _SLOT_SIZE : (i + 1) * _SLOT_SIZE] = table[
+                    start : start + _SLOT_SIZE
+                ]
+                i = j
+        table[i * _SLOT_SIZE : (i + 1) * _SLOT_SIZE] = bytes(_SLOT_SIZE)
+
+        if self._garbage > 1 << 20 and self._garbage * 2 > len(self._data):
+            self.compact()
+        return coin
+
+    def _entries(self) -> Iterator[Tuple[bytes, int]]:
+        "Yield the (key, coin offset) of the entries."
+
+        table = self._table
+        for start in range(0, len(table), _SLOT_SIZE):
+            offset = int.from_bytes(
+                table[start + _KEY_SIZE : start + _SLOT_SIZE], "little"
+            )
+            if offset:
+                yield bytes(table[start : start + _KEY_SIZE]), offset - 1
+
+    def _resize(self, capacity: int) -> None:
+        entries = list(self._entries())
+        self._table = bytearray(capacity * _SLOT_SIZE)
+        self._mask = capacity - 1
+        table = self._table
+        for key, offset in entries:
+            i = self._home(key)
+            while any(table[i * _SLOT_SIZE + _KEY_SIZE : (i + 1) * _SLOT_SIZE]):
+                i = (i + 1) & self._mask
+            start = i * _SLOT_SIZE
+            table[start : start + _KEY_SIZE] = key
+            table[start + _KEY_SIZE : start + _SLOT_SIZE] = (offset + 1).to_bytes(
+                8, "little"
+            )
+
+    def compact(self) -> None:
+        "Drop the spent coins from the data buffer."
+
+        data = self._data
+        compacted = bytearray()
+        table = self._table
+        for start in range(0, len(table), _SLOT_SIZE):
+            offset = int.from_bytes(
+                table[start + _KEY_SIZE : start + _SLOT_SIZE], "little"
+            )
+            if offset:
+                end = _coin_end(data, offset - 1)
+                position = len(compacted) + 1
+                table[start + _KEY_SIZE : start + _SLOT_SIZE] = position.to_bytes(
+                    8, "little"
+                )
+                compacted += data[offset - 1 : end]
+        self._data = compacted
+        self._garbage = 0
+
+    def add(
+        self,
+        outpoint: Union[OutPoint, Buffer],
+        tx_out: TxOut,
+        height: int,
+        coinbase: bool = False,
+    ) -> None:
+        scriptPubKey = script.encode(tx_out.scriptPubKey)
+        coin = _encode_coin(height, coinbase, tx_out.nValue, scriptPubKey)
+        self._put(_key(outpoint), coin)
+
+    def spend(self, outpoint: Union[OutPoint, Buffer]) -> Coin:
+        "Remove the unspent output, returning its coin."
+
+        return _decode_coin(self._pop(_key(outpoint)), 0)[0]
+
+    def apply_block(self, block: Union[Block, LazyBlock], height: int) -> bytes:
+        """Spend the block inputs and add its outputs, returning the undo data.
+
+        Unspendable outputs (e.g. OP_RETURN ones) are not added.
+        If an input is missing, the set is left unchanged.
+        """
+
+        undo = bytearray()
+        # (key, removed coin, replaced coin) log to roll back on error
+        log: List[Tuple[bytes, Optional[bytes], Optional[bytes]]] = []
+        try:
+            for i, (txid, prevouts, outputs) in enumerate(_block_transactions(block)):
+                coinbase = i == 0
+                if not coinbase:
+                    for key in prevouts:
+                        coin = self._pop(key)
+                        log.append((key, coin, None))
+                        undo += coin
+                for n, (nValue, scriptPubKey) in enumerate(outputs):
+                    if _is_unspendable(scriptPubKey):
+                        continue
+                    key = txid + n.to_bytes(4, "little")
+                    coin = _encode_coin(height, coinbase, nValue, scriptPubKey)
+                    log.append((key, None, self._put(key, coin)))
+        except ValueError:
+            for key, removed, replaced in reversed(log):
+                if removed is not None:
+                    self._put(key, removed)
+                else:
+                    self._pop(key)
+                    if replaced is not None:
+                        self._put(key, replaced)
+            raise
+        if isinstance(block, LazyBlock):
+            self.best_block = block.hash
+        else:
+            self.best_block = block.header.hash
+        return bytes(undo)
+
+    def undo_block(self, block: Union[Block, LazyBlock], undo: Buffer) -> None:
+        """Disconnect the last applied block, restoring the spent coins.
+
+        The block outputs are removed and the spent coins restored
+        from the undo data returned by apply_block.
+        """
+
+        transactions = list(_block_transactions(block))
+        undo = memoryview(undo)
+        coins = []
+        offset = 0
+        for _ in range(sum(len(prevouts) for _, prevouts, _ in transactions[1:])):
+            end = _coin_end(undo, offset)
+            coins.append(bytes(undo[offset:end]))
+            offset = end
+        if offset != len(undo):
+            raise ValueError(f"invalid undo data size: {len(undo)}")
+
+        # in reverse order, as outputs may be spent in the same block
+        for i in range(len(transactions) - 1, -1, -1):
+            txid, prevouts, outputs = transactions[i]
+            for n, (_, scriptPubKey) in enumerate(outputs):
+                if not _is_unspendable(scriptPubKey):
+                    self._pop(txid + n.to_bytes(4, "little"))
+            if i:
+                for key in reversed(prevouts):
+                    self._put(key, coins.pop())
+        if isinstance(block, LazyBlock):
+            self.best_block = block.previousblockhash
+        else:
+            self.best_block = block.header.previousblockhash
+
+    def spent_outputs(self, transaction: Tx) -> List[TxOut]:
+        """Return the outputs spent by the transaction, in input order.
+
+        They are required by sighash.SighashCache for taproot inputs.
+        """
+
+        spent_outputs = []
+        for tx_in in transaction.vin:
+            tx_out = self.get(tx_in.prevout)
+            if tx_out is None:
+                raise ValueError(f"missing outpoint: {tx_in.prevout}")
+            spent_outputs.append(tx_out)
+        return spent_outputs
+
+    def fill_psbt(self, psbt: Psbt) -> int:
+        """Add the missing witness_utxo of the segwit inputs of the PSBT.
+
+        Inputs with UTXO information, not segwit, or whose
+        spent output is not in the set are left unchanged.
+        Return the number of filled inputs.
+        """
+
+        filled = 0
+        for tx_in, psbt_in in zip(psbt.tx.vin, psbt.inputs):
+            if psbt_in.witness_utxo or psbt_in.non_witness_utxo:
+                continue
+            coin = self.get_coin(tx_in.prevout)
+            if coin is None:
+                continue
+            scriptPubKey = coin[1]
+            # version byte and 2 to 40 bytes witness program
+            if 4 <= len(scriptPubKey) <= 42 and (
+                scriptPubKey[0] == 0 or 0x51 <= scriptPubKey[0] <= 0x60
+            ):
+                program_size = scriptPubKey[1]
+                if program_size + 2 == len(scriptPubKey):
+                    psbt_in.witness_utxo = TxOut(coin[0], script.decode(scriptPubKey))
+                    filled += 1
+        return filled
+
+    def snapshot(self, filename: str) -> None:
+        "Save the set to a file, to be loaded back with load."
+
+        self.compact()
+        with open(filename, "wb") as f:
+            f.write(_MAGIC)
+            f.write(_VERSION.to_bytes(4, "little"))
+            f.write(self._count.to_bytes(8, "little"))
+            f.write((self._mask + 1).to_bytes(8, "little"))
+            f.write(len(self._data).to_bytes(8, "little"))
+            f.write(bytes.fromhex(self.best_block)[::-1])
+            f.write(self._table)
+            f.write(self._data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @classmethod
+    def load(cls, filename: str) -> "UtxoSet":
+        """Load the set from a snapshot file.
+
+        The table and the data are read in place
+        into their preallocated buffers, without further copies.
+        """
+
+        with open(filename, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            header = f.read(_HEADER_SIZE)
+            if header[: len(_MAGIC)] != _MAGIC:
+                raise ValueError("invalid UTXO snapshot magic")
+            offset = len(_MAGIC)
+            version = int.from_bytes(header[offset : offset + 4], "little")
+            if version != _VERSION:
+                raise ValueError(f"unsupported UTXO snapshot version: {version}")
+            count, capacity, data_size = [
+                int.from_bytes(header[i : i + 8], "little")
+                for i in range(offset + 4, offset + 28, 8)
+            ]
+            if capacity < 16 or capacity & (capacity - 1):
+                raise ValueError(f"invalid UTXO snapshot capacity: {capacity}")
+            if count * 4 > capacity * 3:
+                raise ValueError(f"invalid UTXO snapshot count: {count}")
+            table_size = capacity * _SLOT_SIZE
+            if file_size != _HEADER_SIZE + table_size + data_size:
+                raise ValueError(f"invalid UTXO snapshot size: {file_size}")
+
+            utxo_set = cls(16)
+            utxo_set._table = bytearray(table_size)
+            utxo_set._data = bytearray(data_size)
+            for buffer in (utxo_set._table, utxo_set._data):
+                if f.readinto(buffer) != len(buffer):
+                    raise ValueError(f"invalid UTXO snapshot size: {file_size}")
+
+        utxo_set._mask = capacity - 1
+        utxo_set._count = count
+        utxo_set.best_block = header[_HEADER_SIZE - 32 :][::-1].hex()
+        return utxo_set
@@ -29,9 +29,14 @@ Up to 0xfc, a varint is just 1 byte; however, if the integer is greater than
 * prefix 0xff markes the next eight bytes as the number.
 """
 
+from typing import Tuple, Union
+
 from .alias import BinaryData
 from .utils import bytesio_from_binarydata, hex_string
 
+# bytes-like objects supporting slicing without copy (i.e. memoryview)
+Buffer = Union[bytes, bytearray, memoryview]
+
 
 def decode(stream: BinaryData) -> int:
     """Return the variable-length integer read from a stream."""
@@ -53,6 +58,37 @@ def decode(stream: BinaryData) -> int:
         return int.from_bytes(stream.read(8), byteorder="little")
 
 
+def decode_at(buffer: Buffer, offset: int) -> Tuple[int, int]:
+    """Return the (variable-length integer, next offset) read from a buffer.
+
+    The varint is read in place at the given offset, without copying
+    the buffer into a stream.
+    """
+
+    i = buffer[offset]
+    if i < 0xFD:
+        # one byte integer
+        return i, offset + 1
+    # 0xfd, 0xfe, 0xff mark the next two, four, eight bytes as the number
+    size = 2 << (i - 0xFD)
+    end = offset + 1 + size
+    if end > len(buffer):
+        raise ValueError(f"not enough data for a {size}-bytes varint")
+    return int.from_bytes(buffer[offset + 1 : end], byteorder="little"), end
+
+
+def size(i: int) -> int:
+    "Return the length of the varint bytes encoding of an integer."
+
+    if i < 0xFD:
+        return 1
+    if i <= 0xFFFF:
+        return 3
+    if i <= 0xFFFFFFFF:
+        return 5
+    return 9
+
+
 def encode(i: int) -> bytes:
     "Return the varint bytes encoding of an integer."
 
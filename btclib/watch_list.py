@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Watch list of scriptPubKeys, addresses, and outpoints.
+
+Blocks and transactions are scanned in a single pass
+for outputs paying to the watched scriptPubKeys
+and for inputs spending the watched outpoints.
+
+Addresses are converted to scriptPubKeys once, when added;
+the raw scriptPubKey bytes of the scanned outputs are then
+looked up in a hash set, without decoding them.
+Decoded blocks and transactions are serialized first,
+serialized ones are scanned in place through their lazy views.
+
+Matched outputs are watched too,
+so that their spending is detected, also in the same block.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from . import script
+from .alias import Script, String
+from .block_files import LazyBlock
+from .blocks import Block
+from .lazy_tx import LazyTx
+from .scriptpubkey_address import scriptPubKey_from_address
+from .tx import Tx
+from .tx_in import OutPoint
+from .tx_out import TxOut
+from .utils import bytes_from_octets
+
+_Buffer = Union[bytes, bytearray, memoryview]
+
+
+@dataclass
+class Match:
+    """Matched output (received) or input (spent) of a transaction.
+
+    outpoint is the serialized received output or spent outpoint;
+    scriptPubKey and nValue are those of the received or spent output,
+    empty and zero for watched outpoints added without them.
+    """
+
+    __slots__ = ("txid", "index", "spent", "outpoint", "scriptPubKey", "nValue")
+
+    txid: str
+    # output index if received, input index if spent
+    index: int
+    spent: bool
+    outpoint: bytes
+    scriptPubKey: bytes
+    nValue: int
+
+
+def _script_bytes(scriptPubKey: Script) -> bytes:
+    if isinstance(scriptPubKey, list):
+        return script.encode(scriptPubKey)
+    return bytes_from_octets(scriptPubKey)
+
+
+class WatchList:
+    """Hash sets of watched scriptPubKeys and outpoints.
+
+    Spent outpoints are not watched anymore.
+    """
+
+    def __init__(
+        self,
+        scriptPubKeys: Iterable[Script] = (),
+        addresses: Iterable[String] = (),
+        outpoints: Iterable[OutPoint] = (),
+    ) -> None:
+
+        self.scriptPubKeys = {_script_bytes(s) for s in scriptPubKeys}
+        # serialized outpoint -> (scriptPubKey, nValue)
+        self.outpoints: Dict[bytes, Tuple[bytes, int]] = {}
+        for address in addresses:
+            self.add_address(address)
+        for outpoint in outpoints:
+            self.add_outpoint(outpoint)
+
+    def __len__(self) -> int:
+        return len(self.scriptPubKeys) + len(self.outpoints)
+
+    def add_scriptPubKey(self, scriptPubKey: Script) -> None:
+        self.scriptPubKeys.add(_script_bytes(scriptPubKey))
+
+    def add_address(self, address: String) -> None:
+        self.scriptPubKeys.add(scriptPubKey_from_address(address)[0])
+
+    def add_outpoint(self, outpoint: OutPoint, tx_out: Optional[TxOut] = None) -> None:
+        if tx_out is None:
+            self.outpoints[outpoint.serialize()] = (b"", 0)
+        else:
+            scriptPubKey = script.encode(tx_out.scriptPubKey)
+            self.outpoints[outpoint.serialize()] = (scriptPubKey, tx_out.nValue)
+
+    def _match_lazy_tx(self, lazy_tx: LazyTx, readonly: bool) -> List[Match]:
+        matches: List[Match] = []
+        txid_bytes = b""
+        outpoints = self.outpoints
+        if outpoints:
+            for i, tx_in in enumerate(lazy_tx.vin):
+                prevout: _Buffer = tx_in.prevout_bytes
+                if not readonly:
+                    prevout = bytes(prevout)
+                if prevout in outpoints:
+                    key = bytes(prevout)
+                    scriptPubKey, nValue = outpoints.pop(key)
+                    txid_bytes = txid_bytes or lazy_tx.txid_bytes
+                    txid = txid_bytes[::-1].hex()
+                    matches.append(Match(txid, i, True, key, scriptPubKey, nValue))
+        scriptPubKeys = self.scriptPubKeys
+        for i, tx_out in enumerate(lazy_tx.vout):
+            script_bytes: _Buffer = tx_out.scriptPubKeyBytes
+            if not readonly:
+                script_bytes = bytes(script_bytes)
+            if script_bytes in scriptPubKeys:
+                txid_bytes = txid_bytes or lazy_tx.txid_bytes
+                txid = txid_bytes[::-1].hex()
+                key = txid_bytes + i.to_bytes(4, "little")
+                scriptPubKey = bytes(script_bytes)
+                nValue = tx_out.nValue
+                # watch the received output for its spending
+                outpoints[key] = (scriptPubKey, nValue)
+                matches.append(Match(txid, i, False, key, scriptPubKey, nValue))
+        return matches
+
+    def match_tx(self, tx: Union[Tx, LazyTx, _Buffer, str]) -> List[Match]:
+        "Return the matched inputs and outputs of the transaction."
+
+        if isinstance(tx, Tx):
+            tx = LazyTx(tx.serialize())
+        elif not isinstance(tx, LazyTx):
+            tx = LazyTx(tx)
+        return self._match_lazy_tx(tx, tx._buffer.readonly)
+
+    def match_block(self, block: Union[Block, LazyBlock, _Buffer]) -> List[Match]:
+        "Return the matched inputs and outputs of the block transactions."
+
+        if isinstance(block, Block):
+            block = LazyBlock(block.serialize())
+        elif not isinstance(block, LazyBlock):
+            block = LazyBlock(block)
+        # writable buffers are not hashable: slices are copied
+        readonly = block.header_bytes.readonly
+        matches: List[Match] = []
+        for lazy_tx in block.transactions:
+            matches.extend(self._match_lazy_tx(lazy_tx, readonly))
+        return matches